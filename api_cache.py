@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+🗄️ API Cache — صُحبة Trading
+كاش محلي مشترك لردود Polygon (SQLite بوضع WAL)
+- المفتاح = URL + params مرتبة (بدون apiKey)
+- TTL لكل endpoint: ثواني للأسعار، يوم للبيانات المرجعية
+- LRU: لما يتجاوز الحجم MAX_BYTES نحذف المنتهي ثم الأقدم استخداماً
+- آمن لأكثر من process (screener + executor + monitor) بنفس الوقت
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+CACHE_DB = '/home/openclaw/.openclaw/workspace/.market_cache.sqlite'
+MAX_BYTES = 200 * 1024 * 1024
+
+# (بداية المسار, TTL بالثواني) — أول تطابق يفوز، وبدون تطابق = بدون كاش
+TTL_RULES = [
+    ('/v3/snapshot/options/', 15),
+    ('/v3/reference/', 86400),
+    ('/v2/reference/news', 300),
+]
+
+_local = threading.local()
+
+
+def ttl_for(path):
+    for prefix, ttl in TTL_RULES:
+        if path.startswith(prefix):
+            return ttl
+    return None
+
+
+def make_key(url, params=None):
+    """مفتاح ثابت بغض النظر عن ترتيب الـ params أو نوع القيم"""
+    items = sorted((str(k), str(v)) for k, v in (params or {}).items() if k != 'apiKey')
+    return hashlib.sha256(json.dumps([url, items]).encode()).hexdigest()
+
+
+def _conn():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(CACHE_DB, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('''CREATE TABLE IF NOT EXISTS cache (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            expires REAL NOT NULL,
+            accessed REAL NOT NULL
+        )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache(accessed)')
+        _local.conn = conn
+    return conn
+
+
+def get(key):
+    """القيمة لو موجودة وما انتهت، وإلا None"""
+    try:
+        conn = _conn()
+        now = time.time()
+        row = conn.execute('SELECT value FROM cache WHERE key = ? AND expires > ?', (key, now)).fetchone()
+        if row is None:
+            return None
+        conn.execute('UPDATE cache SET accessed = ? WHERE key = ?', (now, key))
+        return json.loads(zlib.decompress(row[0]))
+    except (sqlite3.Error, OSError, ValueError, zlib.error):
+        return None
+
+
+def put(key, value, ttl):
+    try:
+        conn = _conn()
+        now = time.time()
+        blob = zlib.compress(json.dumps(value, separators=(',', ':')).encode())
+        conn.execute('INSERT OR REPLACE INTO cache (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)',
+                     (key, blob, len(blob), now + ttl, now))
+        _evict(conn, now)
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def _evict(conn, now):
+    total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+    if total <= MAX_BYTES:
+        return
+    conn.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+    total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+    excess = total - MAX_BYTES
+    if excess <= 0:
+        return
+    freed = 0
+    victims = []
+    for key, size in conn.execute('SELECT key, size FROM cache ORDER BY accessed'):
+        victims.append((key,))
+        freed += size
+        if freed >= excess:
+            break
+    conn.executemany('DELETE FROM cache WHERE key = ?', victims)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+🧪 Backtest — صُحبة Trading
+إعادة تشغيل morning_screener على أيام مسجّلة وقياس نتيجة التوصيات بقواعد trade_monitor
+- record: يشغّل الـ screener على الشبكة ويسجّل كل طلب/رد (News / Flow / IV Rank / السلاسل) في كاسيت لليوم
+- run: كل يوم يتعاد عبر نفس دوال الـ step (cassette.use replay → الكاسيت بدل الشبكة)
+  على كل الأنوية (ProcessPool)، بعدها شموع العقود المختارة من bar_store
+  ومحاكاة TP1/TP2/SL/DTE بـ decide_exit نفسها
+- التقرير: hit rate وتوزيع P&L لكل فئة قرار (≥7 دخول، ≥5 حجم أصغر، أقل = لا تدخل) ولكل score
+
+استخدام:
+  python3 backtest.py record                       — تسجيل screen اليوم (بعد/بدل تشغيل الصباح)
+  python3 backtest.py run [from] [to] [--workers N] [--no-fetch]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+import bar_store
+import cassette
+import quotes
+from trade_monitor import SL_PCT, TP1_PCT, TP2_PCT, apply_exit, decide_exit
+
+# === إعدادات ===
+CASSETTE_PREFIX = 'backtest'  # كاسيت اليوم: cassettes/backtest/YYYY-MM-DD.json
+RESULTS_FILE = '/home/openclaw/.openclaw/workspace/backtest/results.json'
+FETCH_WORKERS = 8
+MULTIPLIER = 100
+
+DECISIONS = [('enter', 7), ('reduce', 5), ('skip', -1)]  # نفس عتبات enrich_candidates
+
+
+# === التسجيل (كاسيت لكل يوم) ===
+
+def cassette_name(day):
+    return f"{CASSETTE_PREFIX}/{day}"
+
+
+def recorded_days(start=None, end=None):
+    """الأيام اللي لها كاسيت (YYYY-MM-DD) بين start و end"""
+    folder = os.path.join(cassette.CASSETTE_DIR, CASSETTE_PREFIX)
+    names = sorted(p[:-len('.json')] for p in os.listdir(folder) if p.endswith('.json')) if os.path.isdir(folder) else []
+    return [d for d in names if (start is None or d >= start) and (end is None or d <= end)]
+
+
+def record():
+    import morning_screener
+    day = datetime.utcnow().strftime('%Y-%m-%d')
+    with cassette.use(cassette_name(day), 'record') as tape:
+        data = morning_screener.run_screener()
+    requests = sum(map(len, tape.entries.values()))
+    print(f"✅ {requests} responses, {len(data['recommendations'])} recommendations → {tape.path}")
+
+
+# === replay (process لكل يوم) ===
+
+def replay_day(day):
+    """يشغّل run_screener على كاسيت يوم واحد (الساعة على وقت التسجيل) — يرجّع التوصيات اللي لها عقد
+    طلب ما تسجّل = "ما فيه بيانات" (404 / None) وينعد في misses
+    الـ process يعيد استخدامه الـ pool لأيام ثانية → memo الأسعار يتصفّر (api_cache ما يُستخدم مع transport)"""
+    import morning_screener
+    quotes.clear()
+    with cassette.use(cassette_name(day), 'replay') as tape:
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = morning_screener.run_screener()
+    recs = [{
+        'date': day,
+        'ticker': r['ticker'], 'direction': r['direction'],
+        'score': r['scorecard'], 'qty': r.get('max_contracts') or 1,
+        'contract': r['contract'],
+    } for r in data['recommendations'] if r.get('contract') and r['contract'].get('mid', 0) > 0]
+    return {'date': day, 'recommendations': recs, 'misses': len(tape.misses)}
+
+
+# === المحاكاة ===
+
+def is_complete(ticker, expiry):
+    """آخر شمعة مخزنة يوم الانتهاء أو بعده → مسار العقد كامل وما يحتاج طلب"""
+    last = bar_store.last_timestamp(ticker, 'day')
+    if last is None:
+        return False
+    day = datetime.fromtimestamp(last / 1000, tz=timezone.utc).astimezone(bar_store.MARKET_TZ).date()
+    return day >= datetime.strptime(expiry, '%Y-%m-%d').date()
+
+
+def fetch_paths(expiries, start):
+    """شموع يومية للعقود من Polygon إلى bar_store — expiries: {ticker: YYYY-MM-DD}
+    العقد اللي مساره مخزن لين الانتهاء ما يطلب شي (كل طلب يمر على الـ limiter)"""
+    lookback = (datetime.utcnow() - start).days + 5
+    missing = sorted(t for t, expiry in expiries.items() if not is_complete(t, expiry))
+    print(f"📥 {len(missing)}/{len(expiries)} عقود تحتاج شموع من Polygon")
+
+    def one(ticker):
+        try:
+            bar_store.update_from_polygon(ticker, 'day', lookback_days=lookback)
+        except Exception as e:
+            print(f"  ⚠️ {ticker}: {e}")
+
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        list(pool.map(one, missing))
+
+
+def _bar_prices(bar, entry):
+    """أسعار الشمعة بترتيب متحفظ: الافتتاح، ثم مستوى SL لو انلمس (القاع قبل القمة)، ثم TP1/TP2، ثم الإغلاق"""
+    o, h, l, c = bar['o'], bar['h'], bar['l'], bar['c']
+    prices = [o]
+    sl = entry * (1 + SL_PCT)
+    if l <= sl < o:
+        prices.append(sl)
+    for tp in (entry * (1 + TP1_PCT), entry * (1 + TP2_PCT)):
+        if o < tp <= h:
+            prices.append(tp)
+    prices.append(c)
+    return prices
+
+
+def simulate(rec, bars):
+    """قواعد trade_monitor على شموع العقد من يوم الدخول — الدخول على mid وقت الـ screen"""
+    c = rec['contract']
+    entry = c['mid']
+    expiry = datetime.strptime(c['expiry'], '%Y-%m-%d').date()
+    qty = rec['qty']
+    trade = {'qty': qty, 'qty_remaining': qty, 'tp1_hit': False, 'status': 'OPEN'}
+    proceeds = 0.0
+    exits = []
+    for bar in bars:
+        day = datetime.utcfromtimestamp(bar['t'] / 1000).date()
+        dte = (expiry - day).days
+        for price in _bar_prices(bar, entry):
+            remaining = trade['qty_remaining']
+            pnl_pct = round((price / entry - 1) * 100, 6)
+            action, sell_qty = decide_exit(remaining, trade['tp1_hit'], price, pnl_pct, dte)
+            if sell_qty > 0:
+                apply_exit(trade, action, remaining, sell_qty, price)
+                proceeds += sell_qty * price
+                exits.append(action)
+            if trade['status'] == 'CLOSED':
+                break
+        if trade['status'] == 'CLOSED':
+            break
+
+    mark = bars[-1]['c'] if len(bars) else 0
+    value = proceeds + trade['qty_remaining'] * mark  # المفتوح بآخر إغلاق
+    pnl = (value - qty * entry) * MULTIPLIER
+    return {
+        **{k: rec[k] for k in ('date', 'ticker', 'direction', 'score', 'qty')},
+        'contract': c['contract_ticker'], 'entry': entry,
+        'status': trade['status'], 'exits': exits, 'bars': len(bars),
+        'pnl': round(pnl, 2), 'pnl_pct': round(pnl / (qty * entry * MULTIPLIER) * 100, 2),
+    }
+
+
+def _decision(score):
+    return next(name for name, threshold in DECISIONS if score >= threshold)
+
+
+def _stats(trades):
+    if not trades:
+        return {'trades': 0}
+    pct = np.array([t['pnl_pct'] for t in trades])
+    pnl = np.array([t['pnl'] for t in trades])
+    reasons = {}
+    for t in trades:
+        reason = t['exits'][-1] if t['status'] == 'CLOSED' else 'OPEN'
+        reasons[reason] = reasons.get(reason, 0) + 1
+    return {
+        'trades': len(trades),
+        'hit_rate': round(float((pnl > 0).mean()), 3),
+        'total_pnl': round(float(pnl.sum()), 2),
+        'mean_pct': round(float(pct.mean()), 2),
+        'pct_percentiles': dict(zip(('p5', 'p25', 'p50', 'p75', 'p95'),
+                                    np.round(np.percentile(pct, [5, 25, 50, 75, 95]), 2).tolist())),
+        'exit_reasons': reasons,
+    }
+
+
+def report(trades):
+    by_decision = {name: _stats([t for t in trades if _decision(t['score']) == name]) for name, _ in DECISIONS}
+    by_score = {score: _stats([t for t in trades if t['score'] == score])
+                for score in sorted({t['score'] for t in trades})}
+    return {'all': _stats(trades), 'by_decision': by_decision, 'by_score': by_score}
+
+
+def run(start=None, end=None, workers=None, fetch=True):
+    days = recorded_days(start, end)
+    if not days:
+        print(f"⚠️ ما فيه كاسيتات في {os.path.join(cassette.CASSETTE_DIR, CASSETTE_PREFIX)}")
+        return None
+
+    # replay كل يوم على core مستقل (كل process له transport وساعة خاصة فيه)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        screens = list(pool.map(replay_day, days))
+    recs = [r for s in screens for r in s['recommendations']]
+    misses = sum(s['misses'] for s in screens)
+    print(f"🔁 {len(days)} أيام → {len(recs)} توصيات بعقد ({misses} طلب بدون تسجيل)")
+
+    if fetch and recs:
+        fetch_paths({r['contract']['contract_ticker']: r['contract']['expiry'] for r in recs},
+                    datetime.strptime(min(r['date'] for r in recs), '%Y-%m-%d'))
+
+    trades = []
+    for rec in recs:
+        day = datetime.strptime(rec['date'], '%Y-%m-%d')
+        expiry = datetime.strptime(rec['contract']['expiry'], '%Y-%m-%d') + timedelta(days=1)
+        bars = bar_store.query(rec['contract']['contract_ticker'], 'day', start=day, end=expiry)
+        if len(bars):
+            trades.append(simulate(rec, bars))
+
+    result = {'days': len(days), 'recommendations': len(recs), 'simulated': len(trades),
+              'cassette_misses': misses, 'report': report(trades)}
+    os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+    with open(RESULTS_FILE, 'w') as f:
+        json.dump({**result, 'trades': trades}, f, indent=2)
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='إعادة تشغيل morning_screener على أيام مسجّلة')
+    sub = parser.add_subparsers(dest='cmd')
+    sub.add_parser('record', help='تسجيل screen اليوم في كاسيت')
+    run_p = sub.add_parser('run', help='replay الأيام المسجّلة + محاكاة التوصيات')
+    run_p.add_argument('start', nargs='?', help='من يوم (YYYY-MM-DD)')
+    run_p.add_argument('end', nargs='?', help='إلى يوم (YYYY-MM-DD)')
+    run_p.add_argument('--workers', type=int, help='عدد الـ processes (الافتراضي: كل الأنوية)')
+    run_p.add_argument('--no-fetch', dest='fetch', action='store_false', help='بدون طلب شموع العقود')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.cmd == 'record':
+        record()
+    elif args.cmd == 'run':
+        result = run(args.start, args.end, workers=args.workers, fetch=args.fetch)
+        if result:
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        print(__doc__)
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+🗃️ Bar Store — صُحبة Trading
+مخزن محلي للشموع (OHLCV) — ملف ثنائي واحد لكل (سهم, timespan)
+- سجلات ثابتة الحجم (BAR_DTYPE) تنضاف append-only
+- القراءة عبر np.memmap → الاستعلامات ترجع views بدون نسخ
+- التحديث يجيب من Polygon الشموع الأحدث من آخر شمعة مخزنة فقط
+- مستدعي يطلب تاريخ أقدم من أول شمعة (lookback_days أكبر) → الفجوة تنجاب ويتعاد كتابة الملف (backfill)
+- آخر شمعة مخزنة ترجع من Polygon بسعر مختلف (adjusted بعد split) → الملف ينمسح وينبني من جديد
+- الشمعة اللي ما اكتملت (اليوم الحالي / الدقيقة الحالية) ما تنخزن — ترجع للمستدعي بس
+- الوقت نفس Polygon: الشمعة اليومية تبدأ منتصف الليل بتوقيت نيويورك
+- grouped: شموع يوم كامل لكل السوق (Polygon grouped daily) — ملف لكل يوم، يتجاب مرة وحدة
+  التسخين من الصفر ~130 طلب → بحصة polygon (5 بالدقيقة) ≈ 26 دقيقة؛ بعدها طلب واحد لكل يوم جديد
+
+استخدام:
+  python3 bar_store.py import spx_daily.csv SPX   — استيراد CSV (Date,Open,High,Low,Close,Volume)
+  python3 bar_store.py update SPY day             — تحديث من Polygon
+  python3 bar_store.py show SPY day 5             — آخر 5 شموع
+  python3 bar_store.py invalidate SPY             — مسح شموع السهم (split) — التحديث الجاي يعيد جلبها
+  python3 bar_store.py grouped 120                — آخر 120 يوم تداول لكل السوق (تسخين كامل — بطيء أول مرة)
+"""
+import csv
+import fcntl
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from market_client import polygon_get
+
+STORE_DIR = '/home/openclaw/.openclaw/workspace/bars'
+GROUPED_DIR = os.path.join(STORE_DIR, 'grouped')
+GROUPED_WORKERS = 8  # أيام متوازية — الحصة نفسها يضبطها rate_limiter
+SPLIT_TOLERANCE = 0.005  # فرق close آخر شمعة مخزنة عن Polygon أكبر من كذا → التاريخ adjusted تغيّر
+MARKET_TZ = ZoneInfo('America/New_York')
+
+BAR_DTYPE = np.dtype([
+    ('t', 'i8'),  # بداية الشمعة — ms منذ epoch (نفس Polygon)
+    ('o', 'f8'), ('h', 'f8'), ('l', 'f8'), ('c', 'f8'),
+    ('v', 'f8'), ('vw', 'f8'),
+])
+
+# يوم كامل لكل السوق — مرتب بالرمز (searchsorted)
+GROUPED_DTYPE = np.dtype([('T', 'U12')] + [(name, BAR_DTYPE[name]) for name in BAR_DTYPE.names])
+
+TIMESPAN_MS = {
+    'minute': 60_000,
+    'hour': 3_600_000,
+    'day': 86_400_000,
+}
+
+
+def _path(symbol, timespan):
+    safe = ''.join(ch if ch.isalnum() else '_' for ch in symbol.upper())
+    return os.path.join(STORE_DIR, f"{safe}_{timespan}.bars")
+
+
+def _cover_path(symbol, timespan):
+    return _path(symbol, timespan) + '.from'
+
+
+@contextmanager
+def _locked(symbol, timespan):
+    """lock ملف جانبي — الملف نفسه يتبدل (os.replace) وقت backfill فما ينفع flock عليه"""
+    os.makedirs(STORE_DIR, exist_ok=True)
+    with open(_path(symbol, timespan) + '.lock', 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def calendar_days(trading_bars):
+    """أيام تقويم تكفي لـ trading_bars شمعة يومية (~252 يوم تداول بالسنة + هامش للعطل)"""
+    return int(trading_bars * 1.5) + 30
+
+
+def load(symbol, timespan='day'):
+    """كل الشموع المخزنة كـ memmap (read-only) — مصفوفة فاضية لو ما فيه ملف"""
+    path = _path(symbol, timespan)
+    if not os.path.exists(path) or os.path.getsize(path) < BAR_DTYPE.itemsize:
+        return np.empty(0, dtype=BAR_DTYPE)
+    count = os.path.getsize(path) // BAR_DTYPE.itemsize
+    return np.memmap(path, dtype=BAR_DTYPE, mode='r', shape=(count,))
+
+
+def last_timestamp(symbol, timespan='day'):
+    bars = load(symbol, timespan)
+    return int(bars['t'][-1]) if len(bars) else None
+
+
+def covered_from(symbol, timespan='day'):
+    """أقدم وقت (ms) انطلب من Polygon لهالملف — لو أول شمعة بعده فما فيه تداول قبلها (إدراج / IPO)
+    ملف بدون سجل (استيراد CSV) → أول شمعة فيه"""
+    try:
+        with open(_cover_path(symbol, timespan)) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        bars = load(symbol, timespan)
+        return int(bars['t'][0]) if len(bars) else None
+
+
+def _set_covered_from(symbol, timespan, ms):
+    path = _cover_path(symbol, timespan)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, 'w') as f:
+        f.write(str(int(ms)))
+    os.replace(tmp, path)
+
+
+def query(symbol, timespan='day', start=None, end=None):
+    """الشموع بين start و end (datetime أو ms، end غير شامل) — view على الملف بدون نسخ"""
+    bars = load(symbol, timespan)
+    t = bars['t']
+    lo = np.searchsorted(t, _to_ms(start), 'left') if start is not None else 0
+    hi = np.searchsorted(t, _to_ms(end), 'left') if end is not None else len(bars)
+    return bars[lo:hi]
+
+
+def _to_ms(value):
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() * 1000)
+    return int(value)
+
+
+def to_records(bars):
+    """list of dicts (t/o/h/l/c/v/vw) → structured array"""
+    arr = np.empty(len(bars), dtype=BAR_DTYPE)
+    for field in BAR_DTYPE.names:
+        arr[field] = [b.get(field, np.nan) for b in bars]
+    return arr
+
+
+def to_dicts(arr):
+    """structured array → list of dicts بنفس شكل نتائج Polygon aggs"""
+    return [{field: row[field].item() for field in BAR_DTYPE.names} for row in arr]
+
+
+def _unique(bars):
+    """مرتب بالوقت بدون تكرار (أول نسخة تفوز)"""
+    bars = np.sort(bars, order='t', kind='stable')
+    if len(bars) > 1:
+        bars = bars[np.concatenate([[True], np.diff(bars['t']) > 0])]
+    return bars
+
+
+def append(symbol, timespan, bars):
+    """يضيف الشموع الأحدث من آخر شمعة مخزنة فقط — يرجّع عدد المضاف"""
+    if not isinstance(bars, np.ndarray):
+        bars = to_records(bars)
+    with _locked(symbol, timespan):
+        last = last_timestamp(symbol, timespan)
+        new = _unique(bars)
+        if last is not None:
+            new = new[new['t'] > last]
+        with open(_path(symbol, timespan), 'ab') as f:
+            new.tofile(f)
+    return len(new)
+
+
+def backfill(symbol, timespan, bars, since_ms):
+    """يضيف شموع أقدم من أول شمعة مخزنة — الملف يتعاد كتابته (ذري)، الـ memmaps المفتوحة تكمل على القديم
+    since_ms: بداية الفترة اللي انطلبت (حتى لو Polygon ما رجّع شي قبل أول شمعة)"""
+    if not isinstance(bars, np.ndarray):
+        bars = to_records(bars)
+    with _locked(symbol, timespan):
+        path = _path(symbol, timespan)
+        merged = _unique(np.concatenate([np.asarray(load(symbol, timespan)), bars]))
+        tmp = f"{path}.tmp.{os.getpid()}"
+        merged.tofile(tmp)
+        os.replace(tmp, path)
+        _set_covered_from(symbol, timespan, since_ms)
+    return len(merged)
+
+
+def invalidate(symbol, timespans=None):
+    """يمسح شموع السهم (كل الـ timespans افتراضياً) — بعد split الشموع adjusted المخزنة غلط
+    التحديث الجاي يجيب التاريخ من جديد"""
+    for timespan in timespans or TIMESPAN_MS:
+        with _locked(symbol, timespan):
+            for path in (_path(symbol, timespan), _cover_path(symbol, timespan)):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def _fetch(symbol, timespan, multiplier, start, end):
+    """شموع Polygon (adjusted) بين تاريخين شاملين — None لو الطلب فشل (مو نفس "ما فيه شموع")"""
+    data = polygon_get(
+        f'/v2/aggs/ticker/{symbol}/range/{multiplier}/{timespan}/{start:%Y-%m-%d}/{end:%Y-%m-%d}',
+        {'adjusted': 'true', 'sort': 'asc', 'limit': 50000})
+    if data is None:
+        return None
+    return data.get('results') or []
+
+
+def update_from_polygon(symbol, timespan='day', multiplier=1, lookback_days=365):
+    """يجيب من Polygon الشموع بعد آخر شمعة مخزنة ويخزن المكتمل منها
+    - الملف يبدأ بعد (الحين - lookback_days) → الفجوة قبل أول شمعة تنجاب أول (backfill)
+    - آخر شمعة مخزنة رجعت بسعر ثاني (split) → الملف ينمسح وينبني من جديد
+    يرجّع الشموع غير المكتملة (list of dicts) عشان المستدعي يضيفها للعرض"""
+    now = datetime.now(timezone.utc)
+    now_ms = int(now.timestamp() * 1000)
+    want = now - timedelta(days=lookback_days)
+    end = now + timedelta(days=1)
+
+    covered = covered_from(symbol, timespan)
+    first = load(symbol, timespan)[:1]
+    if len(first) and covered is not None and _to_ms(want) < covered:
+        first_t = int(first['t'][0])
+        older = _fetch(symbol, timespan, multiplier, want, datetime.fromtimestamp(first_t / 1000, tz=timezone.utc))
+        if older is not None:
+            backfill(symbol, timespan, [b for b in older if b['t'] < first_t], _to_ms(want))
+
+    stored = load(symbol, timespan)
+    last = int(stored['t'][-1]) if len(stored) else None
+    start = datetime.fromtimestamp(last / 1000, tz=timezone.utc) if last is not None else want
+    results = _fetch(symbol, timespan, multiplier, start, end)
+    if results is None:
+        return []
+
+    # الطلب يبدأ من يوم آخر شمعة مخزنة → ترجع معه — سعر مختلف = Polygon عدّل التاريخ (split)
+    if last is not None:
+        again = next((b for b in results if b['t'] == last), None)
+        if again is not None and abs(again['c'] / stored['c'][-1] - 1) > SPLIT_TOLERANCE:
+            print(f"⚠️ {symbol} {timespan}: close {stored['c'][-1]} → {again['c']} (split؟) — إعادة بناء الملف")
+            lookback_days = max(lookback_days, (now_ms - (covered or now_ms)) // TIMESPAN_MS['day'] + 1)
+            invalidate(symbol, [timespan])
+            return update_from_polygon(symbol, timespan, multiplier, lookback_days)
+
+    span = TIMESPAN_MS[timespan] * multiplier
+    complete = [b for b in results if b['t'] + span <= now_ms]
+    live = [b for b in results if b['t'] + span > now_ms and (last is None or b['t'] > last)]
+    if complete:
+        append(symbol, timespan, complete)
+    if last is None:
+        with _locked(symbol, timespan):
+            _set_covered_from(symbol, timespan, _to_ms(want))
+    return live
+
+
+def import_csv(path, symbol, timespan='day'):
+    """استيراد CSV (Date,Open,High,Low,Close,Volume) مرة وحدة — بعدها القراءة من الـ memmap
+    اليوم يبدأ منتصف الليل بتوقيت نيويورك (نفس Polygon) عشان الشموع المستوردة والمجلوبة ما تتكرر"""
+    bars = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            try:
+                day = datetime.strptime(row['Date'], '%Y-%m-%d').replace(tzinfo=MARKET_TZ)
+                bars.append({
+                    't': int(day.timestamp() * 1000),
+                    'o': float(row['Open']), 'h': float(row['High']),
+                    'l': float(row['Low']), 'c': float(row['Close']),
+                    'v': float(row.get('Volume') or 0),
+                })
+            except (KeyError, ValueError):
+                continue
+    return append(symbol, timespan, bars)
+
+
+# === grouped daily (كل السوق) ===
+
+def _grouped_path(day):
+    return os.path.join(GROUPED_DIR, f"{day}.npy")
+
+
+def grouped_day(day):
+    """كل أسهم السوق ليوم واحد (YYYY-MM-DD) — من الملف، أو من Polygon مرة وحدة
+    اليوم ما اكتمل (أو خطأ شبكة) ما ينخزن. يوم عطلة ينخزن فاضي عشان ما يتعاد طلبه"""
+    path = _grouped_path(day)
+    if os.path.exists(path):
+        return np.load(path)
+    data = polygon_get(f'/v2/aggs/grouped/locale/us/market/stocks/{day}', {'adjusted': 'true'})
+    if data is None:
+        return np.empty(0, dtype=GROUPED_DTYPE)
+    results = [b for b in data.get('results') or [] if b.get('T')]
+    arr = np.empty(len(results), dtype=GROUPED_DTYPE)
+    for field in GROUPED_DTYPE.names:
+        arr[field] = [b.get(field, np.nan) for b in results]
+    arr = np.sort(arr, order='T')
+    if day < datetime.now(timezone.utc).strftime('%Y-%m-%d'):
+        os.makedirs(GROUPED_DIR, exist_ok=True)
+        tmp = f"{path}.tmp.{os.getpid()}.npy"
+        np.save(tmp, arr)
+        os.replace(tmp, path)
+    return arr
+
+
+def grouped_days(count, end=None, max_fetch=None):
+    """آخر count يوم تداول مكتمل قبل end (افتراضياً اليوم) — {يوم: مصفوفة}
+    الأيام الناقصة تتجاب بالتوازي (الأحدث أول)، والعطل (مصفوفة فاضية) تتخطى
+    max_fetch: سقف الطلبات لهالتشغيل — الكاش يدفى على كذا تشغيل، والنتيجة أحدث أيام متصلة بس
+    (ممكن أقل من count لين يكمل التسخين)"""
+    end = end or datetime.now(timezone.utc).date()
+    # أيام الأسبوع فقط + هامش للعطل الرسمية
+    candidates = []
+    day = end - timedelta(days=1)
+    while len(candidates) < int(count * 1.06) + 5:
+        if day.weekday() < 5:
+            candidates.append(day.strftime('%Y-%m-%d'))
+        day -= timedelta(days=1)
+    # candidates من الأحدث للأقدم — الناقص اللي نحتاجه بس (العطل المخزنة فاضية ما تنحسب)
+    missing = []
+    have = 0
+    for day in candidates:
+        path = _grouped_path(day)
+        if os.path.exists(path):
+            have += len(np.load(path, mmap_mode='r')) > 0
+        else:
+            missing.append(day)
+        if have + len(missing) >= count:
+            break
+    if max_fetch is not None:
+        missing = missing[:max_fetch]
+    with ThreadPoolExecutor(max_workers=GROUPED_WORKERS) as pool:
+        fetched = dict(zip(missing, pool.map(grouped_day, missing)))
+
+    days = {}
+    for day in candidates:
+        if not os.path.exists(_grouped_path(day)):
+            break  # ناقص (سقف الطلبات / خطأ شبكة) — الأقدم منه مو متصل
+        arr = fetched[day] if day in fetched else np.load(_grouped_path(day))
+        if len(arr):
+            days[day] = arr
+            if len(days) == count:
+                break
+    return dict(reversed(days.items()))
+
+
+def grouped_matrix(symbols, days, fields=('o', 'h', 'l', 'c', 'v')):
+    """{field: مصفوفة (سهم × يوم)} من grouped_days — NaN لسهم ما تداول ذاك اليوم"""
+    symbols = np.asarray(symbols, dtype=GROUPED_DTYPE['T'])
+    out = {field: np.full((len(symbols), len(days)), np.nan) for field in fields}
+    for j, arr in enumerate(days.values()):
+        if not len(arr) or not len(symbols):
+            continue
+        idx = np.minimum(np.searchsorted(arr['T'], symbols), len(arr) - 1)
+        hit = arr['T'][idx] == symbols
+        for field in fields:
+            out[field][hit, j] = arr[field][idx[hit]]
+    return out
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    cmd = sys.argv[1]
+    if cmd == 'import' and len(sys.argv) >= 4:
+        print(f"✅ {import_csv(sys.argv[2], sys.argv[3])} bars imported")
+    elif cmd == 'update':
+        timespan = sys.argv[3] if len(sys.argv) > 3 else 'day'
+        live = update_from_polygon(sys.argv[2], timespan)
+        print(f"✅ {len(load(sys.argv[2], timespan))} bars stored, {len(live)} live")
+    elif cmd == 'invalidate':
+        invalidate(sys.argv[2])
+        print(f"✅ {sys.argv[2]} — التحديث الجاي يجيب التاريخ من جديد")
+    elif cmd == 'grouped':
+        days = grouped_days(int(sys.argv[2]))
+        print(f"✅ {len(days)} days, {max((len(a) for a in days.values()), default=0)} tickers/day")
+    elif cmd == 'show':
+        timespan = sys.argv[3] if len(sys.argv) > 3 else 'day'
+        n = int(sys.argv[4]) if len(sys.argv) > 4 else 5
+        for b in to_dicts(load(sys.argv[2], timespan)[-n:]):
+            print(datetime.fromtimestamp(b['t'] / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M'), b)
+    else:
+        print(__doc__)
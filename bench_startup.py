@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+⏱️ Startup Bench — صُحبة Trading
+وقت الـ import لكل سكربت (python -X importtime) مقابل ميزانية ثابتة
+- كل سكربت ينقاس في process جديد RUNS مرات — ناخذ الأقل (الباقي ضجيج cache/disk)
+- الـ modules الثقيلة الممنوعة وقت الـ import (numpy / pandas / yfinance ...) لازم تتحمل lazy
+- exit code 1 لو سكربت تعدى ميزانيته أو حمّل module ممنوع → ينفع قبل أي تعديل على cron
+- الميزانيات مقاسة وكل المكتبات منصّبة: lazy() يرفع ModuleNotFoundError وقت الـ import لو مكتبة ناقصة
+  → أول سطر يطبع إصدار Python والمكتبات الناقصة، والسكربت اللي فشل بسببها ينكتب "missing dependency"
+
+استخدام:
+  python3 bench_startup.py                  — كل السكربتات
+  python3 bench_startup.py spx_update --runs 5 [--json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+
+from lazy_import import available
+
+# === إعدادات ===
+RUNS = 3
+TOP_IMPORTS = 3
+
+HEAVY = ('numpy', 'pandas', 'yfinance', 'matplotlib', 'mplfinance', 'httpx', 'requests', 'ib_insync')
+NO_PLOTTING = ('pandas', 'yfinance', 'matplotlib', 'mplfinance')
+
+# سكربت: (ميزانية الـ import بالـ ms, modules ممنوع تتحمل وقت الـ import)
+BUDGETS = {
+    'spx_update': (60, HEAVY),           # cron كل 5 دقايق — سطر JSON واحد
+    'spx_chart': (60, HEAVY),
+    'technical_analysis': (80, HEAVY),
+    'spx_call_monitor': (250, NO_PLOTTING),
+    'morning_screener': (250, NO_PLOTTING),
+}
+
+
+def environment():
+    """إصدار Python والمكتبات الثقيلة الناقصة — الأرقام ما تنقارن بين بيئتين مختلفتين"""
+    return {'python': platform.python_version(), 'missing': [m for m in HEAVY if not available(m)]}
+
+
+def importtime(module, cwd):
+    """[(depth, self_us, cumulative_us, name)] من import واحد في process جديد"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=cwd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        last = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'import failed'
+        if last.startswith('ModuleNotFoundError'):
+            last = f"missing dependency — {last}"
+        raise RuntimeError(last)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cum_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, int(self_us), int(cum_us), name.strip()))
+    return rows
+
+
+def bench(module, budget_ms, forbidden, runs=RUNS, cwd=None):
+    cwd = cwd or os.path.dirname(os.path.abspath(__file__))
+    best = None
+    for _ in range(runs):
+        rows = importtime(module, cwd)
+        total = next(cum for depth, _, cum, name in rows if depth == 0 and name == module)
+        if best is None or total < best[0]:
+            best = (total, rows)
+    total, rows = best
+    loaded = {name.split('.')[0] for _, _, _, name in rows}
+    # أثقل imports مباشرة تحت السكربت
+    children = sorted((r for r in rows if r[0] == 1), key=lambda r: -r[2])[:TOP_IMPORTS]
+    bad = sorted(loaded & set(forbidden))
+    ms = round(total / 1000, 1)
+    return {
+        'module': module,
+        'ms': ms,
+        'budget_ms': budget_ms,
+        'ok': ms <= budget_ms and not bad,
+        'forbidden_loaded': bad,
+        'heaviest': [(name, round(cum / 1000, 1)) for _, _, cum, name in children],
+    }
+
+
+def run(modules=None, runs=RUNS):
+    results = []
+    for module in modules or BUDGETS:
+        budget_ms, forbidden = BUDGETS.get(module, (float('inf'), HEAVY))
+        try:
+            results.append(bench(module, budget_ms, forbidden, runs))
+        except RuntimeError as e:
+            results.append({'module': module, 'ok': False, 'error': str(e)})
+    return results
+
+
+def format_table(results, env):
+    missing = ', '.join(env['missing']) or 'none'
+    lines = [f"Python {env['python']} — missing: {missing}",
+             f"{'Script':<20} {'ms':>7} {'budget':>7}  Status  Heaviest imports"]
+    for r in results:
+        if 'error' in r:
+            lines.append(f"{r['module']:<20} {'-':>7} {'-':>7}  ❌      {r['error']}")
+            continue
+        status = '✅' if r['ok'] else '❌'
+        heaviest = ', '.join(f"{name} {ms}" for name, ms in r['heaviest'])
+        lines.append(f"{r['module']:<20} {r['ms']:>7} {r['budget_ms']:>7}  {status}      {heaviest}")
+        if r['forbidden_loaded']:
+            lines.append(f"{'':<20} ⚠️ loaded at import: {', '.join(r['forbidden_loaded'])}")
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='وقت الـ import لكل سكربت مقابل ميزانيته')
+    parser.add_argument('modules', nargs='*', help='السكربتات (الافتراضي: كل اللي في BUDGETS)')
+    parser.add_argument('--runs', type=int, default=RUNS, help='مرات القياس لكل سكربت (ناخذ الأقل)')
+    parser.add_argument('--json', action='store_true', help='JSON بدل الجدول')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    env = environment()
+    results = run(args.modules or None, args.runs)
+    if args.json:
+        print(json.dumps({'environment': env, 'results': results}, indent=2))
+    else:
+        print(format_table(results, env))
+    sys.exit(0 if all(r['ok'] for r in results) else 1)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+🧮 Black-Scholes — صُحبة Trading
+تسعير و Greeks على مصفوفات NumPy (عقد واحد أو سلسلة كاملة بنفس الاستدعاء)
+- كل المدخلات تقبل broadcasting (مثلاً شبكة صدمات spot × IV × عقود)
+- نفس وحدات Polygon: theta لليوم، vega لكل 1% تغير في IV
+- توزيع طبيعي بتقريب rational (Abramowitz & Stegun 26.2.17) — بدون scipy
+- IV من السعر (Newton + bisection على مصفوفات) → Greeks للعقود اللي Polygon يرجعها فاضية
+"""
+import numpy as np
+
+# === إعدادات ===
+RISK_FREE = 0.045
+MIN_T = 1 / (365 * 24)  # ساعة — عقود 0DTE ما تقسم على صفر
+IV_MIN = 1e-4
+IV_MAX = 5.0
+
+_SQRT_2PI = np.sqrt(2 * np.pi)
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+def norm_cdf(x):
+    """خطأ مطلق < 7.5e-8"""
+    x = np.asarray(x, dtype=float)
+    k = 1.0 / (1.0 + 0.2316419 * np.abs(x))
+    poly = k * (0.319381530 + k * (-0.356563782 + k * (1.781477937 + k * (-1.821255978 + k * 1.330274429))))
+    upper = 1.0 - norm_pdf(x) * poly
+    return np.where(x >= 0, upper, 1.0 - upper)
+
+
+def _d1_d2(S, K, T, sigma, r):
+    T = np.maximum(T, MIN_T)
+    vol_t = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma * sigma) * T) / vol_t
+    return d1, d1 - vol_t, T
+
+
+def price(S, K, T, sigma, is_call, r=RISK_FREE):
+    """سعر العقد. T بالسنين، is_call مصفوفة bool"""
+    S, K, sigma = (np.asarray(a, dtype=float) for a in (S, K, sigma))
+    d1, d2, T = _d1_d2(S, K, T, sigma, r)
+    disc = K * np.exp(-r * T)
+    call = S * norm_cdf(d1) - disc * norm_cdf(d2)
+    put = disc * norm_cdf(-d2) - S * norm_cdf(-d1)
+    return np.where(is_call, call, put)
+
+
+def greeks(S, K, T, sigma, is_call, r=RISK_FREE):
+    """dict من المصفوفات: delta, gamma, theta (لليوم), vega (لكل 1% IV)"""
+    S, K, sigma = (np.asarray(a, dtype=float) for a in (S, K, sigma))
+    d1, d2, T = _d1_d2(S, K, T, sigma, r)
+    pdf = norm_pdf(d1)
+    sqrt_t = np.sqrt(T)
+    disc = K * np.exp(-r * T)
+    delta = np.where(is_call, norm_cdf(d1), norm_cdf(d1) - 1)
+    theta_common = -S * pdf * sigma / (2 * sqrt_t)
+    theta = np.where(is_call,
+                     theta_common - r * disc * norm_cdf(d2),
+                     theta_common + r * disc * norm_cdf(-d2))
+    return {
+        'delta': delta,
+        'gamma': pdf / (S * sigma * sqrt_t),
+        'theta': theta / 365,
+        'vega': S * pdf * sqrt_t / 100,
+    }
+
+
+def years_to_expiry(expiry, now=None):
+    """YYYYMMDD أو YYYY-MM-DD (أو قائمة منها) → سنين حتى إغلاق يوم الانتهاء (16:00 نيويورك ≈ 21:00 UTC)"""
+    now = np.datetime64('now') if now is None else np.datetime64(now)
+    exp = np.asarray([str(e).replace('-', '') for e in np.atleast_1d(expiry)])
+    exp = np.array([f"{e[:4]}-{e[4:6]}-{e[6:8]}T21:00" for e in exp], dtype='datetime64[m]')
+    years = (exp - now).astype('timedelta64[m]').astype(float) / (365 * 24 * 60)
+    return years if np.ndim(expiry) else years[0]
+
+
+def implied_vol(option_price, S, K, T, is_call, r=RISK_FREE, tol=1e-6, max_iter=60):
+    """IV لمصفوفة عقود: Newton محمي بـ bracket (لو الخطوة طلعت برا → bisection)
+    السعر برا حدود الـ arbitrage أو بدون حل داخل [IV_MIN, IV_MAX] → NaN"""
+    target, S, K, T = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (option_price, S, K, T)))
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), target.shape)
+    T = np.maximum(T, MIN_T)
+    disc = K * np.exp(-r * T)
+    with np.errstate(invalid='ignore'):
+        lower = np.where(is_call, np.maximum(S - disc, 0), np.maximum(disc - S, 0))
+        upper = np.where(is_call, S, disc)
+        ok = (S > 0) & (K > 0) & (target > lower) & (target < upper)
+
+    lo = np.full(target.shape, IV_MIN)
+    hi = np.full(target.shape, IV_MAX)
+    # بداية Brenner-Subrahmanyam (دقيقة قرب ATM)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.clip(np.sqrt(2 * np.pi / T) * target / S, IV_MIN * 2, IV_MAX / 2)
+    sigma = np.where(ok, sigma, 0.3)
+    for _ in range(max_iter):
+        diff = price(S, K, T, sigma, is_call, r) - target
+        active = ok & (np.abs(diff) > tol) & (hi - lo > tol)
+        if not active.any():
+            break
+        # السعر يزيد مع sigma → الـ bracket يضيق مع كل خطوة
+        hi = np.where(active & (diff > 0), sigma, hi)
+        lo = np.where(active & (diff < 0), sigma, lo)
+        d1, _, _ = _d1_d2(S, K, T, sigma, r)
+        vega = S * norm_pdf(d1) * np.sqrt(T)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            step = sigma - diff / vega
+        bad = ~np.isfinite(step) | (step <= lo) | (step >= hi)
+        sigma = np.where(active, np.where(bad, (lo + hi) / 2, step), sigma)
+    diff = price(S, K, T, sigma, is_call, r) - target
+    solved = ok & ((np.abs(diff) <= tol) | (hi - lo <= tol)) & (sigma < IV_MAX * 0.999)
+    return np.where(solved, sigma, np.nan)
+
+
+def fill_greeks(records, now=None):
+    """سجلات options_chain.compact_contract (أو بنفس المفاتيح) بدون delta/IV → تنحسب من
+    mid + underlying_price بالمكان. الـ Greeks الموجودة ما تتغير. يرجّع عدد السجلات المكمّلة"""
+    todo = [rec for rec in records
+            if (rec.get('delta') is None or not rec.get('iv'))
+            and rec.get('underlying_price') and rec.get('strike') and rec.get('expiry')
+            and (rec.get('bid') or 0) > 0 and (rec.get('ask') or 0) > 0]
+    if not todo:
+        return 0
+    S = np.array([rec['underlying_price'] for rec in todo], dtype=float)
+    K = np.array([rec['strike'] for rec in todo], dtype=float)
+    mid = np.array([(rec['bid'] + rec['ask']) / 2 for rec in todo])
+    is_call = np.array([str(rec.get('contract_type') or rec.get('right', '')).upper().startswith('C')
+                        for rec in todo])
+    T = np.atleast_1d(years_to_expiry([rec['expiry'] for rec in todo], now))
+    iv = np.array([rec.get('iv') or np.nan for rec in todo], dtype=float)
+    missing = np.isnan(iv)
+    if missing.any():
+        iv[missing] = implied_vol(mid[missing], S[missing], K[missing], T[missing], is_call[missing])
+    g = greeks(S, K, T, iv, is_call)
+    filled = 0
+    for i, rec in enumerate(todo):
+        if np.isnan(iv[i]):
+            continue
+        rec['iv'] = rec.get('iv') or round(float(iv[i]), 4)
+        for name, values in g.items():
+            if rec.get(name) is None:
+                rec[name] = round(float(values[i]), 4)
+        rec['greeks_model'] = True
+        filled += 1
+    return filled
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+📼 Cassette — صُحبة Trading
+تسجيل وإعادة تشغيل كل طلبات الـ APIs الخارجية (Polygon / UW / Finviz عبر market_client، و yfinance عبر call())
+- record: الطلبات تروح للشبكة، وكل رد ينحفظ مع زمنه
+- replay: نفس الردود بنفس الترتيب بدون شبكة — مع latency اختياري (صفر / المسجّل / ثابت / مضاعف)
+- الأجسام مضغوطة (zlib) ومخزنة بالـ sha256 حقها → الرد المكرر (بين الطلبات أو الكاسيتات) ينحفظ مرة وحدة
+- طلب ما تسجّل بالضبط يجرب مفتاح بدون التواريخ (YYYY-MM-DD) — عشان نفس الكاسيت يشتغل يوم ثاني
+- اللي ما له تسجيل ينحسب في misses: HTTP يرجع 404 و call() يرجع None (المستدعي يتعامل معه كـ "ما فيه بيانات")
+  و --strict يرفع LookupError بدلها
+
+استخدام:
+  python3 cassette.py record morning morning_screener.py
+  python3 cassette.py replay morning [--latency recorded|0|120|x0.5] [--strict] morning_screener.py
+  python3 cassette.py show morning
+"""
+import hashlib
+import json
+import os
+import re
+import runpy
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+
+import api_cache
+import market_client
+
+# === إعدادات ===
+CASSETTE_DIR = '/home/openclaw/.openclaw/workspace/cassettes'
+BLOB_DIR = os.path.join(CASSETTE_DIR, 'blobs')
+
+_DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+def _keys(url, params):
+    """(المفتاح الدقيق, مفتاح بدون تواريخ)"""
+    exact = api_cache.make_key(url, params)
+    loose = api_cache.make_key(_DATE.sub('{date}', url),
+                               {k: _DATE.sub('{date}', str(v)) for k, v in (params or {}).items()})
+    return exact, loose
+
+
+def _blob_path(digest):
+    return os.path.join(BLOB_DIR, digest[:2], f"{digest}.z")
+
+
+def put_blob(body):
+    digest = hashlib.sha256(body).hexdigest()
+    path = _blob_path(digest)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp, 'wb') as f:
+            f.write(zlib.compress(body, 6))
+        os.replace(tmp, path)
+    return digest
+
+
+def get_blob(digest):
+    with open(_blob_path(digest), 'rb') as f:
+        return zlib.decompress(f.read())
+
+
+def parse_latency(spec):
+    """'recorded' | 'x0.5' (نسبة من المسجّل) | '120' (ms ثابت) | None/'0' → بدون"""
+    if spec in (None, '', '0', 'none'):
+        return None
+    if spec == 'recorded':
+        return ('scale', 1.0)
+    if str(spec).startswith('x'):
+        return ('scale', float(spec[1:]))
+    return ('fixed', float(spec))
+
+
+class Cassette:
+    """transport لـ market_client.set_transport — record يمرر للشبكة، replay يرد من الملف"""
+
+    def __init__(self, name, mode='replay', latency=None, strict=False):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"mode must be record or replay, not {mode}")
+        self.name = name
+        self.mode = mode
+        self.live = mode == 'record'
+        self.latency = parse_latency(latency) if isinstance(latency, (str, type(None))) else latency
+        self.strict = strict
+        self.path = os.path.join(CASSETTE_DIR, f"{name}.json")
+        self.entries = {}   # مفتاح → [{status, content_type, blob, ms}] بترتيب التسجيل
+        self.aliases = {}   # مفتاح بدون تواريخ → المفتاح الدقيق
+        self.recorded_at = None
+        self.misses = []
+        self._cursor = {}
+        self._lock = threading.Lock()
+        if mode == 'record':
+            self.recorded_at = datetime.utcnow().isoformat()
+        else:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.entries = data['entries']
+            self.aliases = data.get('aliases', {})
+            self.recorded_at = data.get('recorded_at')
+
+    # --- HTTP ---
+
+    def __call__(self, url, params, headers):
+        exact, loose = _keys(url, params)
+        if self.mode == 'record':
+            started = time.perf_counter()
+            resp = market_client.live_request(url, params, headers)
+            entry = {'status': resp.status_code, 'content_type': resp.headers.get('Content-Type', ''),
+                     'blob': put_blob(resp.content), 'ms': round((time.perf_counter() - started) * 1000, 1)}
+            self._append(exact, loose, entry)
+            return market_client.RecordedResponse(resp.status_code, resp.content,
+                                                  {'Content-Type': entry['content_type']})
+        entry = self._next(exact, loose, url)
+        if entry is None:
+            return market_client.RecordedResponse(404)
+        self._delay(entry)
+        return market_client.RecordedResponse(entry['status'], get_blob(entry['blob']),
+                                              {'Content-Type': entry.get('content_type', '')})
+
+    # --- دوال بدون HTTP (yfinance) ---
+
+    def call(self, name, args, fn):
+        exact, loose = _keys(f"call:{name}", {'args': json.dumps(args, default=str)})
+        if self.mode == 'record':
+            started = time.perf_counter()
+            value = fn()
+            body = json.dumps(value, default=float).encode()
+            self._append(exact, loose, {'status': 200, 'blob': put_blob(body),
+                                        'ms': round((time.perf_counter() - started) * 1000, 1)})
+            return value
+        entry = self._next(exact, loose, f"call:{name} {args}")
+        if entry is None:
+            return None  # نفس مسار الـ 404: "ما فيه بيانات" — و strict يرفع من _next
+        self._delay(entry)
+        return json.loads(get_blob(entry['blob']))
+
+    # --- داخلي ---
+
+    def _append(self, exact, loose, entry):
+        with self._lock:
+            self.entries.setdefault(exact, []).append(entry)
+            if loose != exact:
+                self.aliases[loose] = exact
+
+    def _next(self, exact, loose, label):
+        """نفس الطلب أكثر من مرة → الردود بترتيبها، وبعد آخر رد يتكرر الأخير"""
+        with self._lock:
+            key = exact if exact in self.entries else self.aliases.get(loose)
+            if key is None:
+                self.misses.append(label)
+                if self.strict:
+                    raise LookupError(f"cassette {self.name}: no recording for {label}")
+                return None
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = i + 1
+            seq = self.entries[key]
+            return seq[min(i, len(seq) - 1)]
+
+    def _delay(self, entry):
+        if self.latency is None:
+            return
+        kind, value = self.latency
+        ms = entry.get('ms', 0) * value if kind == 'scale' else value
+        if ms > 0:
+            time.sleep(ms / 1000)
+
+    def save(self):
+        if self.mode != 'record':
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp, 'w') as f:
+            json.dump({'recorded_at': self.recorded_at, 'entries': self.entries, 'aliases': self.aliases},
+                      f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+
+
+@contextmanager
+def use(name, mode='replay', latency=None, strict=False):
+    """كل طلبات market_client داخل الـ with تمر على الكاسيت
+    replay يضبط الساعة (market_client.now) على وقت التسجيل"""
+    cassette = Cassette(name, mode, latency, strict)
+    as_of = datetime.fromisoformat(cassette.recorded_at) if mode == 'replay' and cassette.recorded_at else None
+    market_client.set_transport(cassette, as_of=as_of)
+    try:
+        yield cassette
+    finally:
+        market_client.set_transport(None)
+        cassette.save()
+
+
+def call(name, args, fn):
+    """fn() مباشرة — إلا لو فيه كاسيت شغال: يتسجّل أو يرجع المسجّل (JSON)، و None لو ما تسجّل"""
+    active = market_client.transport()
+    if isinstance(active, Cassette):
+        return active.call(name, args, fn)
+    return fn()
+
+
+def _run_script(argv):
+    script = argv[0]
+    sys.argv = list(argv)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    try:
+        runpy.run_path(script, run_name='__main__')
+    except SystemExit as e:
+        return e.code
+    return 0
+
+
+def _show(name):
+    with open(os.path.join(CASSETTE_DIR, f"{name}.json")) as f:
+        data = json.load(f)
+    entries = data['entries']
+    blobs = {e['blob'] for seq in entries.values() for e in seq}
+    size = sum(os.path.getsize(_blob_path(b)) for b in blobs if os.path.exists(_blob_path(b)))
+    total_ms = sum(e['ms'] for seq in entries.values() for e in seq)
+    print(json.dumps({'recorded_at': data.get('recorded_at'), 'requests': sum(map(len, entries.values())),
+                      'keys': len(entries), 'blobs': len(blobs),
+                      'compressed_bytes': size, 'approx_network_ms': round(total_ms, 1)}, indent=2))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len(args) >= 2 and args[0] == 'show':
+        _show(args[1])
+    elif len(args) >= 3 and args[0] in ('record', 'replay'):
+        mode, name, rest = args[0], args[1], args[2:]
+        latency = None
+        if '--latency' in rest:
+            i = rest.index('--latency')
+            latency = rest[i + 1]
+            del rest[i:i + 2]
+        strict = '--strict' in rest
+        rest = [a for a in rest if a != '--strict']
+        started = time.perf_counter()
+        with use(name, mode, latency, strict) as cassette:
+            code = _run_script(rest)
+        print(f"📼 {mode} {name}: {time.perf_counter() - started:.2f}s"
+              + (f", {len(cassette.misses)} miss" if mode == 'replay' else ''), file=sys.stderr)
+        sys.exit(code)
+    else:
+        print(__doc__)
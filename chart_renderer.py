@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+🖼️ Chart Renderer — صُحبة Trading
+رسم شارت spx_chart بسرعة: figure واحد مبني مسبقاً يتعاد استخدامه بدل mplfinance من الصفر كل مرة
+- 4 panels (سعر / volume / RSI / MACD) بنفس ستايل spx_chart — تنبني مرة وحدة لكل DPI
+- الشموع والمؤشرات artists (collections / lines) تتحدث بياناتها بس
+- الطبقة الثابتة (الخلفية، الـ grid، محاور y، مستويات وملصقات S/R) تنرسم مرة وتنحفظ
+  (Agg copy_from_bbox) — وتتعاد بس لما حدود المحاور (مقرّبة لأرقام مرتبة) تتغير
+- كل رسم بعدها: restore للطبقة الثابتة + رسم الـ artists المتحركة فوقها (blitting) → PNG مباشرة من الـ buffer
+- preview: DPI أقل للمعاينة السريعة
+
+استخدام:
+  renderer = chart_renderer.get(dpi, levels)   — نفس الـ instance لكل (DPI, مستويات) بالـ process
+  renderer.render(data, output)                — data من spx_chart.with_indicators
+"""
+import math
+import os
+import threading
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.ticker import MaxNLocator
+from PIL import Image
+
+# === إعدادات ===
+FIGSIZE = (14, 10)
+PANEL_RATIOS = (4, 1.2, 1.2, 1.2)
+BARS = 80
+XTICK_EVERY = 16
+BODY_WIDTH = 0.6
+PNG_COMPRESS = 1  # ضغط PNG خفيف — الرسم أسرع والحجم يظل مناسب لتيليجرام
+
+UP, DOWN = '#26a69a', '#ef5350'
+FACE = '#131722'
+EDGE = '#2a2e39'
+TEXT = '#d1d4dc'
+GRID = '#2a2e39'
+
+_renderers = {}
+_renderers_lock = threading.Lock()
+
+
+def _nice(x):
+    """أقرب رقم مرتب (1 / 2 / 2.5 / 5 × 10^k) أكبر من أو يساوي x"""
+    if not x > 0:
+        return 1.0
+    exp = 10 ** math.floor(math.log10(x))
+    for m in (1, 2, 2.5, 5, 10):
+        if m * exp >= x:
+            return m * exp
+    return 10 * exp
+
+
+def _limits(lo, hi, pad=0.05):
+    """حدود مقرّبة لخطوة مرتبة — تتغير بس لما السعر يطلع برا النطاق (الطبقة الثابتة تنحفظ)"""
+    lo, hi = float(np.nanmin(lo)), float(np.nanmax(hi))
+    if not (math.isfinite(lo) and math.isfinite(hi)):
+        return (0.0, 1.0)
+    step = _nice(max(hi - lo, abs(hi) * 1e-3) / 4)
+    return (math.floor((lo - (hi - lo) * pad) / step) * step, math.ceil((hi + (hi - lo) * pad) / step) * step)
+
+
+def _boxes(x, bottom, top, width=BODY_WIDTH):
+    """مستطيلات (n, 4, 2) لـ PolyCollection — جسم الشمعة / عمود الـ volume"""
+    left, right = x - width / 2, x + width / 2
+    return np.stack([np.column_stack([left, bottom]), np.column_stack([left, top]),
+                     np.column_stack([right, top]), np.column_stack([right, bottom])], axis=1)
+
+
+class ChartRenderer:
+    def __init__(self, dpi, levels):
+        """levels: [(السعر, النص, اللون, عرض الخط)] — مستويات S/R ثابتة بالطبقة الثابتة"""
+        self.dpi = dpi
+        self.levels = levels
+        self.fig = Figure(figsize=FIGSIZE, dpi=dpi, facecolor=FACE)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self._lock = threading.Lock()
+        self._background = None
+        self._background_key = None
+        self._build()
+
+    # --- البناء (مرة وحدة) ---
+
+    def _build(self):
+        gs = self.fig.add_gridspec(len(PANEL_RATIOS), 1, height_ratios=PANEL_RATIOS, hspace=0.06,
+                                   left=0.02, right=0.93, top=0.94, bottom=0.05)
+        self.ax_price = self.fig.add_subplot(gs[0])
+        self.ax_vol = self.fig.add_subplot(gs[1], sharex=self.ax_price)
+        self.ax_rsi = self.fig.add_subplot(gs[2], sharex=self.ax_price)
+        self.ax_macd = self.fig.add_subplot(gs[3], sharex=self.ax_price)
+        self.axes = [self.ax_price, self.ax_vol, self.ax_rsi, self.ax_macd]
+
+        for ax, label in zip(self.axes, ('Price', 'Volume', 'RSI', 'MACD')):
+            ax.set_facecolor(FACE)
+            for spine in ax.spines.values():
+                spine.set_color(EDGE)
+            ax.yaxis.tick_right()
+            ax.yaxis.set_label_position('right')
+            ax.set_ylabel(label, color=TEXT)
+            ax.tick_params(colors=TEXT, labelsize=8)
+            ax.tick_params(axis='x', labelbottom=False)
+            ax.grid(True, linestyle=':', color=GRID, linewidth=0.8)
+            ax.yaxis.set_major_locator(MaxNLocator(5 if ax is self.ax_price else 3))
+            ax.set_xlim(-1, BARS)
+            ax.set_xticks(np.arange(0, BARS, XTICK_EVERY))
+
+        # مستويات S/R + ملصقاتها + legend (ثابتة)
+        for level, text, color, width in self.levels:
+            self.ax_price.axhline(level, color=color, linestyle='--', linewidth=width)
+            self.ax_price.text(0.98, level, f'{text} ', transform=self.ax_price.get_yaxis_transform(),
+                               color=color, fontsize=8.5, va='center', ha='right', clip_on=True,
+                               bbox=dict(boxstyle='round,pad=0.2', facecolor=FACE, edgecolor=color, alpha=0.8))
+        self.ax_price.text(0.02, 0.97, '— MA20  — MA50  ··· VWAP', transform=self.ax_price.transAxes,
+                           color=TEXT, fontsize=9, va='top',
+                           bbox=dict(boxstyle='round,pad=0.3', facecolor=FACE, edgecolor=EDGE))
+        self.ax_rsi.axhline(70, color='#ff4444', linestyle='--', linewidth=0.5)
+        self.ax_rsi.axhline(30, color='#00cc66', linestyle='--', linewidth=0.5)
+        self.ax_rsi.set_ylim(0, 100)
+
+        # الـ artists المتحركة — ما تدخل الطبقة الثابتة
+        self.wicks = LineCollection([], linewidths=1)
+        self.bodies = PolyCollection([], linewidths=0.6)
+        self.volume = PolyCollection([], linewidths=0)
+        self.ax_price.add_collection(self.wicks)
+        self.ax_price.add_collection(self.bodies)
+        self.ax_vol.add_collection(self.volume)
+        self.ma20, = self.ax_price.plot([], [], color='#FFD700', linewidth=1.2, linestyle='--')
+        self.ma50, = self.ax_price.plot([], [], color='#FF69B4', linewidth=1.2, linestyle='--')
+        self.vwap, = self.ax_price.plot([], [], color='#00bcd4', linewidth=1.2, linestyle=':')
+        self.rsi, = self.ax_rsi.plot([], [], color='#ab47bc', linewidth=1.2)
+        self.hist = PolyCollection([], linewidths=0)
+        self.ax_macd.add_collection(self.hist)
+        self.macd, = self.ax_macd.plot([], [], color='#2196F3', linewidth=1.2)
+        self.signal, = self.ax_macd.plot([], [], color='#FF9800', linewidth=1)
+        self.title = self.ax_price.text(0.0, 1.02, '', transform=self.ax_price.transAxes, color='white',
+                                        fontsize=15, fontweight='bold', ha='left', va='bottom')
+        # أوقات محور x نصوص متحركة (تتغير مع كل شمعة) — علامات الـ grid نفسها ثابتة
+        self.xlabels = [self.ax_macd.text(x, -0.08, '', transform=self.ax_macd.get_xaxis_transform(),
+                                          color=TEXT, fontsize=8, ha='center', va='top')
+                        for x in range(0, BARS, XTICK_EVERY)]
+        self.dynamic = [self.volume, self.wicks, self.bodies, self.ma20, self.ma50, self.vwap, self.rsi,
+                        self.hist, self.macd, self.signal, self.title, *self.xlabels]
+        for artist in self.dynamic:
+            artist.set_animated(True)
+
+    # --- التحديث ---
+
+    def _update(self, data):
+        data = data.tail(BARS)
+        n = len(data)
+        x = np.arange(n, dtype=float)
+        o, h, l, c = (data[col].to_numpy(dtype=float) for col in ('Open', 'High', 'Low', 'Close'))
+        v = data['Volume'].to_numpy(dtype=float)
+        colors = np.where(c >= o, UP, DOWN)
+
+        self.wicks.set_segments(np.stack([np.column_stack([x, l]), np.column_stack([x, h])], axis=1))
+        self.wicks.set_color(colors)
+        bottom, top = np.minimum(o, c), np.maximum(o, c)
+        top = np.where(top - bottom < 1e-9, bottom + (h.max() - l.min()) * 1e-3, top)  # doji يبان
+        self.bodies.set_verts(_boxes(x, bottom, top))
+        self.bodies.set_facecolor(colors)
+        self.bodies.set_edgecolor(colors)
+        self.volume.set_verts(_boxes(x, np.zeros(n), np.nan_to_num(v)))
+        self.volume.set_facecolor(colors)
+
+        self.ma20.set_data(x, data['MA20'].to_numpy(dtype=float))
+        self.ma50.set_data(x, data['MA50'].to_numpy(dtype=float))
+        self.vwap.set_data(x, data['VWAP'].to_numpy(dtype=float))
+        self.rsi.set_data(x, data['RSI'].to_numpy(dtype=float))
+        hist = np.nan_to_num(data['Hist'].to_numpy(dtype=float))
+        self.hist.set_verts(_boxes(x, np.zeros(n), hist, width=0.7))
+        self.hist.set_facecolor(np.where(hist >= 0, UP, DOWN))
+        macd = data['MACD'].to_numpy(dtype=float)
+        signal = data['Signal'].to_numpy(dtype=float)
+        self.macd.set_data(x, macd)
+        self.signal.set_data(x, signal)
+
+        self.title.set_text(f'  S&P 500 Futures (ES) — {c[-1]:,.2f}')
+        for label, pos in zip(self.xlabels, range(0, BARS, XTICK_EVERY)):
+            label.set_text(data.index[pos].strftime('%b %d, %H:%M') if pos < n else '')
+
+        self.ax_price.set_ylim(*_limits(l, h))
+        self.ax_vol.set_ylim(0, _nice(np.nanmax(v) * 1.1) if n and np.nanmax(v) > 0 else 1)
+        span = _nice(np.nanmax(np.abs(np.concatenate([macd, signal, hist]))) * 1.1) if n else 1
+        self.ax_macd.set_ylim(-span, span)
+
+    def _key(self):
+        return tuple(ax.get_ylim() for ax in self.axes)
+
+    def render(self, data, output):
+        """يرسم data (آخر BARS شمعة) إلى output (PNG) — الطبقة الثابتة تنعاد بس لو الحدود تغيرت"""
+        with self._lock:
+            self._update(data)
+            key = self._key()
+            if key != self._background_key:
+                self.canvas.draw()  # animated=True ما تنرسم هنا
+                self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+                self._background_key = key
+            else:
+                self.canvas.restore_region(self._background)
+            for artist in self.dynamic:
+                self.fig.draw_artist(artist)
+
+            width, height = self.canvas.get_width_height()
+            image = Image.frombuffer('RGBA', (width, height), self.canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+            tmp = f"{output}.tmp.{os.getpid()}.png"
+            image.convert('RGB').save(tmp, compress_level=PNG_COMPRESS)
+            os.replace(tmp, output)
+            return output
+
+
+def get(dpi, levels):
+    """renderer واحد لكل (DPI, مستويات) بالـ process — أول استدعاء يبني الـ figure"""
+    key = (dpi, tuple(levels))
+    with _renderers_lock:
+        renderer = _renderers.get(key)
+        if renderer is None:
+            renderer = _renderers[key] = ChartRenderer(dpi, levels)
+        return renderer
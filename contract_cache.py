@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+🗂️ Contract Cache — صُحبة Trading
+كاش دائم للعقود المؤهلة من IB (conId + الحقول اللي يحتاجها placeOrder)
+- المفتاح: (symbol, expiry, strike, right, exchange)
+- يتجدد يومياً: أول استخدام في يوم جديد يتجاهل كاش الأمس
+- العقود الناقصة تتأهل بدفعة وحدة بدل رحلة لكل عقد
+- آمن لأكثر من process (daemon + monitor + executor)
+
+استخدام:
+  python3 contract_cache.py prequalify SPX 20260212 6800 7000   — تأهيل سلسلة كاملة قبل الافتتاح
+  python3 contract_cache.py show
+"""
+import fcntl
+import json
+import os
+import sys
+from datetime import date
+
+from ib_insync import IB, Index, Option, Stock
+
+# === إعدادات ===
+CACHE_FILE = '/home/openclaw/.openclaw/workspace/.ib_contracts.json'
+IB_HOST = '127.0.0.1'
+IB_PORT = 4002
+PREQUALIFY_CLIENT_ID = 20
+PREQUALIFY_BATCH = 50
+INDEX_SYMBOLS = ('SPX', 'NDX', 'RUT', 'VIX')
+
+# الحقول اللي تكفي لإعادة بناء العقد بدون رحلة لـ IB
+FIELDS = ('conId', 'symbol', 'lastTradeDateOrContractMonth', 'strike', 'right',
+          'exchange', 'multiplier', 'currency', 'localSymbol', 'tradingClass')
+
+_memory = {'date': None, 'contracts': {}}
+
+
+def make_key(symbol, expiry, strike, right, exchange='SMART'):
+    right = right.upper()[0]  # CALL → C
+    return f"{symbol.upper()}|{str(expiry).replace('-', '')}|{float(strike)}|{right}|{exchange}"
+
+
+def _contract_key(contract):
+    return make_key(contract.symbol, contract.lastTradeDateOrContractMonth,
+                    contract.strike, contract.right, contract.exchange or 'SMART')
+
+
+def _read_file():
+    try:
+        with open(CACHE_FILE) as f:
+            data = json.load(f)
+        if data.get('date') == date.today().isoformat():
+            return data
+    except (OSError, ValueError):
+        pass
+    return {'date': date.today().isoformat(), 'contracts': {}}
+
+
+def _load():
+    if _memory['date'] != date.today().isoformat():
+        _memory.update(_read_file())
+    return _memory['contracts']
+
+
+def _save(new_entries):
+    """يدمج مع الملف (ممكن process ثاني كتب بعدنا) ويكتب بشكل ذري"""
+    if not new_entries:
+        return
+    with open(CACHE_FILE + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        data = _read_file()
+        data['contracts'].update(new_entries)
+        tmp = f"{CACHE_FILE}.tmp.{os.getpid()}"
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, CACHE_FILE)
+    _memory.update(data)
+
+
+def lookup(symbol, expiry, strike, right, exchange='SMART'):
+    """العقد المؤهل من الكاش، أو None"""
+    fields = _load().get(make_key(symbol, expiry, strike, right, exchange))
+    return Option(**fields) if fields else None
+
+
+def _split(contracts):
+    """(المخزّن لكل عقد أو None, [(key, عقد)] اللي تحتاج تأهيل)
+    المفتاح ينحسب قبل التأهيل لأن qualifyContracts يعدّل العقد نفسه"""
+    cached = _load()
+    if any(_contract_key(c) not in cached for c in contracts):
+        # ممكن process ثاني أهّلها بعد ما قرينا الملف
+        _memory.update(_read_file())
+        cached = _memory['contracts']
+    found = []
+    missing = []
+    for c in contracts:
+        key = _contract_key(c)
+        fields = cached.get(key)
+        found.append(Option(**fields) if fields else None)
+        if not fields:
+            missing.append((key, c))
+    return found, missing
+
+
+def _merge(found, missing):
+    """يحفظ اللي تأهل ويرجّع القائمة بنفس ترتيب المدخلات (None = غير موجود)"""
+    new_entries = {key: {f: getattr(c, f) for f in FIELDS} for key, c in missing if c.conId}
+    _save(new_entries)
+    pending = iter(missing)
+    out = []
+    for hit in found:
+        if hit is None:
+            _, c = next(pending)
+            hit = c if c.conId else None
+        out.append(hit)
+    return out
+
+
+def qualify(ib, *contracts):
+    """بديل ib.qualifyContracts: الكاش أولاً ثم دفعة وحدة للناقص"""
+    found, missing = _split(contracts)
+    if missing:
+        ib.qualifyContracts(*(c for _, c in missing))
+    return _merge(found, missing)
+
+
+async def qualify_async(ib, *contracts):
+    found, missing = _split(contracts)
+    if missing:
+        await ib.qualifyContractsAsync(*(c for _, c in missing))
+    return _merge(found, missing)
+
+
+def prequalify(ib, symbol, expiry, low=None, high=None, rights=('C', 'P')):
+    """يأهل كل strikes السلسلة (بين low و high) لتاريخ انتهاء واحد — يرجّع عدد العقود في الكاش"""
+    symbol = symbol.upper()
+    expiry = str(expiry).replace('-', '')
+    underlying = Index(symbol, 'CBOE', 'USD') if symbol in INDEX_SYMBOLS else Stock(symbol, 'SMART', 'USD')
+    ib.qualifyContracts(underlying)
+    if not underlying.conId:
+        return 0
+
+    strikes = set()
+    for chain in ib.reqSecDefOptParams(underlying.symbol, '', underlying.secType, underlying.conId):
+        if chain.exchange == 'SMART' and expiry in chain.expirations:
+            strikes.update(chain.strikes)
+    strikes = sorted(s for s in strikes
+                     if (low is None or s >= low) and (high is None or s <= high))
+
+    contracts = [Option(symbol, expiry, s, r, 'SMART', currency='USD') for s in strikes for r in rights]
+    count = 0
+    for i in range(0, len(contracts), PREQUALIFY_BATCH):
+        count += sum(1 for c in qualify(ib, *contracts[i:i + PREQUALIFY_BATCH]) if c is not None)
+    return count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 4 and sys.argv[1] == 'prequalify':
+        low = float(sys.argv[4]) if len(sys.argv) > 4 else None
+        high = float(sys.argv[5]) if len(sys.argv) > 5 else None
+        ib = IB()
+        ib.connect(IB_HOST, IB_PORT, clientId=PREQUALIFY_CLIENT_ID, timeout=15)
+        try:
+            n = prequalify(ib, sys.argv[2], sys.argv[3], low, high)
+        finally:
+            ib.disconnect()
+        print(f"✅ {n} contracts cached for {sys.argv[2].upper()} {sys.argv[3]}")
+    elif len(sys.argv) >= 2 and sys.argv[1] == 'show':
+        contracts = _load()
+        print(f"📅 {_memory['date']} — {len(contracts)} contracts")
+        for key, fields in sorted(contracts.items()):
+            print(f"  {key} → conId {fields['conId']}")
+    else:
+        print(__doc__)
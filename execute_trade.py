@@ -8,34 +8,26 @@
 - حد 3 صفقات مفتوحة
 """
 from ib_insync import *
-import requests
 import json
 import sys
-import os
 from datetime import datetime
 
+import black_scholes as bs
+import contract_cache
+import portfolio_risk
+import quotes
+import trade_store
+from market_client import polygon_get
+from options_chain import compact_contract
+from order_manager import OrderManager
+
 IB_HOST = '127.0.0.1'
 IB_PORT = 4002
 CLIENT_ID = 80
-TRADES_LOG = '/home/openclaw/.openclaw/workspace/trades_log.json'
 MAX_POSITION_PCT = 0.20
 MAX_OPEN_TRADES = 3
 MAX_SPREAD_PCT = 0.20  # أقصى spread مقبول
 
-POLYGON_KEY = '[REDACTED:POLYGON_KEY]'
-POLYGON_BASE = 'https://api.polygon.io'
-TIMEOUT = 15
-
-
-def polygon_get(path, params=None):
-    if params is None:
-        params = {}
-    params['apiKey'] = POLYGON_KEY
-    resp = requests.get(f"{POLYGON_BASE}{path}", params=params, timeout=TIMEOUT)
-    if resp.status_code == 200:
-        return resp.json()
-    return None
-
 
 def get_option_ticker(symbol, expiry, strike, right):
     """بناء Option ticker بصيغة Polygon: O:AAPL250221C00230000"""
@@ -74,7 +66,8 @@ def verify_option_polygon(symbol, expiry, strike, right):
     })
     if snap and snap.get('results'):
         opt = snap['results'][0]
-        greeks = opt.get('greeks', {})
+        rec = compact_contract(opt)
+        bs.fill_greeks([rec])  # greeks فاضية (0DTE / سيولة قليلة) → محسوبة من mid
         quote = opt.get('last_quote', {})
         result['bid'] = quote.get('bid', 0) or 0
         result['ask'] = quote.get('ask', 0) or 0
@@ -85,13 +78,15 @@ def verify_option_polygon(symbol, expiry, strike, right):
 
         # Greeks وقت الدخول
         result['greeks'] = {
-            'delta': round(greeks.get('delta', 0), 4),
-            'gamma': round(greeks.get('gamma', 0), 4),
-            'theta': round(greeks.get('theta', 0), 4),
-            'vega': round(greeks.get('vega', 0), 4),
+            'delta': round(rec['delta'] or 0, 4),
+            'gamma': round(rec['gamma'] or 0, 4),
+            'theta': round(rec['theta'] or 0, 4),
+            'vega': round(rec['vega'] or 0, 4),
         }
-        result['iv'] = round(opt.get('implied_volatility', 0), 4)
+        result['iv'] = round(rec['iv'] or 0, 4)
+        result['greeks_model'] = rec.get('greeks_model', False)
         result['oi'] = opt.get('day', {}).get('open_interest', 0)
+        result['underlying_price'] = rec['underlying_price']
 
         # تحقق الـ spread معقول
         result['spread_ok'] = result['spread_pct'] < (MAX_SPREAD_PCT * 100)
@@ -100,16 +95,17 @@ def verify_option_polygon(symbol, expiry, strike, right):
     return result
 
 
-def load_trades():
-    if os.path.exists(TRADES_LOG):
-        with open(TRADES_LOG, 'r') as f:
-            return json.load(f)
-    return []
+def _positive(value):
+    """سعر صالح أو None — IB يرجّع nan / -1 لما ما فيه قيمة"""
+    return value if value and value == value and value > 0 else None
 
 
-def save_trades(trades):
-    with open(TRADES_LOG, 'w') as f:
-        json.dump(trades, f, indent=2, default=str)
+def underlying_spot(verification, tk, symbol):
+    """سعر الأصل لفحص المخاطر: Polygon → greeks حق IB (undPrice) → yfinance — None لو كلها فاضية"""
+    greeks = getattr(tk, 'modelGreeks', None)
+    return (_positive(verification.get('underlying_price'))
+            or _positive(getattr(greeks, 'undPrice', None))
+            or _positive(quotes.get_quote(symbol).get('price')))
 
 
 def get_account_value(ib):
@@ -120,8 +116,7 @@ def get_account_value(ib):
 
 
 def count_open_trades():
-    trades = load_trades()
-    return sum(1 for t in trades if t.get('status') == 'OPEN')
+    return trade_store.count_open()
 
 
 def execute_order(symbol, expiry, strike, right, qty, order_type='MKT', limit_price=None):
@@ -155,10 +150,9 @@ def execute_order(symbol, expiry, strike, right, qty, order_type='MKT', limit_pr
     net_liq = get_account_value(ib)
     max_cost = net_liq * MAX_POSITION_PCT
 
-    contract = Option(symbol, expiry, strike, right, 'SMART', '100', 'USD')
-    ib.qualifyContracts(contract)
+    [contract] = contract_cache.qualify(ib, Option(symbol, expiry, strike, right, 'SMART', '100', 'USD'))
 
-    if contract.conId == 0:
+    if contract is None:
         ib.disconnect()
         return {"status": "ERROR", "message": "عقد غير موجود"}
 
@@ -175,20 +169,33 @@ def execute_order(symbol, expiry, strike, right, qty, order_type='MKT', limit_pr
         ib.disconnect()
         return {"status": "REJECTED", "message": f"Cost ${est_cost:.0f} exceeds 20% limit (${max_cost:.0f}). Max qty: {max_qty}", "max_qty": max_qty}
 
+    # === حدود المحفظة كلها (delta/vega/theta/صدمات) مع الصفقة الجديدة ===
+    # التحقق من Polygon ممكن يفشل (نكمل بدونه) → السعر من IB أو yfinance، والرفض بس لو كلها فاضية
+    if net_liq > 0:
+        greeks = getattr(tk, 'modelGreeks', None)
+        risk = portfolio_risk.check_new_position(trade_store.open_trades(), {
+            'underlying': symbol, 'strike': strike, 'expiry': expiry, 'right': right, 'qty': qty,
+            'spot': underlying_spot(verification, tk, symbol),
+            'iv': verification.get('iv') or _positive(getattr(greeks, 'impliedVol', None)),
+        }, net_liq)
+        if not risk['ok']:
+            ib.disconnect()
+            return {"status": "REJECTED", "message": "Portfolio risk limits: " + "; ".join(risk['violations']),
+                    "violations": risk['violations'], "exposure_after": risk['after']}
+
     if order_type == 'MKT':
         order = MarketOrder('BUY', qty)
     else:
         order = LimitOrder('BUY', qty, limit_price)
 
-    trade = ib.placeOrder(contract, order)
-    for _ in range(15):
-        ib.sleep(2)
-        if trade.orderStatus.status == 'Filled':
-            break
+    # الأمر يتلغى لو ما اكتمل خلال ORDER_TIMEOUT — ما نخلي تعبئة متأخرة بدون تسجيل
+    om = OrderManager(ib)
+    mo = om.place(contract, order, tag=f"BUY {qty}x {symbol} {strike}{right}")
+    [summary] = om.wait([mo])
 
-    status = trade.orderStatus.status
-    fill_price = trade.orderStatus.avgFillPrice
-    filled = trade.orderStatus.filled
+    status = mo.status
+    fill_price = mo.avg_price
+    filled = mo.filled
 
     account = {}
     for item in ib.accountSummary():
@@ -214,13 +221,12 @@ def execute_order(symbol, expiry, strike, right, qty, order_type='MKT', limit_pr
         "entry_greeks": verification.get('greeks', {}),
         "entry_iv": verification.get('iv', 0),
         "polygon_verification": verification.get('verified', False),
+        "fill_latency_ms": summary['fill_latency_ms'],
     }
 
-    # تسجيل الصفقة مع Greeks
-    if status == 'Filled' and fill_price:
-        trades = load_trades()
-        trades.append({
-            "id": len(trades) + 1,
+    # تسجيل الصفقة مع Greeks (حتى لو تعبئة جزئية قبل الإلغاء)
+    if filled > 0 and fill_price:
+        trade_store.add({
             "symbol": symbol,
             "strike": strike,
             "right": right,
@@ -237,7 +243,6 @@ def execute_order(symbol, expiry, strike, right, qty, order_type='MKT', limit_pr
             "entry_iv": verification.get('iv', 0),
             "entry_oi": verification.get('oi', 0),
         })
-        save_trades(trades)
 
     return result
 
@@ -245,26 +250,22 @@ def execute_order(symbol, expiry, strike, right, qty, order_type='MKT', limit_pr
 def close_position(symbol, expiry, strike, right, qty):
     ib = IB()
     ib.connect(IB_HOST, IB_PORT, clientId=81, timeout=15)
-    contract = Option(symbol, expiry, strike, right, 'SMART', '100', 'USD')
-    ib.qualifyContracts(contract)
-    order = MarketOrder('SELL', qty)
-    trade = ib.placeOrder(contract, order)
-    for _ in range(15):
-        ib.sleep(2)
-        if trade.orderStatus.status == 'Filled':
-            break
-    fill_price = trade.orderStatus.avgFillPrice
-    result = {"status": trade.orderStatus.status, "fill_price": round(fill_price, 2) if fill_price else 0, "qty_sold": int(trade.orderStatus.filled)}
-    if trade.orderStatus.status == 'Filled':
-        trades = load_trades()
-        for t in trades:
-            if t.get('symbol') == symbol and t.get('expiry') == expiry and t.get('strike') == strike and t.get('status') == 'OPEN':
-                t['status'] = 'CLOSED'
-                t['close_price'] = round(fill_price, 2) if fill_price else 0
-                t['close_time'] = datetime.now().isoformat()
-                t['close_reason'] = 'MANUAL'
-                break
-        save_trades(trades)
+    [contract] = contract_cache.qualify(ib, Option(symbol, expiry, strike, right, 'SMART', '100', 'USD'))
+    if contract is None:
+        ib.disconnect()
+        return {"status": "ERROR", "message": "عقد غير موجود"}
+    om = OrderManager(ib)
+    mo = om.place(contract, MarketOrder('SELL', qty), tag=f"SELL {qty}x {symbol} {strike}{right}")
+    [summary] = om.wait([mo])
+    fill_price = mo.avg_price
+    result = {"status": mo.status, "fill_price": round(fill_price, 2) if fill_price else 0, "qty_sold": mo.filled,
+              "fill_latency_ms": summary['fill_latency_ms']}
+    if mo.status == 'Filled':
+        t = trade_store.find_open(symbol, expiry, strike)
+        if t is not None:
+            trade_store.update({'id': t['id'], 'status': 'CLOSED', 'qty_remaining': 0,
+                                'close_price': round(fill_price, 2) if fill_price else 0,
+                                'close_time': datetime.now().isoformat(), 'close_reason': 'MANUAL'})
     ib.disconnect()
     return result
 
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
-"""متابعة سعر مستمرة — streaming من IB Gateway"""
+"""متابعة سعر مستمرة — streaming من IB Gateway (عبر ib_daemon لو شغال)"""
 import sys, asyncio, signal
-from ib_insync import *
+from ib_insync import util
+
+import ib_daemon
 
 def parse_args():
     if len(sys.argv) < 4:
@@ -14,61 +16,57 @@ def parse_args():
     strike = float(strike_str[:-1])
     return symbol, strike, right, expiry
 
-def make_contract(symbol, strike, right, expiry):
-    return Option(symbol, expiry, strike, right, "SMART", currency="USD")
-
-async def main():
-    symbol, strike, right, expiry = parse_args()
-
-    ib = IB()
-    try:
-        await ib.connectAsync("127.0.0.1", 4002, clientId=3, timeout=5)
-    except Exception as e:
-        print(f"❌ فشل الاتصال: {e}")
-        sys.exit(1)
-
-    contract = make_contract(symbol, strike, right, expiry)
-    try:
-        contracts = await ib.qualifyContractsAsync(contract)
-        if not contracts:
-            print(f"❌ العقد غير موجود")
-            ib.disconnect()
-            sys.exit(1)
-    except Exception as e:
-        print(f"❌ خطأ: {e}")
-        ib.disconnect()
-        sys.exit(1)
+def print_quote(q):
+    bid = f"{q['bid']:.2f}" if q['bid'] is not None else "-"
+    ask = f"{q['ask']:.2f}" if q['ask'] is not None else "-"
+    last = f"{q['last']:.2f}" if q['last'] is not None else "-"
+    vol = q['volume'] if q['volume'] is not None else "-"
+    print(f"  Bid: {bid} | Ask: {ask} | Last: {last} | Vol: {vol}")
 
-    contract = contracts[0]
-    # تفعيل البيانات المؤجلة لو ما في اشتراك
-    ib.reqMarketDataType(3)
-    # اشتراك في البيانات الحية
-    ticker = ib.reqMktData(contract)
+def on_message(label, msg):
+    if 'ok' not in msg:
+        print_quote(msg)
+    elif msg['ok']:
+        print(f"📡 مراقبة {label} — Ctrl+C للإيقاف")
+        print("-" * 50)
+    else:
+        print(f"❌ {msg.get('error')}")
 
-    print(f"📡 مراقبة {symbol} {strike}{right} {expiry} — Ctrl+C للإيقاف")
-    print("-" * 50)
+async def monitor_local(req, label):
+    """بدون daemon — اتصال مباشر لين Ctrl+C"""
+    async def send(msg):
+        on_message(label, msg)
 
+    task = asyncio.ensure_future(ib_daemon.run_local('monitor', req, client_id=3, send=send))
     # إيقاف نظيف
-    stop = asyncio.Event()
-    def on_signal(*_): stop.set()
+    def on_signal(*_): task.cancel()
     for sig in (signal.SIGINT, signal.SIGTERM):
         try:
             asyncio.get_event_loop().add_signal_handler(sig, on_signal)
         except NotImplementedError:
             signal.signal(sig, on_signal)
+    try:
+        result = await task
+        if result:
+            on_message(label, result)
+    except asyncio.CancelledError:
+        pass
 
-    while not stop.is_set():
-        await asyncio.sleep(1)
-        ib.sleep(0)  # تحديث البيانات
-        bid = f"{ticker.bid:.2f}" if ticker.bid == ticker.bid else "-"
-        ask = f"{ticker.ask:.2f}" if ticker.ask == ticker.ask else "-"
-        last = f"{ticker.last:.2f}" if ticker.last == ticker.last else "-"
-        vol = ticker.volume if ticker.volume == ticker.volume else "-"
-        print(f"  Bid: {bid} | Ask: {ask} | Last: {last} | Vol: {vol}")
+def main():
+    symbol, strike, right, expiry = parse_args()
+    req = {'cmd': 'monitor', 'symbol': symbol, 'strike': strike, 'right': right, 'expiry': expiry}
+    label = f"{symbol} {strike}{right} {expiry}"
 
-    ib.cancelMktData(contract)
-    ib.disconnect()
+    messages = ib_daemon.stream(req)
+    if messages is None:
+        util.run(monitor_local(req, label))
+    else:
+        try:
+            for msg in messages:
+                on_message(label, msg)
+        except KeyboardInterrupt:
+            pass
     print("\n👋 تم الإيقاف")
 
 if __name__ == "__main__":
-    util.run(main())
+    main()
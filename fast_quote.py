@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
-"""جلب سعر لحظي من IB Gateway — سريع ومباشر"""
-import sys, asyncio
-from ib_insync import *
+"""جلب سعر لحظي من IB Gateway — عبر ib_daemon لو شغال، وإلا اتصال مباشر"""
+import sys
+from ib_insync import util
+
+import ib_daemon
 
 def parse_args():
     """تحليل الأوامر: SYMBOL STRIKE+TYPE EXPIRY"""
@@ -16,52 +18,19 @@ def parse_args():
     strike = float(strike_str[:-1])
     return symbol, strike, right, expiry
 
-def make_contract(symbol, strike, right, expiry):
-    """بناء العقد — يدعم SPX و SPY وأي سهم"""
-    if symbol in ("SPX", "NDX", "RUT", "VIX"):
-        return Option(symbol, expiry, strike, right, "SMART", currency="USD")
-    elif symbol in ("SPY", "QQQ", "IWM", "AAPL", "TSLA", "AMZN", "MSFT", "GOOG", "META", "NVDA"):
-        return Option(symbol, expiry, strike, right, "SMART", currency="USD")
-    else:
-        # محاولة كخيار على سهم
-        return Option(symbol, expiry, strike, right, "SMART", currency="USD")
-
-async def main():
+def main():
     symbol, strike, right, expiry = parse_args()
-    ib = IB()
-    try:
-        await ib.connectAsync("127.0.0.1", 4002, clientId=1, timeout=5)
-    except Exception as e:
-        print(f"❌ فشل الاتصال بـ IB Gateway: {e}")
-        sys.exit(1)
-
-    contract = make_contract(symbol, strike, right, expiry)
-    # تأهيل العقد
-    try:
-        contracts = await ib.qualifyContractsAsync(contract)
-        if not contracts:
-            print(f"❌ العقد غير موجود: {symbol} {strike}{right} {expiry}")
-            ib.disconnect()
-            sys.exit(1)
-    except Exception as e:
-        print(f"❌ خطأ في تأهيل العقد: {e}")
-        ib.disconnect()
+    req = {'cmd': 'quote', 'symbol': symbol, 'strike': strike, 'right': right, 'expiry': expiry}
+    result = ib_daemon.call(req)
+    if result is None:
+        result = util.run(ib_daemon.run_local('quote', req, client_id=1))
+    if not result.get('ok'):
+        print(f"❌ {symbol} {strike}{right} {expiry}: {result.get('error')}")
         sys.exit(1)
 
-    contract = contracts[0]
-    # تفعيل البيانات المؤجلة لو ما في اشتراك
-    ib.reqMarketDataType(3)  # 3 = delayed
-    # طلب السعر
-    ticker = ib.reqMktData(contract, genericTickList="", snapshot=True, regulatorySnapshot=False)
-    # انتظار البيانات (أقصى 3 ثواني)
-    for _ in range(30):
-        await asyncio.sleep(0.1)
-        if ticker.last == ticker.last or ticker.bid == ticker.bid:  # not NaN
-            break
-
-    bid = ticker.bid if ticker.bid == ticker.bid else "-"
-    ask = ticker.ask if ticker.ask == ticker.ask else "-"
-    last = ticker.last if ticker.last == ticker.last else "-"
+    bid = result['bid'] if result['bid'] is not None else "-"
+    ask = result['ask'] if result['ask'] is not None else "-"
+    last = result['last'] if result['last'] is not None else "-"
     mid = ""
     if isinstance(bid, (int, float)) and isinstance(ask, (int, float)) and bid > 0 and ask > 0:
         mid = f" | Mid: {(bid + ask) / 2:.2f}"
@@ -69,7 +38,5 @@ async def main():
     print(f"📊 {symbol} {strike}{right} {expiry}")
     print(f"   Bid: {bid} | Ask: {ask} | Last: {last}{mid}")
 
-    ib.disconnect()
-
 if __name__ == "__main__":
-    util.run(main())
+    main()
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
-"""تنفيذ صفقة فوري عبر IB Gateway — market order"""
-import sys, asyncio, time
-from ib_insync import *
+"""تنفيذ صفقة فوري عبر IB Gateway — market order (عبر ib_daemon لو شغال)"""
+import sys, time
+from ib_insync import util
+
+import ib_daemon
 
 def parse_args():
     """تحليل: buy/sell SYMBOL STRIKE+TYPE EXPIRY QTY"""
@@ -20,58 +22,30 @@ def parse_args():
         sys.exit(1)
     return action, symbol, strike, right, expiry, qty
 
-def make_contract(symbol, strike, right, expiry):
-    return Option(symbol, expiry, strike, right, "SMART", currency="USD")
-
-async def main():
+def main():
     action, symbol, strike, right, expiry, qty = parse_args()
     start = time.time()
-
-    ib = IB()
-    try:
-        await ib.connectAsync("127.0.0.1", 4002, clientId=2, timeout=5)
-    except Exception as e:
-        print(f"❌ فشل الاتصال: {e}")
-        sys.exit(1)
-
-    contract = make_contract(symbol, strike, right, expiry)
-    try:
-        contracts = await ib.qualifyContractsAsync(contract)
-        if not contracts:
-            print(f"❌ العقد غير موجود")
-            ib.disconnect()
-            sys.exit(1)
-    except Exception as e:
-        print(f"❌ خطأ: {e}")
-        ib.disconnect()
-        sys.exit(1)
-
-    contract = contracts[0]
-    # إرسال أمر سوق فوري
-    order = MarketOrder(action, qty)
-    order.tif = "IOC"  # فوري أو إلغاء
-    trade = ib.placeOrder(contract, order)
+    req = {'cmd': 'trade', 'action': action, 'symbol': symbol, 'strike': strike,
+           'right': right, 'expiry': expiry, 'qty': qty}
 
     print(f"⚡ {action} {qty}x {symbol} {strike}{right} {expiry} — أمر مرسل...")
-
-    # متابعة التعبئة (أقصى 10 ثواني)
-    for _ in range(100):
-        await asyncio.sleep(0.1)
-        if trade.isDone():
-            break
-
+    # None = الـ daemon مو شغال والأمر ما انرسل → اتصال مباشر
+    result = ib_daemon.call(req)
+    via = "daemon"
+    if result is None:
+        result = util.run(ib_daemon.run_local('trade', req, client_id=2))
+        via = "direct"
     elapsed = time.time() - start
-    status = trade.orderStatus.status
 
-    if trade.fills:
-        total_qty = sum(f.execution.shares for f in trade.fills)
-        avg_price = sum(f.execution.shares * f.execution.price for f in trade.fills) / total_qty
-        print(f"✅ تم التعبئة | الكمية: {total_qty} | السعر: {avg_price:.2f}")
+    if not result.get('ok'):
+        print(f"❌ {result.get('error')}")
+        sys.exit(1)
+    if result['filled']:
+        print(f"✅ تم التعبئة | الكمية: {result['filled']} | السعر: {result['avg_price']:.2f}")
     else:
-        print(f"⏳ الحالة: {status}")
+        print(f"⏳ الحالة: {result['status']}" + (f" (order {result['order_id']})" if result.get('order_id') else ""))
 
-    print(f"⏱️ الوقت: {elapsed:.1f} ثانية")
-    ib.disconnect()
+    print(f"⏱️ الوقت: {elapsed:.1f} ثانية ({via})")
 
 if __name__ == "__main__":
-    util.run(main())
+    main()
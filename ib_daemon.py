@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+🔌 IB Daemon — صُحبة Trading
+جلسة IB Gateway وحدة دائمة تخدم fast_quote / fast_trade / fast_monitor
+- الاتصال والتأهيل يصيرون مرة وحدة — الأمر ياخذ رحلة IPC وحدة بس
+- Unix socket محلي، بروتوكول JSON سطر بسطر (socket_rpc)
+- العقود المؤهلة من contract_cache (conId محفوظ لليوم كله)
+- لو انقطع Gateway يعيد الاتصال مع أول طلب
+- trade: الاتصال + التأهيل لهم مهلة (PLACE_TIMEOUT) — بعدها يرفض بدون إرسال
+  وأول ما الأمر ينرسل يرد placed + order_id، والعميل اللي ما وصلته النتيجة يسأل بـ order بدل ما يعيد الأمر
+
+تشغيل:
+  python3 ib_daemon.py
+
+بروتوكول (سطر JSON لكل رسالة):
+  {"cmd": "quote",   "symbol": "SPX", "strike": 6920, "right": "P", "expiry": "20260212"}
+  {"cmd": "trade",   ... + "action": "BUY", "qty": 10}
+                     → {"ok": true, "placed": true, "order_id": 123} ثم سطر النتيجة
+  {"cmd": "order",   "order_id": 123}  → حالة أمر سابق (status / filled / avg_price)
+  {"cmd": "monitor", ...}  → سطر كل ثانية لين يقفل العميل الاتصال
+  {"cmd": "ping"}
+"""
+import asyncio
+import json
+import time
+
+from ib_insync import IB, MarketOrder, Option, util
+
+import contract_cache
+import socket_rpc
+
+# === إعدادات ===
+IB_HOST = '127.0.0.1'
+IB_PORT = 4002
+CLIENT_ID = 10
+SOCKET_PATH = '/home/openclaw/.openclaw/workspace/.ib_daemon.sock'
+CONNECT_TIMEOUT = 5
+QUALIFY_TIMEOUT = 5
+PLACE_TIMEOUT = CONNECT_TIMEOUT + QUALIFY_TIMEOUT  # أقصى وقت قبل إرسال الأمر (مع انتظار الـ lock) — بعده يرفض
+QUOTE_WAIT = 3        # ثواني انتظار snapshot
+FILL_WAIT = 10        # ثواني انتظار تعبئة أمر IOC
+MONITOR_INTERVAL = 1
+CLIENT_MARGIN = 5     # هامش العميل فوق أسوأ حالة للـ daemon
+CLIENT_TIMEOUT = PLACE_TIMEOUT + FILL_WAIT + CLIENT_MARGIN
+
+_subscriptions = {}   # conId → [ticker, عدد المتابعين]
+
+
+# === مشترك بين الـ daemon والتشغيل المباشر ===
+
+def make_contract(symbol, strike, right, expiry):
+    return Option(symbol, expiry, strike, right, "SMART", currency="USD")
+
+
+def _num(value):
+    """NaN من IB → None عشان JSON"""
+    return value if value == value else None
+
+
+def quote_fields(ticker):
+    return {
+        'bid': _num(ticker.bid),
+        'ask': _num(ticker.ask),
+        'last': _num(ticker.last),
+        'volume': _num(ticker.volume),
+    }
+
+
+async def connect(ib, client_id=CLIENT_ID):
+    if not ib.isConnected():
+        await ib.connectAsync(IB_HOST, IB_PORT, clientId=client_id, timeout=CONNECT_TIMEOUT)
+        # البيانات المؤجلة لو ما في اشتراك
+        ib.reqMarketDataType(3)
+
+
+async def qualify(ib, req):
+    """العقد المؤهل من contract_cache أو من IB — None لو غير موجود"""
+    contract = make_contract(req['symbol'].upper(), float(req['strike']), req['right'].upper(),
+                             str(req['expiry']).replace('-', ''))
+    [contract] = await contract_cache.qualify_async(ib, contract)
+    return contract
+
+
+async def handle_quote(ib, req):
+    contract = await qualify(ib, req)
+    if contract is None:
+        return {'ok': False, 'error': 'contract not found'}
+    ticker = ib.reqMktData(contract, genericTickList="", snapshot=True, regulatorySnapshot=False)
+    for _ in range(int(QUOTE_WAIT * 10)):
+        await asyncio.sleep(0.1)
+        if ticker.last == ticker.last or ticker.bid == ticker.bid:  # not NaN
+            break
+    return {'ok': True, **quote_fields(ticker)}
+
+
+def trade_result(trade):
+    result = {'ok': True, 'order_id': trade.order.orderId, 'status': trade.orderStatus.status,
+              'filled': 0, 'avg_price': None}
+    if trade.fills:
+        total_qty = sum(f.execution.shares for f in trade.fills)
+        result['filled'] = total_qty
+        result['avg_price'] = sum(f.execution.shares * f.execution.price for f in trade.fills) / total_qty
+    return result
+
+
+async def handle_trade(ib, req, send=None, deadline=None):
+    """send: يرد placed + order_id أول ما الأمر ينرسل (الـ daemon). deadline: آخر وقت لإرسال الأمر"""
+    start = time.time()
+    action = req['action'].upper()
+    if action not in ('BUY', 'SELL'):
+        return {'ok': False, 'error': f'bad action {action}'}
+    deadline = deadline or time.monotonic() + PLACE_TIMEOUT
+    try:
+        contract = await asyncio.wait_for(qualify(ib, req), max(deadline - time.monotonic(), 0.1))
+    except asyncio.TimeoutError:
+        return {'ok': False, 'error': 'qualify timeout — order not sent'}
+    if contract is None:
+        return {'ok': False, 'error': 'contract not found'}
+
+    # أمر سوق فوري أو إلغاء
+    order = MarketOrder(action, int(req['qty']))
+    order.tif = "IOC"
+    trade = ib.placeOrder(contract, order)
+    if send is not None:
+        await send({'ok': True, 'placed': True, 'order_id': trade.order.orderId})
+    for _ in range(FILL_WAIT * 10):
+        await asyncio.sleep(0.1)
+        if trade.isDone():
+            break
+
+    result = trade_result(trade)
+    result['elapsed'] = round(time.time() - start, 3)
+    return result
+
+
+async def handle_order(ib, req):
+    """حالة أمر سابق — عميل انقطع بعد placed يسأل هنا بدل ما يعيد الإرسال"""
+    order_id = int(req['order_id'])
+    trade = next((t for t in ib.trades() if t.order.orderId == order_id), None)
+    if trade is None:
+        return {'ok': False, 'error': f'unknown order {order_id}'}
+    return trade_result(trade)
+
+
+async def handle_monitor(ib, req, send):
+    """يرسل الأسعار كل MONITOR_INTERVAL لين يفشل send (العميل قفل)"""
+    contract = await qualify(ib, req)
+    if contract is None:
+        await send({'ok': False, 'error': 'contract not found'})
+        return
+    sub = _subscriptions.get(contract.conId)
+    if sub is None:
+        sub = _subscriptions[contract.conId] = [ib.reqMktData(contract), 0]
+    sub[1] += 1
+    try:
+        await send({'ok': True})
+        while True:
+            await asyncio.sleep(MONITOR_INTERVAL)
+            await send(quote_fields(sub[0]))
+    finally:
+        sub[1] -= 1
+        if sub[1] == 0:
+            del _subscriptions[contract.conId]
+            if ib.isConnected():
+                ib.cancelMktData(contract)
+
+
+HANDLERS = {'quote': handle_quote, 'trade': handle_trade, 'order': handle_order}
+
+
+async def run_local(cmd, req, client_id, send=None):
+    """بدون daemon: اتصال مباشر لمرة وحدة (نفس المعالجات)"""
+    ib = IB()
+    try:
+        await connect(ib, client_id)
+    except Exception as e:
+        return {'ok': False, 'error': f'connect failed: {e}'}
+    try:
+        if cmd == 'monitor':
+            await handle_monitor(ib, req, send)
+            return None
+        return await HANDLERS[cmd](ib, req)
+    except Exception as e:
+        return {'ok': False, 'error': str(e)}
+    finally:
+        ib.disconnect()
+
+
+# === السيرفر ===
+
+async def _connect_locked(ib, lock):
+    async with lock:
+        await connect(ib)
+
+
+async def _handle_client(ib, lock, reader, writer):
+    send = socket_rpc.sender(writer)
+    try:
+        line = await reader.readline()
+        if not line:
+            return
+        req = json.loads(line)
+        cmd = req.get('cmd')
+        if cmd == 'ping':
+            await send({'ok': True, 'connected': ib.isConnected()})
+            return
+        # انتظار الـ lock + إعادة الاتصال من ضمن مهلة الأمر — العميل ينتظر PLACE_TIMEOUT + هامش بس
+        deadline = time.monotonic() + PLACE_TIMEOUT
+        try:
+            await asyncio.wait_for(_connect_locked(ib, lock), PLACE_TIMEOUT)
+        except asyncio.TimeoutError:
+            await send({'ok': False, 'error': 'IB connect timeout — order not sent' if cmd == 'trade'
+                        else 'IB connect timeout'})
+            return
+        if cmd == 'monitor':
+            await handle_monitor(ib, req, send)
+        elif cmd == 'trade':
+            await send(await handle_trade(ib, req, send, deadline))
+        elif cmd in HANDLERS:
+            await send(await HANDLERS[cmd](ib, req))
+        else:
+            await send({'ok': False, 'error': f'unknown cmd {cmd}'})
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass  # العميل قفل (Ctrl+C على monitor)
+    except Exception as e:
+        try:
+            await send({'ok': False, 'error': str(e)})
+        except ConnectionError:
+            pass
+    finally:
+        writer.close()
+
+
+async def serve():
+    socket_rpc.remove_stale_socket(SOCKET_PATH, 'daemon')
+    ib = IB()
+    lock = asyncio.Lock()  # اتصال/إعادة اتصال وحدة بنفس الوقت
+    try:
+        await connect(ib)
+        print(f"✅ متصل بـ IB Gateway (clientId={CLIENT_ID})")
+    except Exception as e:
+        print(f"⚠️ Gateway غير متاح الحين ({e}) — بنحاول مع أول طلب")
+
+    server = await socket_rpc.start_server(SOCKET_PATH, lambda r, w: _handle_client(ib, lock, r, w))
+    print(f"🔌 يستقبل على {SOCKET_PATH}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        ib.disconnect()
+        socket_rpc.remove_socket(SOCKET_PATH)
+
+
+# === العميل ===
+
+
+def call(req, timeout=CLIENT_TIMEOUT):
+    """طلب واحد ورد واحد. None = الـ daemon مو شغال (آمن نرجع للاتصال المباشر)
+    بعد ما ينرسل الطلب أي فشل يرجع كخطأ — عشان أمر trade ما يتكرر
+    trade: مهلة لين placed (PLACE_TIMEOUT + هامش) ثم مهلة التعبئة — ولو النتيجة ما وصلت نسأل بالـ order_id"""
+    if req.get('cmd') != 'trade':
+        return socket_rpc.call(SOCKET_PATH, req, timeout, 'daemon')
+    sock = socket_rpc.connect(SOCKET_PATH, PLACE_TIMEOUT + CLIENT_MARGIN)
+    if sock is None:
+        return None
+    order_id = None
+    with sock:
+        try:
+            sock.sendall(socket_rpc.encode(req))
+            reader = socket_rpc.lines(sock)
+            line = reader.readline()
+            if line and json.loads(line).get('placed'):
+                order_id = json.loads(line)['order_id']
+                sock.settimeout(FILL_WAIT + CLIENT_MARGIN)
+                line = reader.readline()
+        except OSError as e:
+            if order_id is None:
+                return {'ok': False, 'error': f'daemon: {e}'}
+            line = ''
+    if order_id is not None and not line:
+        status = call({'cmd': 'order', 'order_id': order_id})
+        if status is not None and status.get('ok'):
+            return status
+        return {'ok': False, 'order_id': order_id,
+                'error': f'order {order_id} sent but result unknown — check IB before resending'}
+    if not line:
+        return {'ok': False, 'error': 'daemon closed connection'}
+    return json.loads(line)
+
+
+def stream(req):
+    """للـ monitor: يرجّع generator للرسائل، أو None لو الـ daemon مو شغال"""
+    sock = socket_rpc.connect(SOCKET_PATH, CLIENT_TIMEOUT)
+    if sock is None:
+        return None
+
+    def messages():
+        with sock:
+            sock.sendall(socket_rpc.encode(req))
+            sock.settimeout(None)
+            for line in socket_rpc.lines(sock):
+                yield json.loads(line)
+
+    return messages()
+
+
+if __name__ == "__main__":
+    try:
+        util.run(serve())
+    except KeyboardInterrupt:
+        print("\n👋 تم الإيقاف")
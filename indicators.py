@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+📐 Indicator Engine — صُحبة Trading
+حساب RSI / EMA / SMA / MACD محلياً بـ NumPy بدل Polygon indicators API
+- المدخل مصفوفة 2-D (أسهم × شموع) — كل الأسهم تنحسب بتمريرة وحدة
+- الصفوف الأقصر تتعبأ NaN من اليسار (آخر شمعة دايماً في آخر عمود)
+"""
+import numpy as np
+
+
+def stack_closes(series_list):
+    """قائمة أسعار إغلاق (طول مختلف لكل سهم) → مصفوفة 2-D محاذاة لليمين"""
+    width = max((len(s) for s in series_list), default=0)
+    out = np.full((len(series_list), width), np.nan)
+    for i, s in enumerate(series_list):
+        if len(s):
+            out[i, width - len(s):] = s
+    return out
+
+
+def sma(x, window):
+    """متوسط متحرك بسيط — NaN لين تكتمل النافذة"""
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    valid = ~np.isnan(x)
+    csum = np.cumsum(np.where(valid, x, 0.0), axis=1)
+    ccount = np.cumsum(valid, axis=1)
+    pad = np.zeros((x.shape[0], 1))
+    csum = np.hstack([pad, csum])
+    ccount = np.hstack([pad, ccount])
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= window:
+        wsum = csum[:, window:] - csum[:, :-window]
+        wcount = ccount[:, window:] - ccount[:, :-window]
+        out[:, window - 1:] = np.where(wcount == window, wsum / window, np.nan)
+    return out
+
+
+def _smooth(x, alpha, window):
+    """تنعيم أُسّي يبدأ من SMA أول نافذة كاملة — الأساس لـ EMA و Wilder"""
+    seed = sma(x, window)
+    out = np.full(x.shape, np.nan)
+    prev = np.full(x.shape[0], np.nan)
+    for t in range(x.shape[1]):
+        cur = x[:, t]
+        prev = np.where(np.isnan(prev), seed[:, t], prev + alpha * (cur - prev))
+        out[:, t] = prev
+    return out
+
+
+def ema(x, span):
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    return _smooth(x, 2.0 / (span + 1), span)
+
+
+def rsi(x, window=14):
+    """RSI بطريقة Wilder"""
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    diff = np.full(x.shape, np.nan)
+    diff[:, 1:] = x[:, 1:] - x[:, :-1]
+    gain = np.where(diff > 0, diff, np.where(np.isnan(diff), np.nan, 0.0))
+    loss = np.where(diff < 0, -diff, np.where(np.isnan(diff), np.nan, 0.0))
+    avg_gain = _smooth(gain, 1.0 / window, window)
+    avg_loss = _smooth(loss, 1.0 / window, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100 - 100 / (1 + avg_gain / avg_loss)
+    return np.where((avg_loss == 0) & ~np.isnan(avg_gain), 100.0, out)
+
+
+def macd(x, fast=12, slow=26, signal=9):
+    """يرجّع (macd, signal, histogram)"""
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    line = ema(x, fast) - ema(x, slow)
+    sig = ema(line, signal)
+    return line, sig, line - sig
+
+
+def latest(closes):
+    """آخر قيمة لكل مؤشر لكل سهم — نفس مفاتيح get_technical_indicators"""
+    closes = np.atleast_2d(np.asarray(closes, dtype=float))
+    line, sig, hist = macd(closes)
+    return {
+        'rsi': rsi(closes, 14)[:, -1],
+        'ema9': ema(closes, 9)[:, -1],
+        'ema21': ema(closes, 21)[:, -1],
+        'macd': line[:, -1],
+        'macd_signal': sig[:, -1],
+        'macd_histogram': hist[:, -1],
+    }
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+💤 Lazy Import — صُحبة Trading
+الـ modules الثقيلة (numpy / pandas / yfinance / matplotlib / httpx ...) تتحمل أول ما يُلمس attribute منها
+- lazy('numpy') يرجّع module حقيقي في sys.modules لكن التنفيذ مؤجل (importlib.util.LazyLoader)
+- سكربت cron يوصل لمسار ما يحتاج المكتبة → ما يدفع وقت تحميلها
+- `from x import y` يحمّل x فوراً — الكود اللي يستخدم lazy يكتب x.y
+- bench_startup.py يقيس وقت الـ import لكل سكربت ويتأكد إن الثقيل ما يتحمل بدري
+"""
+import importlib.util
+import sys
+import threading
+
+_lock = threading.Lock()
+
+
+def available(name):
+    """المكتبة منصّبة؟ — بدون تحميلها"""
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def lazy(name):
+    """module مؤجل التحميل — ModuleNotFoundError فوراً لو مو منصّب"""
+    with _lock:
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+        loader = importlib.util.LazyLoader(spec.loader)
+        spec.loader = loader
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        loader.exec_module(module)
+        return module
+
+
+def load(*modules):
+    """تحميل فعلي الحين لـ modules من lazy() — process مقيم يسخّن الـ stack مرة وحدة"""
+    for module in modules:
+        getattr(module, '__name__')
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+🌐 Market Data Client — صُحبة Trading
+عميل HTTP مشترك لكل سكربتات التداول (Polygon / Unusual Whales / Finviz)
+- اتصال keep-alive واحد لكل host بدل TLS handshake مع كل طلب
+- HTTP/2 عبر httpx لو متوفر، وإلا requests.Session
+- حد أقصى للاتصالات لكل host + إعادة المحاولة مع backoff
+- كل طلب يمر على rate_limiter حسب عائلة الـ endpoint
+- ردود Polygon القابلة للكاش تمر على api_cache (TTL لكل endpoint)
+- set_transport: بديل للشبكة (backtest / fixtures) مع ساعة الـ replay (now())
+"""
+import json
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+import api_cache
+import rate_limiter
+from lazy_import import available, lazy
+
+# مكتبة الـ HTTP تتحمل مع أول طلب فعلي — replay / كاش / سكربت ما يطلب شي ما يدفع وقتها
+# httpx يحتاج h2 لـ HTTP/2
+httpx = lazy('httpx') if available('httpx') and available('h2') else None
+requests = lazy('requests') if httpx is None else None
+
+# === إعدادات ===
+POLYGON_KEY = '[REDACTED:POLYGON_KEY]'
+POLYGON_BASE = 'https://api.polygon.io'
+UW_TOKEN = '[REDACTED:UW_KEY]'
+UW_BASE = 'https://api.unusualwhales.com'
+UW_HEADERS = {'Authorization': f'Bearer {UW_TOKEN}', 'Accept': 'application/json'}
+
+TIMEOUT = 15
+MAX_CONN_PER_HOST = 8
+RETRIES = 3
+BACKOFF = 0.5  # ثواني — تتضاعف مع كل محاولة
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_clients = {}
+_clients_lock = threading.Lock()
+_transport = None  # بديل الشبكة — None = الشبكة الحقيقية
+_as_of = None      # وقت الـ replay — None = الحين
+
+
+class RecordedResponse:
+    """رد بدون شبكة (fixture) — نفس الأجزاء اللي تستخدمها السكربتات من response"""
+
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def set_transport(transport, as_of=None):
+    """كل الطلبات تروح لـ transport(url, params, headers) → RecordedResponse بدل الشبكة
+    (والكاش يتجاوز عشان ما يختلط live مع replay). as_of = الوقت اللي يرجعه now()
+    set_transport(None) يرجّع الشبكة الحقيقية"""
+    global _transport, _as_of
+    _transport = transport
+    _as_of = as_of
+
+
+def transport():
+    return _transport
+
+
+def live():
+    """فيه شبكة؟ (بدون transport، أو transport يسجّل من الشبكة — live = True)"""
+    return _transport is None or getattr(_transport, 'live', False)
+
+
+def now():
+    """الوقت الحالي (UTC) — أو وقت الـ screen المعاد تشغيله أثناء الـ replay"""
+    return _as_of or datetime.utcnow()
+
+
+def _client(host):
+    """جلسة واحدة لكل host — تُنشأ مرة وتُعاد"""
+    with _clients_lock:
+        client = _clients.get(host)
+        if client is None:
+            if httpx is not None:
+                client = httpx.Client(
+                    http2=True,
+                    follow_redirects=True,
+                    limits=httpx.Limits(max_connections=MAX_CONN_PER_HOST,
+                                        max_keepalive_connections=MAX_CONN_PER_HOST),
+                )
+            else:
+                client = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONN_PER_HOST, pool_block=True)
+                client.mount('https://', adapter)
+                client.mount('http://', adapter)
+            _clients[host] = client
+        return client
+
+
+def _merge_query(url, params):
+    """httpx يستبدل query الـ URL بالـ params — ندمجها (مثل next_url + apiKey)"""
+    parts = urlsplit(url)
+    if not parts.query or not params:
+        return url, params
+    merged = dict(parse_qsl(parts.query, keep_blank_values=True))
+    merged.update(params)
+    return urlunsplit(parts._replace(query='')), merged
+
+
+def _retry_delay(attempt, resp=None):
+    """مدة الانتظار قبل المحاولة التالية — نحترم Retry-After لو موجود"""
+    if resp is not None:
+        retry_after = resp.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return min(float(retry_after), 60)
+            except ValueError:
+                pass
+    return BACKOFF * (2 ** attempt)
+
+
+def transport_errors():
+    """أخطاء الشبكة (timeout / reset / DNS) اللي تستاهل إعادة محاولة — حسب المكتبة المحمّلة"""
+    return (httpx.TransportError,) if httpx is not None else (requests.RequestException,)
+
+
+def request(url, params=None, headers=None, timeout=TIMEOUT):
+    """GET مع retry — يرجّع الـ response (أي status) أو يرفع الاستثناء بعد آخر محاولة"""
+    url, params = _merge_query(url, params)
+    if _transport is not None:
+        return _transport(url, params, headers)
+    return live_request(url, params, headers, timeout)
+
+
+def live_request(url, params=None, headers=None, timeout=TIMEOUT):
+    """request على الشبكة دايماً (الـ recorder يمر من هنا)"""
+    client = _client(urlsplit(url).netloc)
+    errors = transport_errors()
+    family = rate_limiter.family_for(url)
+    rate_key = (params or {}).get('apiKey') or (headers or {}).get('Authorization', '')
+    for attempt in range(RETRIES + 1):
+        if family:
+            rate_limiter.acquire(family, rate_key)
+        try:
+            resp = client.get(url, params=params, headers=headers, timeout=timeout)
+        except errors:
+            if attempt == RETRIES:
+                raise
+            time.sleep(_retry_delay(attempt))
+            continue
+        if resp.status_code in RETRY_STATUS and attempt < RETRIES:
+            time.sleep(_retry_delay(attempt, resp))
+            continue
+        return resp
+
+
+class _StreamReader:
+    """غلاف read(n) فوق iterator من البايتات — عشان parsers تقرأ تدريجياً"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buf = b''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buf) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buf += chunk
+        if size < 0:
+            out, self._buf = self._buf, b''
+        else:
+            out, self._buf = self._buf[:size], self._buf[size:]
+        return out
+
+
+@contextmanager
+def stream(url, params=None, headers=None, timeout=TIMEOUT):
+    """GET بدون تحميل الجسم كامل — يعطي (status, reader) والـ reader فيه read(n)
+    الاتصال ياخذ نفس retry حق request (أخطاء شبكة + RETRY_STATUS) — خطأ بعد ما بدأ الجسم يوصل يطلع للمستدعي"""
+    url, params = _merge_query(url, params)
+    if _transport is not None:
+        resp = _transport(url, params, headers)
+        yield resp.status_code, _StreamReader([resp.content])
+        return
+    client = _client(urlsplit(url).netloc)
+    errors = transport_errors()
+    family = rate_limiter.family_for(url)
+    rate_key = (params or {}).get('apiKey') or (headers or {}).get('Authorization', '')
+    for attempt in range(RETRIES + 1):
+        if family:
+            rate_limiter.acquire(family, rate_key)
+        with ExitStack() as stack:
+            try:
+                if httpx is not None:
+                    resp = stack.enter_context(client.stream('GET', url, params=params, headers=headers, timeout=timeout))
+                    chunks = resp.iter_bytes()
+                else:
+                    resp = stack.enter_context(client.get(url, params=params, headers=headers, timeout=timeout, stream=True))
+                    chunks = resp.iter_content(chunk_size=65536)
+            except errors:
+                if attempt == RETRIES:
+                    raise
+                delay = _retry_delay(attempt)
+            else:
+                if resp.status_code not in RETRY_STATUS or attempt == RETRIES:
+                    yield resp.status_code, _StreamReader(chunks)
+                    return
+                delay = _retry_delay(attempt, resp)
+        time.sleep(delay)
+
+
+def get_json(url, params=None, headers=None, timeout=TIMEOUT):
+    """GET → JSON لو 200، وإلا None"""
+    try:
+        resp = request(url, params=params, headers=headers, timeout=timeout)
+        if resp.status_code == 200:
+            return resp.json()
+    except Exception:
+        pass
+    return None
+
+
+def polygon_get(path, params=None):
+    """طلب من Polygon API — يمر على الكاش المحلي لو الـ endpoint له TTL"""
+    params = dict(params or {})
+    url = f"{POLYGON_BASE}{path}"
+    ttl = api_cache.ttl_for(path) if _transport is None else None
+    key = api_cache.make_key(url, params) if ttl else None
+    if key:
+        cached = api_cache.get(key)
+        if cached is not None:
+            return cached
+    params['apiKey'] = POLYGON_KEY
+    data = get_json(url, params=params)
+    if key and data is not None:
+        api_cache.put(key, data, ttl)
+    return data
+
+
+def uw_get(path, params=None):
+    """طلب من Unusual Whales API"""
+    return get_json(f"{UW_BASE}{path}", params=params or {}, headers=UW_HEADERS)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+🔥 Market Worker — صُحبة Trading
+process مقيم يخدم spx_update / spx_chart بدل تشغيل Python بارد مع كل cron
+- الـ imports (numpy / pandas / yfinance / matplotlib) واتصالات Polygon (keep-alive) تبقى دافية
+- سطر spx_update محفوظ بالذاكرة ويتجدد بالخلفية كل REFRESH_INTERVAL → الرد بالـ ms
+- تاريخ ES=F (5 أيام) يتحمل مرة وحدة، وبعدها آخر يوم بس يندمج فوقه
+- الشارت يترسم عند الطلب عبر chart_renderer (figure مبني مسبقاً) — ونفس الشموع → نفس الصورة بدون إعادة رسم
+- مؤشرات الشارت (ChartIndicators) بالذاكرة → كل رسم يطبق الشموع الجديدة بس
+- Unix socket محلي، بروتوكول JSON سطر بسطر (socket_rpc — نفس ib_daemon)
+
+تشغيل:
+  python3 market_worker.py
+
+بروتوكول (سطر JSON لكل رسالة):
+  {"cmd": "spx"}      → {"ok": true, "data": {سطر spx_update}, "age": 12.3}
+  {"cmd": "chart", "preview": false}  → {"ok": true, "data": {"path", "last_price", "rsi", "macd", "signal"}}
+  {"cmd": "refresh"}  → تحديث فوري للسطر والتاريخ
+  {"cmd": "ping"}
+"""
+import json
+import os
+import threading
+import time
+
+import socket_rpc
+from lazy_import import lazy, load
+
+asyncio = lazy('asyncio')  # السيرفر بس — العميل (spx_update) ما يحتاجه
+
+# === إعدادات ===
+SOCKET_PATH = '/home/openclaw/.openclaw/workspace/.market_worker.sock'
+REFRESH_INTERVAL = 60   # ثواني — تجديد سطر spx بالخلفية
+SPX_TTL = 90            # سطر أقدم من كذا يتحسب قبل الرد (لو التجديد تأخر)
+HISTORY_TTL = 60        # تاريخ ES=F أقدم من كذا → آخر يوم يندمج قبل الرسم
+HISTORY_REFETCH = 86400  # أقدم من يوم (worker نايم / عطلة) → 5 أيام من جديد
+HISTORY_BARS = 600      # سقف الشموع بالذاكرة (≈ 5 أيام 15m)
+CLIENT_TIMEOUT = 60     # أول رسم أو أول حساب بارد ممكن ياخذ ثواني
+
+
+class Worker:
+    """الحالة الدافية — كل قسم له lock لأن الحساب يصير في threads الـ executor"""
+
+    def __init__(self):
+        self.spx = None
+        self.spx_at = 0
+        self.history = None
+        self.history_at = 0
+        self.charts = {}      # preview؟ → (مفتاح آخر شمعة, ملخص الرسم)
+        self.indicators = None  # spx_chart.ChartIndicators — بالذاكرة، كل رسم يطبق الشموع الجديدة بس
+        self._spx_lock = threading.Lock()
+        self._chart_lock = threading.Lock()
+
+    def warm(self):
+        """تحميل الـ stack كامل مرة وحدة عند التشغيل — أول طلب ما يدفعه"""
+        import chart_renderer
+        import spx_chart
+        import spx_update
+        load(spx_chart.yf, spx_chart.pd, spx_update.bar_store)
+        # الـ figures (عادي + preview) تنبني الحين
+        chart_renderer.get(spx_chart.DPI, spx_chart.LEVELS)
+        chart_renderer.get(spx_chart.PREVIEW_DPI, spx_chart.LEVELS)
+
+    def get_spx(self, max_age=SPX_TTL):
+        """(السطر, عمره بالثواني) — الخطأ ما يتخزن"""
+        import quotes
+        import spx_update
+        with self._spx_lock:
+            if self.spx is None or time.time() - self.spx_at > max_age:
+                quotes.clear()  # memo الـ process — كل تحديث ياخذ أسعار جديدة
+                output = spx_update.build_update()
+                if 'error' in output:
+                    return output, 0
+                self.spx, self.spx_at = output, time.time()
+            return self.spx, time.time() - self.spx_at
+
+    def get_chart(self, max_age=HISTORY_TTL, preview=False):
+        import spx_chart
+        with self._chart_lock:
+            age = time.time() - self.history_at
+            if self.history is None or age > HISTORY_REFETCH:
+                self.history = spx_chart.fetch_history('5d')
+                self.history_at = time.time()
+            elif age > max_age:
+                self.history = spx_chart.merge_history(self.history, spx_chart.fetch_history('1d'))
+                self.history_at = time.time()
+            self.history = self.history.tail(HISTORY_BARS)
+            if self.history.empty:
+                raise RuntimeError(f"no {spx_chart.SYMBOL} history")
+
+            last = self.history.iloc[-1]
+            key = (str(self.history.index[-1]), float(last['Close']), float(last['High']), float(last['Low']))
+            cached_key, chart = self.charts.get(preview, (None, None))
+            if key != cached_key or not os.path.exists(chart['path']):
+                if self.indicators is None:
+                    self.indicators = spx_chart.ChartIndicators.load()
+                data = spx_chart.with_indicators(self.history, indicators=self.indicators)
+                chart = spx_chart.render(data, spx_chart.PREVIEW_OUTPUT, spx_chart.PREVIEW_DPI) if preview \
+                    else spx_chart.render(data)
+                self.charts[preview] = (key, chart)
+            return chart
+
+    def refresh(self):
+        self.get_spx(max_age=0)
+        self.get_chart(max_age=0)
+
+
+# === السيرفر ===
+
+async def _run(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+async def _handle_client(worker, reader, writer):
+    send = socket_rpc.sender(writer)
+    try:
+        line = await reader.readline()
+        if not line:
+            return
+        req = json.loads(line)
+        cmd = req.get('cmd')
+        if cmd == 'ping':
+            await send({'ok': True, 'spx_age': round(time.time() - worker.spx_at, 1) if worker.spx else None})
+        elif cmd == 'spx':
+            data, age = await _run(worker.get_spx)
+            if 'error' in data:
+                await send({'ok': False, 'error': data['error']})
+            else:
+                await send({'ok': True, 'data': data, 'age': round(age, 1)})
+        elif cmd == 'chart':
+            await send({'ok': True, 'data': await _run(worker.get_chart, HISTORY_TTL, bool(req.get('preview')))})
+        elif cmd == 'refresh':
+            await _run(worker.refresh)
+            await send({'ok': True})
+        else:
+            await send({'ok': False, 'error': f'unknown cmd {cmd}'})
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    except Exception as e:
+        try:
+            await send({'ok': False, 'error': str(e)})
+        except ConnectionError:
+            pass
+    finally:
+        writer.close()
+
+
+async def _refresher(worker):
+    """السطر يتجدد بالخلفية — طلب cron يلقاه جاهز"""
+    while True:
+        try:
+            await _run(worker.get_spx, REFRESH_INTERVAL / 2)
+        except Exception as e:
+            print(f"⚠️ refresh: {e}")
+        await asyncio.sleep(REFRESH_INTERVAL)
+
+
+async def serve():
+    socket_rpc.remove_stale_socket(SOCKET_PATH, 'worker')
+    worker = Worker()
+    started = time.perf_counter()
+    await _run(worker.warm)
+    print(f"✅ الـ stack محمّل ({time.perf_counter() - started:.1f}s)")
+
+    server = await socket_rpc.start_server(SOCKET_PATH, lambda r, w: _handle_client(worker, r, w))
+    refresher = asyncio.ensure_future(_refresher(worker))
+    print(f"🔥 يستقبل على {SOCKET_PATH}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        refresher.cancel()
+        socket_rpc.remove_socket(SOCKET_PATH)
+
+
+# === العميل ===
+
+def call(req, timeout=CLIENT_TIMEOUT):
+    """طلب واحد ورد واحد — None لو الـ worker مو شغال، {'ok': False} لو فشل
+    (المستدعي يحسب بنفسه بالحالتين — الطلبات هنا قراءة بس، إعادتها محلياً آمنة)"""
+    return socket_rpc.call(SOCKET_PATH, req, timeout, 'market_worker')
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("\n👋 تم الإيقاف")
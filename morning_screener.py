@@ -7,17 +7,17 @@ import csv
 import io
 import json
 import sys
-import requests
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+import quotes
+from market_client import UW_BASE, UW_HEADERS, now, polygon_get, request, uw_get
+from options_chain import ChainError, iter_chain, iter_column_chunks, score_contracts, top_n
+from pipeline import run_stages, stage
+
 # === إعدادات ===
-POLYGON_KEY = '[REDACTED:POLYGON_KEY]'
-POLYGON_BASE = 'https://api.polygon.io'
 FINVIZ_AUTH = '[REDACTED:FINVIZ_AUTH]'
-UW_TOKEN = '[REDACTED:UW_KEY]'
-UW_BASE = 'https://api.unusualwhales.com'
-UW_HEADERS = {'Authorization': f'Bearer {UW_TOKEN}', 'Accept': 'application/json'}
 
 FINVIZ_BULLISH_URL = (
     f'https://elite.finviz.com/export.ashx?v=111&f=cap_midover,exch_nasd|nyse,'
@@ -39,122 +39,115 @@ PRICE_MIN, PRICE_MAX = 0.50, 8.00
 MIN_OI, MIN_VOLUME = 500, 100
 MAX_SPREAD_PCT = 0.20
 MIN_SCORE = 5
-TIMEOUT = 15
+MAX_WORKERS = 8  # طلبات متوازية — الحصة نفسها يضبطها rate_limiter
+STAGE_TIMEOUT = 45  # ثواني — مرحلة أبطأ من كذا تاخذ قيمتها الافتراضية
 
 
 def log(msg):
     print(f"[{datetime.utcnow().strftime('%H:%M:%S')}] {msg}")
 
 
-def polygon_get(path, params=None):
-    if params is None:
-        params = {}
-    params['apiKey'] = POLYGON_KEY
-    resp = requests.get(f"{POLYGON_BASE}{path}", params=params, timeout=TIMEOUT)
-    if resp.status_code == 200:
-        return resp.json()
-    return None
+def get_stock_price_yfinance(ticker):
+    return quotes.get_quote(ticker)['price'] or 0
 
 
-def uw_get(path, params=None):
-    """طلب من Unusual Whales API"""
-    resp = requests.get(f"{UW_BASE}{path}", headers=UW_HEADERS, params=params or {}, timeout=TIMEOUT)
-    if resp.status_code == 200:
-        return resp.json()
-    return None
+# ─────────────────────────────────────────────
+# STEP 1: Finviz Scanner (fallback)
+# ─────────────────────────────────────────────
+FINVIZ_URLS = {'bullish': FINVIZ_BULLISH_URL, 'bearish': FINVIZ_BEARISH_URL}
 
 
-def get_stock_price_yfinance(ticker):
+def step1_finviz_fetch(direction):
+    """سكانر Finviz لاتجاه واحد (bullish / bearish)"""
+    tickers = []
     try:
-        import yfinance as yf
-        tk = yf.Ticker(ticker)
-        return tk.fast_info.last_price
-    except:
-        return 0
+        log(f"Step 1: Fetching Finviz {direction} scanner...")
+        resp = request(FINVIZ_URLS[direction], headers={'User-Agent': 'Mozilla/5.0'})
+        if resp.status_code != 200 or '<' in resp.text[:50]:
+            log(f"  ⚠️ Finviz {direction}: HTTP {resp.status_code}")
+            return tickers
+        reader = csv.DictReader(io.StringIO(resp.text.strip()))
+        for row in reader:
+            ticker = row.get('Ticker', row.get('ticker', '')).strip()
+            if not ticker:
+                continue
+            try:
+                price = float(str(row.get('Price', '0')).replace(',', ''))
+            except:
+                price = 0
+            try:
+                change = float(str(row.get('Change', '0')).replace('%', '').replace(',', ''))
+            except:
+                change = 0
+            try:
+                volume = int(float(str(row.get('Volume', '0')).replace(',', '')))
+            except:
+                volume = 0
+            tickers.append({
+                'ticker': ticker, 'price': price, 'change': change,
+                'volume': volume, 'direction': 'CALL' if direction == 'bullish' else 'PUT',
+            })
+        log(f"  ✅ Finviz {direction}: {len(tickers)} tickers")
+    except Exception as e:
+        log(f"  ❌ Finviz {direction} error: {e}")
+    return tickers
 
 
-# ─────────────────────────────────────────────
-# STEP 1: Finviz Scanner (fallback)
-# ─────────────────────────────────────────────
 def step1_finviz_scanner():
-    results = {'bullish': [], 'bearish': []}
-    for direction, url in [('bullish', FINVIZ_BULLISH_URL), ('bearish', FINVIZ_BEARISH_URL)]:
-        try:
-            log(f"Step 1: Fetching Finviz {direction} scanner...")
-            resp = requests.get(url, timeout=TIMEOUT, headers={'User-Agent': 'Mozilla/5.0'})
-            if resp.status_code != 200 or '<' in resp.text[:50]:
-                log(f"  ⚠️ Finviz {direction}: HTTP {resp.status_code}")
-                continue
-            reader = csv.DictReader(io.StringIO(resp.text.strip()))
-            for row in reader:
-                ticker = row.get('Ticker', row.get('ticker', '')).strip()
-                if not ticker:
-                    continue
-                try:
-                    price = float(str(row.get('Price', '0')).replace(',', ''))
-                except:
-                    price = 0
-                try:
-                    change = float(str(row.get('Change', '0')).replace('%', '').replace(',', ''))
-                except:
-                    change = 0
-                try:
-                    volume = int(float(str(row.get('Volume', '0')).replace(',', '')))
-                except:
-                    volume = 0
-                results[direction].append({
-                    'ticker': ticker, 'price': price, 'change': change,
-                    'volume': volume, 'direction': 'CALL' if direction == 'bullish' else 'PUT',
-                })
-            log(f"  ✅ Finviz {direction}: {len(results[direction])} tickers")
-        except Exception as e:
-            log(f"  ❌ Finviz {direction} error: {e}")
-    return results
+    return {direction: step1_finviz_fetch(direction) for direction in ('bullish', 'bearish')}
 
 
 # ─────────────────────────────────────────────
 # STEP 1B: UW Options Screener (بديل/مكمل)
 # ─────────────────────────────────────────────
-def step1b_uw_options_screener():
-    results = {'bullish': [], 'bearish': []}
-    bullish_params = {
+UW_SCREENER_PARAMS = {
+    'bullish': {
         'type': 'Calls', 'is_otm': 'True', 'vol_greater_oi': 'True',
         'min_premium': 250000, 'min_volume': 500,
         'max_multileg_volume_ratio': 0.1, 'min_ask_perc': 0.7, 'limit': 20,
-    }
-    bearish_params = {
+    },
+    'bearish': {
         'type': 'Puts', 'is_otm': 'True', 'vol_greater_oi': 'True',
         'min_premium': 250000, 'min_volume': 500,
         'max_multileg_volume_ratio': 0.1, 'min_bid_perc': 0.7, 'limit': 20,
-    }
-    for direction, params in [('bullish', bullish_params), ('bearish', bearish_params)]:
-        try:
-            log(f"Step 1B: UW Options Screener {direction}...")
-            data = uw_get('/api/screener/option-contracts', params)
-            if not data:
-                log(f"  ⚠️ UW Screener {direction}: no data")
+    },
+}
+
+
+def step1b_uw_fetch(direction):
+    """UW Options Screener لاتجاه واحد — سهم واحد لكل ticker"""
+    tickers = []
+    try:
+        log(f"Step 1B: UW Options Screener {direction}...")
+        data = uw_get('/api/screener/option-contracts', UW_SCREENER_PARAMS[direction])
+        if not data:
+            log(f"  ⚠️ UW Screener {direction}: no data")
+            return tickers
+        contracts = data.get('data', data.get('results', []))
+        if not isinstance(contracts, list):
+            contracts = []
+        seen = set()
+        for c in contracts:
+            ticker = c.get('underlying_symbol', c.get('ticker', '')).split()[0].replace('_', ' ').split()[0]
+            if not ticker or ticker in seen:
                 continue
-            contracts = data.get('data', data.get('results', []))
-            if not isinstance(contracts, list):
-                contracts = []
-            seen = set()
-            for c in contracts:
-                ticker = c.get('underlying_symbol', c.get('ticker', '')).split()[0].replace('_', ' ').split()[0]
-                if not ticker or ticker in seen:
-                    continue
-                seen.add(ticker)
-                results[direction].append({
-                    'ticker': ticker,
-                    'price': float(c.get('underlying_price', 0) or 0),
-                    'change': 0,
-                    'volume': int(c.get('volume', 0) or 0),
-                    'direction': 'CALL' if direction == 'bullish' else 'PUT',
-                    'uw_premium': float(c.get('premium', 0) or 0),
-                })
-            log(f"  ✅ UW Screener {direction}: {len(results[direction])} unique tickers")
-        except Exception as e:
-            log(f"  ❌ UW Screener {direction} error: {e}")
-    return results
+            seen.add(ticker)
+            tickers.append({
+                'ticker': ticker,
+                'price': float(c.get('underlying_price', 0) or 0),
+                'change': 0,
+                'volume': int(c.get('volume', 0) or 0),
+                'direction': 'CALL' if direction == 'bullish' else 'PUT',
+                'uw_premium': float(c.get('premium', 0) or 0),
+            })
+        log(f"  ✅ UW Screener {direction}: {len(tickers)} unique tickers")
+    except Exception as e:
+        log(f"  ❌ UW Screener {direction} error: {e}")
+    return tickers
+
+
+def step1b_uw_options_screener():
+    return {direction: step1b_uw_fetch(direction) for direction in ('bullish', 'bearish')}
 
 
 # ─────────────────────────────────────────────
@@ -201,7 +194,7 @@ def step2_news_filter(ticker, direction):
                     if pub:
                         try:
                             pub_date = datetime.fromisoformat(pub.replace('Z', '+00:00')).replace(tzinfo=None)
-                            if abs((pub_date - datetime.utcnow()).days) <= 5:
+                            if abs((pub_date - now()).days) <= 5:
                                 earnings_risk = True
                         except:
                             pass
@@ -227,8 +220,8 @@ def step3_flow_analysis(ticker, direction):
             'ticker': ticker, 'limit': 10,
             'min_premium': 50000, 'size_greater_oi': 'True', 'is_otm': 'True',
         }
-        resp = requests.get(f'{UW_BASE}/api/option-trades/flow-alerts',
-                            headers=UW_HEADERS, params=params, timeout=TIMEOUT)
+        resp = request(f'{UW_BASE}/api/option-trades/flow-alerts',
+                       headers=UW_HEADERS, params=params)
         if resp.status_code != 200:
             return 0, 0, [f"Flow API error {resp.status_code}"]
         alerts = resp.json().get('data', [])
@@ -276,8 +269,8 @@ def step4_gex():
     info = {'gamma': 'unknown', 'delta': 'unknown', 'supports_calls': False, 'supports_puts': False}
     try:
         log("  Fetching Spot GEX for SPY...")
-        resp = requests.get(f'{UW_BASE}/api/stock/SPY/spot-exposures/strike',
-                            headers=UW_HEADERS, timeout=TIMEOUT)
+        resp = request(f'{UW_BASE}/api/stock/SPY/spot-exposures/strike',
+                       headers=UW_HEADERS)
         if resp.status_code != 200:
             log(f"  ⚠️ Spot GEX HTTP {resp.status_code}")
             return info
@@ -361,8 +354,8 @@ def fetch_congress_trades():
 # ─────────────────────────────────────────────
 def step5_iv_rank(ticker):
     try:
-        resp = requests.get(f'{UW_BASE}/api/stock/{ticker}/iv-rank',
-                            headers=UW_HEADERS, timeout=TIMEOUT)
+        resp = request(f'{UW_BASE}/api/stock/{ticker}/iv-rank',
+                       headers=UW_HEADERS)
         if resp.status_code == 200:
             data = resp.json().get('data', resp.json())
             if isinstance(data, list) and data:
@@ -381,7 +374,7 @@ def step5_contract_polygon(ticker, direction, price):
         if price <= 0:
             return None
 
-    today = datetime.now()
+    today = now()
     exp_min = (today + timedelta(days=DTE_MIN)).strftime('%Y-%m-%d')
     exp_max = (today + timedelta(days=DTE_MAX)).strftime('%Y-%m-%d')
     contract_type = 'call' if direction == 'CALL' else 'put'
@@ -393,77 +386,58 @@ def step5_contract_polygon(ticker, direction, price):
         strike_min = round(price * 0.85, 2)
         strike_max = round(price * 1.00, 2)
 
-    data = polygon_get(f'/v3/snapshot/options/{ticker}', {
+    chain = iter_chain(ticker, {
         'strike_price.gte': strike_min, 'strike_price.lte': strike_max,
         'expiration_date.gte': exp_min, 'expiration_date.lte': exp_max,
-        'contract_type': contract_type, 'limit': 50, 'order': 'asc', 'sort': 'strike_price',
+        'contract_type': contract_type, 'order': 'asc', 'sort': 'strike_price',
     })
 
-    if not data or not data.get('results'):
-        log(f"  ⚠️ No options data from Polygon for {ticker}")
+    # السلسلة تنقسم دفعات تتقيّم vectorized أول ما توصل — نحتفظ بأفضل عقد من كل دفعة
+    picks = []
+    seen_any = False
+    try:
+        for arr, records in iter_column_chunks(chain):
+            seen_any = True
+            scores = score_contracts(arr, (DELTA_MIN, DELTA_MAX), (PRICE_MIN, PRICE_MAX),
+                                     MIN_OI, MIN_VOLUME, MAX_SPREAD_PCT)
+            for i in top_n(scores, 1):
+                picks.append((scores[i], records[i]))
+    except ChainError as e:
+        # أفضل عقد من سلسلة ناقصة مو أفضل عقد — ما نختار
+        log(f"  ⚠️ {ticker}: {e}")
         return None
 
     best = None
-    best_score = -1
-
-    for opt in data['results']:
-        details = opt.get('details', {})
-        greeks = opt.get('greeks', {})
-        day_data = opt.get('day', {})
-        last_quote = opt.get('last_quote', {})
-
-        delta = abs(greeks.get('delta', 0))
-        bid = last_quote.get('bid', 0) or 0
-        ask = last_quote.get('ask', 0) or 0
-        mid = round((bid + ask) / 2, 2) if bid > 0 and ask > 0 else 0
-        oi = day_data.get('open_interest', 0) or 0
-        volume = day_data.get('volume', 0) or 0
-        iv = opt.get('implied_volatility', 0) or 0
-
-        if delta < DELTA_MIN or delta > DELTA_MAX:
-            continue
-        if mid <= 0 or mid < PRICE_MIN or mid > PRICE_MAX:
-            continue
-        if oi < MIN_OI:
-            continue
-        if volume < MIN_VOLUME:
-            continue
+    if picks:
+        _, c = max(picks, key=lambda p: p[0])
+        delta = abs(c['delta'] or 0)
+        bid = c['bid']
+        ask = c['ask']
+        mid = round((bid + ask) / 2, 2)
         spread = ask - bid
-        spread_pct = spread / mid if mid > 0 else 999
-        if spread_pct >= MAX_SPREAD_PCT:
-            continue
-
-        exp_str = details.get('expiration_date', '')
+        spread_pct = spread / mid
+        iv = c['iv'] or 0
+        exp_str = c['expiry']
         try:
             dte = (datetime.strptime(exp_str, '%Y-%m-%d') - today).days
         except:
             dte = 0
+        best = {
+            'symbol': ticker, 'strike': c['strike'],
+            'expiry': exp_str, 'dte': dte,
+            'right': 'C' if direction == 'CALL' else 'P',
+            'bid': round(bid, 2), 'ask': round(ask, 2), 'mid': mid,
+            'spread': round(spread, 2), 'spread_pct': round(spread_pct * 100, 1),
+            'delta': round(delta, 3), 'gamma': round(c['gamma'] or 0, 4),
+            'theta': round(c['theta'] or 0, 4), 'vega': round(c['vega'] or 0, 4),
+            'iv': round(iv, 3), 'volume': int(c['volume']), 'oi': int(c['oi']),
+            'direction': direction, 'contract_ticker': c['ticker'],
+            'greeks_model': c.get('greeks_model', False),
+            'spread_ok': True,
+        }
 
-        score = 0
-        if DELTA_MIN <= delta <= DELTA_MAX:
-            score += 2
-        if spread_pct < MAX_SPREAD_PCT:
-            score += 1
-        if volume >= MIN_VOLUME:
-            score += 1
-        if oi >= MIN_OI:
-            score += 1
-        score += max(0, 1 - abs(delta - 0.30) * 10)
-
-        if score > best_score:
-            best_score = score
-            best = {
-                'symbol': ticker, 'strike': details.get('strike_price'),
-                'expiry': exp_str, 'dte': dte,
-                'right': 'C' if direction == 'CALL' else 'P',
-                'bid': round(bid, 2), 'ask': round(ask, 2), 'mid': mid,
-                'spread': round(spread, 2), 'spread_pct': round(spread_pct * 100, 1),
-                'delta': round(delta, 3), 'gamma': round(greeks.get('gamma', 0), 4),
-                'theta': round(greeks.get('theta', 0), 4), 'vega': round(greeks.get('vega', 0), 4),
-                'iv': round(iv, 3), 'volume': int(volume), 'oi': int(oi),
-                'direction': direction, 'contract_ticker': details.get('ticker', ''),
-                'spread_ok': True,
-            }
+    if not seen_any:
+        log(f"  ⚠️ No options data from Polygon for {ticker}")
     return best
 
 
@@ -502,29 +476,80 @@ def step6_scorecard(scanner_ok, news_score, flow_score, sweep_score, iv_rank, ge
 
 
 # ─────────────────────────────────────────────
-# MAIN PIPELINE
+# Enrichment: News / Flow / IV / Contract لكل مرشح
 # ─────────────────────────────────────────────
-def run_screener():
-    log("=" * 50)
-    log("🔍 Morning Screener v3.0 — Full Pipeline")
-    log("=" * 50)
+def enrich_candidates(candidates, gex_info):
+    """الخطوات الأربع لكل المرشحين بالتوازي — النتائج تُجمع بنفس الترتيب"""
+    recommendations = []
+    # المرشحين بدون سعر (UW) — سعرهم بطلب yFinance واحد بدل طلب لكل سهم داخل step5
+    quotes.prefetch([e['ticker'] for e in candidates if e.get('price', 0) <= 0])
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = [
+            (
+                pool.submit(step2_news_filter, e['ticker'], e['direction']),
+                pool.submit(step3_flow_analysis, e['ticker'], e['direction']),
+                pool.submit(step5_iv_rank, e['ticker']),
+                pool.submit(step5_contract_polygon, e['ticker'], e['direction'], e.get('price', 0)),
+            )
+            for e in candidates
+        ]
+
+        for i, (entry, (news_f, flow_f, iv_f, contract_f)) in enumerate(zip(candidates, futures)):
+            ticker = entry['ticker']
+            direction = entry['direction']
+            price = entry.get('price', 0)
+            log(f"\n--- [{i+1}/{len(candidates)}] {ticker} ({direction}) ${price} ---")
+
+            news_score, news_items, earnings_risk = news_f.result()
+            no_earnings = not earnings_risk
+            log(f"  News: score={news_score}, earnings={earnings_risk}")
+
+            flow_score, sweep_score, flow_details = flow_f.result()
+            log(f"  Flow: {flow_score}/2, Sweep: {sweep_score}")
+
+            iv_rank = iv_f.result()
+            log(f"  IV Rank: {iv_rank}")
+
+            contract = contract_f.result()
+            spread_ok = contract.get('spread_ok', False) if contract else False
+
+            if contract:
+                log(f"  ✅ Contract: ${contract['strike']} {contract['expiry']} Δ{contract['delta']} mid=${contract['mid']}")
+            else:
+                log(f"  ⚠️ No contract passed filters")
 
-    # Market Tide
-    market_tide = fetch_market_tide()
+            gex_supports = gex_info.get('supports_calls', False) if direction == 'CALL' else gex_info.get('supports_puts', False)
 
-    # Dark Pool
-    darkpool = fetch_darkpool_recent()
+            score, score_details = step6_scorecard(True, news_score, flow_score, sweep_score, iv_rank, gex_supports, no_earnings, spread_ok)
+            log(f"  📊 Score: {score}/9 — {', '.join(score_details)}")
 
-    # Congress Trades
-    congress = fetch_congress_trades()
+            decision = '✅ دخول' if score >= 7 else '🟡 حجم أصغر' if score >= 5 else '❌ لا تدخل'
+
+            rec = {
+                'ticker': ticker, 'price': price, 'change': entry.get('change', 0),
+                'direction': direction, 'source': entry.get('source', ''),
+                'scorecard': score, 'scorecard_max': 9, 'scorecard_details': score_details,
+                'decision': decision, 'news': news_items, 'flow_details': flow_details,
+                'iv_rank': iv_rank, 'earnings_risk': earnings_risk, 'contract': contract,
+            }
 
-    # Step 1: Finviz Scanner (fallback)
-    scanner = step1_finviz_scanner()
+            if contract:
+                mid = contract.get('mid', 0)
+                if mid > 0:
+                    rec['tp1'] = round(mid * 1.25, 2)
+                    rec['tp2'] = round(mid * 1.50, 2)
+                    rec['sl'] = round(mid * 0.70, 2)
+                    rec['max_contracts'] = min(3, int(600 / (mid * 100))) if mid > 0 else 0
 
-    # Step 1B: UW Options Screener
-    uw_scanner = step1b_uw_options_screener()
+            recommendations.append(rec)
+    return recommendations
 
-    # Merge tickers (UW first, Finviz as fallback)
+
+# ─────────────────────────────────────────────
+# MAIN PIPELINE
+# ─────────────────────────────────────────────
+def merge_candidates(uw_scanner, scanner):
+    """دمج السكانرات (UW أولاً، Finviz كـ fallback) → أعلى 20 حسب الفوليوم"""
     all_tickers = []
     seen = set()
     for direction in ['bullish', 'bearish']:
@@ -548,79 +573,55 @@ def run_screener():
         for sym in ['TSLA', 'NVDA', 'AAPL', 'MSFT', 'AMZN', 'META', 'AMD', 'NFLX']:
             all_tickers.append({'ticker': sym, 'price': 0, 'change': 0, 'volume': 0, 'direction': 'CALL', 'source': 'fallback'})
 
-    # Step 4: Spot GEX
-    log("\nStep 4: Spot GEX Analysis...")
-    gex_info = step4_gex()
-
-    # Process candidates
-    recommendations = []
     all_tickers.sort(key=lambda x: x.get('volume', 0), reverse=True)
-    candidates = all_tickers[:20]
-
-    for i, entry in enumerate(candidates):
-        ticker = entry['ticker']
-        direction = entry['direction']
-        price = entry.get('price', 0)
-        log(f"\n--- [{i+1}/{len(candidates)}] {ticker} ({direction}) ${price} ---")
-
-        news_score, news_items, earnings_risk = step2_news_filter(ticker, direction)
-        no_earnings = not earnings_risk
-        log(f"  News: score={news_score}, earnings={earnings_risk}")
-
-        flow_score, sweep_score, flow_details = step3_flow_analysis(ticker, direction)
-        log(f"  Flow: {flow_score}/2, Sweep: {sweep_score}")
-
-        iv_rank = step5_iv_rank(ticker)
-        log(f"  IV Rank: {iv_rank}")
-
-        contract = step5_contract_polygon(ticker, direction, price)
-        spread_ok = contract.get('spread_ok', False) if contract else False
-
-        if contract:
-            log(f"  ✅ Contract: ${contract['strike']} {contract['expiry']} Δ{contract['delta']} mid=${contract['mid']}")
-        else:
-            log(f"  ⚠️ No contract passed filters")
+    return all_tickers[:20]
 
-        gex_supports = gex_info.get('supports_calls', False) if direction == 'CALL' else gex_info.get('supports_puts', False)
 
-        score, score_details = step6_scorecard(True, news_score, flow_score, sweep_score, iv_rank, gex_supports, no_earnings, spread_ok)
-        log(f"  📊 Score: {score}/9 — {', '.join(score_details)}")
-
-        decision = '✅ دخول' if score >= 7 else '🟡 حجم أصغر' if score >= 5 else '❌ لا تدخل'
-
-        rec = {
-            'ticker': ticker, 'price': price, 'change': entry.get('change', 0),
-            'direction': direction, 'source': entry.get('source', ''),
-            'scorecard': score, 'scorecard_max': 9, 'scorecard_details': score_details,
-            'decision': decision, 'news': news_items, 'flow_details': flow_details,
-            'iv_rank': iv_rank, 'earnings_risk': earnings_risk, 'contract': contract,
-        }
+def run_screener():
+    log("=" * 50)
+    log("🔍 Morning Screener v3.0 — Full Pipeline")
+    log("=" * 50)
 
-        if contract:
-            mid = contract.get('mid', 0)
-            if mid > 0:
-                rec['tp1'] = round(mid * 1.25, 2)
-                rec['tp2'] = round(mid * 1.50, 2)
-                rec['sl'] = round(mid * 0.70, 2)
-                rec['max_contracts'] = min(3, int(600 / (mid * 100))) if mid > 0 else 0
+    # المراحل المستقلة (Tide / Dark Pool / Congress / Scanners / GEX) تشتغل بالتوازي
+    stages = [
+        stage('market_tide', fetch_market_tide, timeout=STAGE_TIMEOUT, default={}),
+        stage('darkpool', fetch_darkpool_recent, timeout=STAGE_TIMEOUT, default=[]),
+        stage('congress', fetch_congress_trades, timeout=STAGE_TIMEOUT, default=[]),
+        stage('finviz_bullish', lambda: step1_finviz_fetch('bullish'), timeout=STAGE_TIMEOUT, default=[]),
+        stage('finviz_bearish', lambda: step1_finviz_fetch('bearish'), timeout=STAGE_TIMEOUT, default=[]),
+        stage('uw_bullish', lambda: step1b_uw_fetch('bullish'), timeout=STAGE_TIMEOUT, default=[]),
+        stage('uw_bearish', lambda: step1b_uw_fetch('bearish'), timeout=STAGE_TIMEOUT, default=[]),
+        stage('gex', step4_gex, timeout=STAGE_TIMEOUT,
+              default={'gamma': 'unknown', 'delta': 'unknown', 'supports_calls': False, 'supports_puts': False}),
+        stage('candidates',
+              lambda ub, ube, fb, fbe: merge_candidates({'bullish': ub, 'bearish': ube}, {'bullish': fb, 'bearish': fbe}),
+              deps=('uw_bullish', 'uw_bearish', 'finviz_bullish', 'finviz_bearish'), default=[]),
+        stage('recommendations', enrich_candidates, deps=('candidates', 'gex'), default=[]),
+    ]
+    results, timings = run_stages(stages, log=log)
 
-        recommendations.append(rec)
+    log("\n⏱️ Stage timings:")
+    for name, t in timings.items():
+        log(f"  {name}: {t['seconds']:.2f}s ({t['status']})")
 
+    candidates = results['candidates']
+    recommendations = results['recommendations']
     recommendations.sort(key=lambda x: x['scorecard'], reverse=True)
 
     return {
-        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'timestamp': now().isoformat() + 'Z',
         'schedule': '12:00 UTC / 3:00 PM Riyadh',
         'scanner_counts': {
-            'finviz_bullish': len(scanner['bullish']), 'finviz_bearish': len(scanner['bearish']),
-            'uw_bullish': len(uw_scanner['bullish']), 'uw_bearish': len(uw_scanner['bearish']),
+            'finviz_bullish': len(results['finviz_bullish']), 'finviz_bearish': len(results['finviz_bearish']),
+            'uw_bullish': len(results['uw_bullish']), 'uw_bearish': len(results['uw_bearish']),
         },
-        'market_tide': market_tide,
-        'gex': gex_info,
-        'darkpool': darkpool,
-        'congress': congress,
+        'market_tide': results['market_tide'],
+        'gex': results['gex'],
+        'darkpool': results['darkpool'],
+        'congress': results['congress'],
         'total_candidates': len(candidates),
         'recommendations': recommendations,
+        'stage_timings': timings,
     }
 
 
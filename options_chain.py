@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+⛓️ Options Chain — صُحبة Trading
+جلب سلسلة العقود كاملة من Polygon Snapshot مع pagination
+- يتبع next_url لين آخر صفحة (بدل limit ثابت يسقط strikes)
+- كل صفحة تنقرأ تدريجياً (ijson لو متوفر) وتطلع سجلات مختصرة أول بأول
+  → الاختيار يبدأ قبل وصول آخر صفحة والذاكرة ثابتة حتى مع SPX
+- كل صفحة تنحفظ في api_cache بنفس TTL الـ snapshot
+- تمثيل عمودي (NumPy structured array) للفلترة والتقييم vectorized
+- العقود اللي Polygon يرجّع Greeks حقها فاضية تنحسب محلياً (black_scholes) دفعة دفعة
+"""
+import json
+from datetime import date
+
+import numpy as np
+
+import api_cache
+import black_scholes as bs
+import market_client
+from market_client import POLYGON_BASE, POLYGON_KEY, stream
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+CHAIN_PAGE_LIMIT = 250  # أقصى limit يقبله Polygon snapshot
+MAX_PAGES = 200
+
+
+class ChainError(RuntimeError):
+    """السلسلة ما اكتملت (خطأ شبكة بعد الـ retries / HTTP غير 200) — بدل سلسلة ناقصة بصمت"""
+
+# أعمدة السلسلة — expiry كـ ordinal (أيام) عشان DTE يصير طرح مصفوفات
+CHAIN_DTYPE = np.dtype([
+    ('strike', 'f8'), ('expiry', 'i4'),
+    ('delta', 'f8'), ('gamma', 'f8'), ('theta', 'f8'), ('vega', 'f8'), ('iv', 'f8'),
+    ('bid', 'f8'), ('ask', 'f8'), ('oi', 'f8'), ('volume', 'f8'),
+])
+
+
+def compact_contract(opt):
+    """عقد snapshot → سجل مختصر. Greeks الناقصة تبقى None (مو 0)"""
+    details = opt.get('details', {})
+    greeks = opt.get('greeks') or {}
+    day = opt.get('day') or {}
+    quote = opt.get('last_quote') or {}
+    underlying = opt.get('underlying_asset') or {}
+    return {
+        'ticker': details.get('ticker', ''),
+        'strike': details.get('strike_price'),
+        'expiry': details.get('expiration_date', ''),
+        'contract_type': details.get('contract_type', ''),
+        'delta': greeks.get('delta'),
+        'gamma': greeks.get('gamma'),
+        'theta': greeks.get('theta'),
+        'vega': greeks.get('vega'),
+        'iv': opt.get('implied_volatility'),
+        'oi': day.get('open_interest') or opt.get('open_interest') or 0,
+        'volume': day.get('volume', 0) or 0,
+        'bid': quote.get('bid', 0) or 0,
+        'ask': quote.get('ask', 0) or 0,
+        'underlying_price': underlying.get('price') or underlying.get('value'),  # المؤشرات (SPX) ترجع value
+    }
+
+
+def _iter_results(reader, meta):
+    """يقرأ صفحة snapshot عنصر عنصر — next_url ينحفظ في meta"""
+    if ijson is None:
+        page = json.load(reader)
+        meta['next_url'] = page.get('next_url')
+        yield from page.get('results') or []
+        return
+    builder = None
+    for prefix, event, value in ijson.parse(reader, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == 'results.item' and event == 'end_map':
+                yield builder.value
+                builder = None
+        elif prefix == 'results.item' and event == 'start_map':
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+        elif prefix == 'next_url':
+            meta['next_url'] = value
+
+
+def _fetch_page(url, params):
+    """صفحة وحدة: من الكاش لو موجودة، وإلا stream من Polygon"""
+    key = api_cache.make_key(url, params) if market_client.transport() is None else None
+    cached = api_cache.get(key) if key else None
+    if cached is not None:
+        yield from cached['records']
+        return cached['next_url']
+
+    meta = {'next_url': None}
+    records = []
+    with stream(url, params={**params, 'apiKey': POLYGON_KEY}) as (status, reader):
+        if status != 200:
+            raise ChainError(f"HTTP {status}")
+        for opt in _iter_results(reader, meta):
+            rec = compact_contract(opt)
+            records.append(rec)
+            yield rec
+    if key:
+        api_cache.put(key, {'records': records, 'next_url': meta['next_url']},
+                      api_cache.ttl_for('/v3/snapshot/options/'))
+    return meta['next_url']
+
+
+def iter_chain(symbol, params=None):
+    """كل عقود السلسلة (بعد الفلاتر في params) كسجلات مختصرة — صفحة ورا صفحة
+    ChainError لو صفحة فشلت (السجلات اللي طلعت قبلها ناقصة — المستدعي يقرر)"""
+    url = f"{POLYGON_BASE}/v3/snapshot/options/{symbol}"
+    page_params = {**(params or {}), 'limit': CHAIN_PAGE_LIMIT}
+    for page in range(MAX_PAGES):
+        try:
+            next_url = yield from _fetch_page(url, page_params)
+        except ChainError as e:
+            raise ChainError(f"{symbol} chain page {page + 1}: {e}") from None
+        except market_client.transport_errors() as e:
+            raise ChainError(f"{symbol} chain page {page + 1}: {type(e).__name__}: {e}") from e
+        if not next_url:
+            return
+        # next_url فيه الـ cursor وكل الفلاتر — نضيف المفتاح بس
+        url, page_params = next_url, {}
+
+
+def to_columns(records):
+    """سجلات مختصرة → structured array (القيم الناقصة NaN)"""
+    arr = np.empty(len(records), dtype=CHAIN_DTYPE)
+    ordinals = {}
+    for exp in {r['expiry'] for r in records}:
+        try:
+            ordinals[exp] = date.fromisoformat(exp).toordinal()
+        except (TypeError, ValueError):
+            ordinals[exp] = 0
+    arr['expiry'] = [ordinals[r['expiry']] for r in records]
+    for field in CHAIN_DTYPE.names:
+        if field != 'expiry':
+            arr[field] = np.array([r[field] for r in records], dtype=float)
+    return arr
+
+
+def _chunk(batch):
+    # نسخ — الكاش يحتفظ بأرقام Polygon الأصلية، والـ Greeks المحسوبة للدفعة بس
+    batch = [dict(rec) for rec in batch]
+    bs.fill_greeks(batch, now=market_client.now())
+    return to_columns(batch), batch
+
+
+def iter_column_chunks(records, size=CHAIN_PAGE_LIMIT):
+    """يقسّم stream السجلات لدفعات (arr, records) — الفلترة تبدأ مع أول دفعة"""
+    batch = []
+    for rec in records:
+        batch.append(rec)
+        if len(batch) >= size:
+            yield _chunk(batch)
+            batch = []
+    if batch:
+        yield _chunk(batch)
+
+
+def score_contracts(arr, delta_range, price_range, min_oi, min_volume, max_spread_pct, target_delta=0.30):
+    """نفس فلاتر وتقييم step5_contract_polygon لكن على السلسلة كاملة — NaN = مرفوض"""
+    delta = np.abs(np.nan_to_num(arr['delta']))
+    bid, ask = arr['bid'], arr['ask']
+    mid = np.where((bid > 0) & (ask > 0), np.round((bid + ask) / 2, 2), 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spread_pct = np.where(mid > 0, (ask - bid) / mid, 999.0)
+    ok = (
+        (delta >= delta_range[0]) & (delta <= delta_range[1])
+        & (mid > 0) & (mid >= price_range[0]) & (mid <= price_range[1])
+        & (arr['oi'] >= min_oi) & (arr['volume'] >= min_volume)
+        & (spread_pct < max_spread_pct)
+    )
+    # كل العقود الناجحة تاخذ 5 (delta + spread + volume + OI) + قربها من target_delta
+    score = 5 + np.maximum(0, 1 - np.abs(delta - target_delta) * 10)
+    return np.where(ok, score, np.nan)
+
+
+def top_n(scores, n):
+    """أعلى n بالترتيب (التعادل للأسبق في السلسلة) — argpartition بدل sort كامل"""
+    valid = np.flatnonzero(~np.isnan(scores))
+    if len(valid) > n:
+        part = np.argpartition(-scores[valid], n - 1)
+        kth = scores[valid[part[n - 1]]]
+        above = valid[scores[valid] > kth]
+        ties = valid[scores[valid] == kth][:n - len(above)]
+        valid = np.concatenate([above, ties])
+    order = np.lexsort((valid, -scores[valid]))
+    return valid[order]
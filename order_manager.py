@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+📬 Order Manager — صُحبة Trading
+متابعة الأوامر عبر أحداث ib_insync (statusEvent / fillEvent) بدل polling بـ ib.sleep
+- place() ما ينتظر: أكثر من أمر (دخول + خروج) يكونون معلّقين بنفس الوقت
+- مهلة لكل أمر: لو ما اكتمل يتلغى تلقائياً (call_later على نفس event loop)
+- زمن التعبئة لكل أمر (من الإرسال لأول تعبئة ولاكتمال الأمر)
+"""
+import time
+
+from ib_insync import util
+
+# === إعدادات ===
+ORDER_TIMEOUT = 30   # ثواني قبل إلغاء أمر ما اكتمل
+CANCEL_GRACE = 5     # ثواني ننتظر فيها تأكيد الإلغاء من IB
+
+
+class ManagedOrder:
+    def __init__(self, trade, tag, on_done):
+        self.trade = trade
+        self.tag = tag
+        self.on_done = on_done
+        self.sent = time.perf_counter()
+        self.first_fill = None
+        self.finished = None
+        self.timed_out = False
+        self.timeout = None
+        self._timer = None
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    @property
+    def filled(self):
+        return int(self.trade.orderStatus.filled)
+
+    @property
+    def avg_price(self):
+        return self.trade.orderStatus.avgFillPrice or 0
+
+    @property
+    def status(self):
+        return self.trade.orderStatus.status
+
+    def summary(self):
+        ms = lambda t: round((t - self.sent) * 1000, 1) if t is not None else None
+        return {
+            'tag': self.tag,
+            'status': self.status,
+            'filled': self.filled,
+            'avg_price': round(self.avg_price, 2),
+            'timed_out': self.timed_out,
+            'fill_latency_ms': ms(self.first_fill),
+            'done_latency_ms': ms(self.finished),
+        }
+
+
+class OrderManager:
+    def __init__(self, ib, timeout=ORDER_TIMEOUT, cancel_on_timeout=True, log=print):
+        self.ib = ib
+        self.timeout = timeout
+        self.cancel_on_timeout = cancel_on_timeout
+        self.log = log
+        self.orders = []
+
+    def place(self, contract, order, tag=None, on_done=None, timeout=None):
+        """يرسل الأمر ويرجع فوراً — on_done(managed) ينادى مرة وحدة لما الأمر يكتمل أو يتلغى"""
+        trade = self.ib.placeOrder(contract, order)
+        mo = ManagedOrder(trade, tag, on_done)
+        self.orders.append(mo)
+        trade.fillEvent += lambda *_: self._on_fill(mo)
+        trade.statusEvent += lambda *_: self._on_status(mo)
+        mo.timeout = self.timeout if timeout is None else timeout
+        if mo.timeout:
+            mo._timer = util.getLoop().call_later(mo.timeout, self._expire, mo)
+        self._on_status(mo)  # ممكن يكون اكتمل قبل ما نسجّل (رفض فوري)
+        return mo
+
+    def _on_fill(self, mo):
+        if mo.first_fill is None:
+            mo.first_fill = time.perf_counter()
+
+    def _on_status(self, mo):
+        if mo.done or not mo.trade.isDone():
+            return
+        mo.finished = time.perf_counter()
+        if mo._timer is not None:
+            mo._timer.cancel()
+        if mo.on_done is not None:
+            try:
+                mo.on_done(mo)
+            except Exception as e:
+                self.log(f"  ❌ order {mo.tag} callback error: {e}")
+
+    def _expire(self, mo):
+        if mo.done:
+            return
+        mo.timed_out = True
+        if self.cancel_on_timeout:
+            self.log(f"  ⏱️ order {mo.tag}: not done after {mo.timeout}s ({mo.status}) — cancelling")
+            self.ib.cancelOrder(mo.trade.order)
+
+    def pending(self):
+        return [mo for mo in self.orders if not mo.done]
+
+    def wait(self, orders=None):
+        """ينتظر (بمعالجة أحداث IB) لين كل الأوامر تكتمل — بحد أقصى المهلة + مهلة الإلغاء"""
+        orders = self.orders if orders is None else orders
+        deadline = max((mo.sent + (mo.timeout or 0) for mo in orders), default=0)
+        deadline = time.monotonic() + max(0, deadline - time.perf_counter()) + CANCEL_GRACE
+        while any(not mo.done for mo in orders):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self.ib.waitOnUpdate(timeout=remaining)
+        return [mo.summary() for mo in orders]
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+🧩 Pipeline Runner — صُحبة Trading
+تشغيل مراحل الـ pipeline كـ DAG: كل مرحلة تبدأ أول ما تخلص اعتمادياتها
+- المراحل المستقلة تشتغل بالتوازي
+- مرحلة تتجاوز الـ timeout أو ترمي خطأ → تاخذ قيمتها الافتراضية والباقي يكمل
+- توقيت wall-clock لكل مرحلة
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def stage(name, fn, deps=(), timeout=None, default=None):
+    """تعريف مرحلة — fn تستقبل نتائج deps بنفس الترتيب"""
+    return {'name': name, 'fn': fn, 'deps': tuple(deps), 'timeout': timeout, 'default': default}
+
+
+def run_stages(stages, max_workers=8, log=print):
+    """يشغّل المراحل ويرجّع (results, timings)
+    timings[name] = {'seconds': ..., 'status': 'ok' | 'timeout' | 'error' | 'skipped'}"""
+    by_name = {s['name']: s for s in stages}
+    for s in stages:
+        missing = [d for d in s['deps'] if d not in by_name]
+        if missing:
+            raise ValueError(f"Stage {s['name']} depends on unknown stage(s): {missing}")
+
+    results = {}
+    timings = {}
+    pending = {s['name'] for s in stages}
+    running = {}  # future → (name, start)
+
+    def finish(name, value, status, start):
+        results[name] = value
+        timings[name] = {'seconds': round(time.monotonic() - start, 3), 'status': status}
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while pending or running:
+            # أطلق كل مرحلة جاهزة
+            for name in sorted(pending):
+                s = by_name[name]
+                if all(d in results for d in s['deps']):
+                    pending.discard(name)
+                    args = [results[d] for d in s['deps']]
+                    running[pool.submit(s['fn'], *args)] = (name, time.monotonic())
+
+            if not running:
+                # اعتماديات ما تنحل (دورة) — نسجّلها skipped
+                for name in sorted(pending):
+                    finish(name, by_name[name]['default'], 'skipped', time.monotonic())
+                    log(f"  ⚠️ Stage {name}: skipped (unresolved dependencies)")
+                break
+
+            deadlines = [start + by_name[name]['timeout'] for name, start in running.values()
+                         if by_name[name]['timeout'] is not None]
+            wait_for = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            done, _ = wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for fut in done:
+                name, start = running.pop(fut)
+                try:
+                    finish(name, fut.result(), 'ok', start)
+                except Exception as e:
+                    finish(name, by_name[name]['default'], 'error', start)
+                    log(f"  ❌ Stage {name} error: {e}")
+
+            now = time.monotonic()
+            for fut, (name, start) in list(running.items()):
+                timeout = by_name[name]['timeout']
+                if timeout is not None and now - start >= timeout:
+                    running.pop(fut)
+                    fut.cancel()
+                    finish(name, by_name[name]['default'], 'timeout', start)
+                    log(f"  ⏱️ Stage {name}: timed out after {timeout}s — using default")
+    finally:
+        # ما ننتظر المراحل اللي تجاوزت الوقت
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return results, timings
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+🛡️ Portfolio Risk — صُحبة Trading
+مخاطر كل الصفقات المفتوحة مع بعض (مو صفقة صفقة)
+- كل المراكز في مصفوفات → Greeks مجمعة لكل underlying بعملية وحدة
+- شبكة صدمات spot × IV (±5% × ±20%) بـ Black-Scholes vectorized
+- تحديث مركز واحد (spot/IV من tick) O(1) → ينفع مع كل tick في وضع الـ stream
+- حدود المحفظة (نسبة من net liq) تمنع execute_order قبل التنفيذ — ومركز بدون سعر يمنع بعد (تعرّضه مجهول مو صفر)
+- أسعار الصفقات: طلب snapshot لكل (underlying, expiry) بدل طلب لكل صفقة (والصفحات بكاش api_cache)
+
+استخدام:
+  python3 portfolio_risk.py 100000   — ملخص مخاطر الصفقات المفتوحة (net liq اختياري)
+"""
+import json
+import sys
+
+import numpy as np
+
+import black_scholes as bs
+import options_chain
+
+# === إعدادات ===
+MULTIPLIER = 100
+DEFAULT_IV = 0.30
+SPOT_SHOCKS = np.array([-0.05, -0.025, 0.0, 0.025, 0.05])
+IV_SHOCKS = np.array([-0.20, 0.0, 0.20])
+
+# حدود كنسبة من net liq
+RISK_LIMITS = {
+    'dollar_delta': 1.00,  # |delta × spot| لكل underlying
+    'vega': 0.02,          # |vega$| لكل 1% IV
+    'theta': 0.01,         # خسارة الوقت لليوم
+    'shock_loss': 0.15,    # أسوأ خانة في شبكة الصدمات
+}
+
+
+class Portfolio:
+    def __init__(self, positions):
+        """positions: list of dicts — underlying, strike, expiry, right, qty, spot, iv, key"""
+        self.keys = [p.get('key') for p in positions]
+        self.underlying = np.array([p['underlying'] for p in positions], dtype=object)
+        self.strike = np.array([p['strike'] for p in positions], dtype=float)
+        self.expiry = [str(p['expiry']) for p in positions]
+        self.is_call = np.array([str(p['right']).upper().startswith('C') for p in positions], dtype=bool)
+        self.qty = np.array([p['qty'] for p in positions], dtype=float)
+        self.spot = np.array([p.get('spot') or np.nan for p in positions], dtype=float)
+        self.iv = np.array([p.get('iv') or DEFAULT_IV for p in positions], dtype=float)
+        self.index = {k: i for i, k in enumerate(self.keys) if k is not None}
+        self.names, self.group = np.unique(self.underlying.astype(str), return_inverse=True) \
+            if positions else (np.array([]), np.array([], dtype=int))
+        # مركز بدون spot ياخذه من مركز ثاني على نفس الـ underlying
+        for j in range(len(self.names)):
+            same = self.group == j
+            known = self.spot[same & ~np.isnan(self.spot)]
+            if len(known):
+                self.spot[same & np.isnan(self.spot)] = known[0]
+
+    def __len__(self):
+        return len(self.qty)
+
+    def positions(self):
+        return [{'key': self.keys[i], 'underlying': self.underlying[i], 'strike': self.strike[i],
+                 'expiry': self.expiry[i], 'right': 'C' if self.is_call[i] else 'P', 'qty': self.qty[i],
+                 'spot': self.spot[i], 'iv': self.iv[i]} for i in range(len(self))]
+
+    def unpriced(self):
+        """underlyings فيها مركز بدون spot (ولا مركز ثاني بنفس الـ underlying يعطيه) — exposures تحسبه صفر"""
+        return sorted({str(u) for u in self.underlying[np.isnan(self.spot)]})
+
+    def with_position(self, position):
+        return Portfolio(self.positions() + [position])
+
+    def update(self, key, spot=None, iv=None):
+        """tick لمركز واحد (undPrice / impliedVol من IB) — باقي المراكز بنفس الـ underlying ياخذون نفس spot"""
+        i = self.index.get(key)
+        if i is None:
+            return
+        if spot is not None and spot == spot and spot > 0:
+            self.spot[self.group == self.group[i]] = spot
+        if iv is not None and iv == iv and iv > 0:
+            self.iv[i] = iv
+
+    def _years(self):
+        return bs.years_to_expiry(self.expiry) if len(self) else np.array([])
+
+    def exposures(self):
+        """{underlying: {delta, dollar_delta, gamma, theta, vega, value}} + 'total' — بالدولار للمحفظة"""
+        if not len(self):
+            return {'total': {'delta': 0, 'dollar_delta': 0, 'gamma': 0, 'theta': 0, 'vega': 0, 'value': 0}}
+        years = self._years()
+        g = bs.greeks(self.spot, self.strike, years, self.iv, self.is_call)
+        units = self.qty * MULTIPLIER
+        per_pos = {
+            'delta': g['delta'] * units,                # أسهم مكافئة
+            'dollar_delta': g['delta'] * units * self.spot,
+            'gamma': g['gamma'] * units,
+            'theta': g['theta'] * units,                 # $ لليوم
+            'vega': g['vega'] * units,                   # $ لكل 1% IV
+            'value': bs.price(self.spot, self.strike, years, self.iv, self.is_call) * units,
+        }
+        n = len(self.names)
+        out = {}
+        sums = {k: np.bincount(self.group, weights=np.nan_to_num(v), minlength=n) for k, v in per_pos.items()}
+        for j, name in enumerate(self.names):
+            out[name] = {k: round(float(v[j]), 2) for k, v in sums.items()}
+        out['total'] = {k: round(float(v.sum()), 2) for k, v in sums.items()}
+        return out
+
+    def shock_grid(self, spot_shocks=SPOT_SHOCKS, iv_shocks=IV_SHOCKS):
+        """P&L المحفظة [spot_shock, iv_shock] — كل الـ underlyings يتحركون مع بعض"""
+        if not len(self):
+            return np.zeros((len(spot_shocks), len(iv_shocks)))
+        years = self._years()
+        priced = ~np.isnan(self.spot)
+        S = self.spot[priced] * (1 + np.asarray(spot_shocks))[:, None, None]
+        iv = np.maximum(self.iv[priced] * (1 + np.asarray(iv_shocks))[None, :, None], 0.01)
+        units = self.qty[priced] * MULTIPLIER
+        args = (self.strike[priced], years[priced])
+        base = (bs.price(self.spot[priced], *args, self.iv[priced], self.is_call[priced]) * units).sum()
+        shocked = (bs.price(S, *args, iv, self.is_call[priced]) * units).sum(axis=-1)
+        return shocked - base
+
+    def check_limits(self, net_liq, limits=RISK_LIMITS):
+        """قائمة المخالفات (فاضية = ضمن الحدود)"""
+        if net_liq <= 0 or not len(self):
+            return []
+        exp = self.exposures()
+        violations = []
+        for name in self.names:
+            dd = abs(exp[name]['dollar_delta'])
+            if dd > limits['dollar_delta'] * net_liq:
+                violations.append(f"{name} dollar delta ${dd:,.0f} > {limits['dollar_delta']:.0%} of net liq")
+        total = exp['total']
+        if abs(total['vega']) > limits['vega'] * net_liq:
+            violations.append(f"vega ${total['vega']:,.0f}/1% IV > {limits['vega']:.0%} of net liq")
+        if -total['theta'] > limits['theta'] * net_liq:
+            violations.append(f"theta ${total['theta']:,.0f}/day > {limits['theta']:.0%} of net liq")
+        worst = float(self.shock_grid().min())
+        if -worst > limits['shock_loss'] * net_liq:
+            violations.append(f"shock loss ${worst:,.0f} > {limits['shock_loss']:.0%} of net liq")
+        return violations
+
+    def summary(self, net_liq=0):
+        grid = self.shock_grid()
+        return {
+            'positions': len(self),
+            'unpriced': int(np.isnan(self.spot).sum()),
+            'exposures': self.exposures(),
+            'shock_grid': {
+                'spot': SPOT_SHOCKS.tolist(), 'iv': IV_SHOCKS.tolist(),
+                'pnl': np.round(grid, 2).tolist(),
+                'worst': round(float(grid.min()), 2),
+            },
+            'violations': self.check_limits(net_liq),
+        }
+
+
+def fetch_quotes(trades):
+    """snapshot كل الصفقات من Polygon (مع underlying_price) → {id: سجل مختصر أو None}
+    الصفقات بنفس (underlying, expiry) تنجاب بطلب واحد (نطاق strikes) بدل طلب لكل صفقة"""
+    groups = {}
+    for t in trades:
+        exp = str(t['expiry'])
+        exp_fmt = f"{exp[:4]}-{exp[4:6]}-{exp[6:8]}" if len(exp) == 8 else exp
+        groups.setdefault((t['symbol'], exp_fmt), []).append(t)
+
+    quotes = {}
+    for (symbol, exp_fmt), group in groups.items():
+        strikes = [float(t['strike']) for t in group]
+        try:
+            records = list(options_chain.iter_chain(symbol, {
+                'expiration_date': exp_fmt,
+                'strike_price.gte': min(strikes),
+                'strike_price.lte': max(strikes),
+            }))
+        except options_chain.ChainError as e:
+            print(f"⚠️ {symbol} {exp_fmt}: {e}")
+            records = []
+        by_contract = {(r['strike'], r['contract_type']): r for r in records}
+        for t in group:
+            side = 'call' if str(t['right']).upper().startswith('C') else 'put'
+            quotes[t.get('id')] = by_contract.get((float(t['strike']), side))
+    return quotes
+
+
+def position_from_trade(trade, quote=None):
+    quote = quote or {}
+    return {
+        'key': trade.get('id'),
+        'underlying': trade['symbol'],
+        'strike': trade['strike'],
+        'expiry': trade['expiry'],
+        'right': trade['right'],
+        'qty': trade.get('qty_remaining', trade.get('qty', 0)),
+        'spot': quote.get('underlying_price'),
+        'iv': quote.get('iv') or trade.get('entry_iv'),
+    }
+
+
+def from_trades(trades, quotes=None):
+    """Portfolio من صفقات trade_store — quotes: {id: سجل snapshot}، الناقص يتجاب من Polygon"""
+    quotes = dict(quotes or {})
+    quotes.update(fetch_quotes([t for t in trades if t.get('id') not in quotes]))
+    return Portfolio([position_from_trade(t, quotes[t.get('id')]) for t in trades])
+
+
+def check_new_position(trades, candidate, net_liq):
+    """هل المحفظة تبقى ضمن الحدود بعد إضافة candidate؟ (candidate بنفس شكل position_from_trade)
+    أي مركز (قديم أو الجديد) بدون سعر → مرفوض: تعرّضه مجهول والحدود ما تنفحص عليه"""
+    portfolio = from_trades(trades)
+    combined = portfolio.with_position(candidate)
+    violations = combined.check_limits(net_liq)
+    unpriced = combined.unpriced()
+    if unpriced:
+        violations.insert(0, f"no underlying price for {', '.join(unpriced)} — exposure unknown")
+    return {
+        'ok': not violations,
+        'violations': violations,
+        'before': portfolio.exposures()['total'],
+        'after': combined.exposures()['total'],
+    }
+
+
+if __name__ == "__main__":
+    import trade_store
+    net_liq = float(sys.argv[1]) if len(sys.argv) > 1 else 0
+    print(json.dumps(from_trades(trade_store.open_trades()).summary(net_liq), indent=2))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+💹 Quotes — صُحبة Trading
+أسعار yFinance بالدفعة — بدل yf.Ticker(...).fast_info لكل رمز
+- كل الرموز الناقصة تنجاب بـ yf.download واحد (multi-ticker)
+- memo لعمر الـ process: الرمز اللي انجاب ما يتعاد طلبه
+- yfinance / pandas يتحملون أول ما نحتاج طلب فعلاً — السكربت اللي ما يوصل للـ fallback ما يدفع وقت الـ import
+- prefetch(symbols): المستدعي يجمع رموزه مقدماً → طلب واحد بدل طلب لكل رمز
+- يمر على cassette.call (record / replay)، وبدون شبكة (replay من fixture) يرجع سعر 0
+
+استخدام:
+  python3 quotes.py SPY ^GSPC ^VIX
+"""
+import json
+import sys
+import threading
+from datetime import timezone
+from zoneinfo import ZoneInfo
+
+import cassette
+from market_client import live, now
+
+# === إعدادات ===
+PERIOD = '5d'  # كفاية لآخر شمعتين يوميتين (سعر + إغلاق سابق) حتى بعد إجازة طويلة
+MARKET_TZ = ZoneInfo('America/New_York')  # تاريخ الشمعة اليومية = تاريخ الجلسة بتوقيت نيويورك
+
+_memo = {}
+_lock = threading.Lock()
+
+
+def market_date():
+    """تاريخ اليوم بتوقيت نيويورك (أو وقت الـ replay)"""
+    return now().replace(tzinfo=timezone.utc).astimezone(MARKET_TZ).date()
+
+
+def _download(symbols):
+    """{رمز: {price, prev_close, high, low, open, session}} من yf.download واحد — الرمز الفاشل ما يرجع
+    قبل ما تنفتح جلسة اليوم (pre-market / VIX بالليل) آخر شمعة هي أمس:
+    السعر = إغلاق أمس و prev_close = نفسه (تغيير اليوم صفر) — مو حركة أمس كأنها اليوم"""
+    if not live():
+        return {}  # replay: ما فيه سعر مسجّل → بدون شبكة
+    try:
+        import yfinance as yf
+        frame = yf.download(symbols, period=PERIOD, interval='1d', group_by='ticker',
+                            auto_adjust=False, progress=False, threads=True)
+    except Exception:
+        return {}
+    today = market_date()
+    # yfinance قديم يرجّع أعمدة مسطحة (Close, High ...) لرمز واحد بدل MultiIndex بالرمز
+    flat = frame.columns.nlevels == 1
+    out = {}
+    for sym in symbols:
+        try:
+            bars = (frame if flat else frame[sym]).dropna(subset=['Close'])
+        except (KeyError, TypeError):
+            continue
+        if bars.empty:
+            continue
+        last = bars.iloc[-1]
+        session = bars.index[-1].date()
+        prev = bars.iloc[-2] if session == today and len(bars) > 1 else last
+        out[sym] = {
+            'price': float(last['Close']),
+            'prev_close': float(prev['Close']),
+            'high': float(last['High']),
+            'low': float(last['Low']),
+            'open': float(last['Open']),
+            'session': session.isoformat(),
+        }
+    return out
+
+
+def get_quotes(symbols):
+    """{رمز: quote} — الناقص من الـ memo ينجاب بطلب واحد، والفاشل يرجع {'price': 0, 'error': ...}"""
+    symbols = list(dict.fromkeys(symbols))
+    with _lock:
+        missing = sorted(s for s in symbols if s not in _memo)
+        if missing:
+            fetched = cassette.call('yfinance.quotes', missing, lambda: _download(missing)) or {}
+            for sym in missing:
+                _memo[sym] = fetched.get(sym) or {'price': 0, 'error': f'no yfinance quote for {sym}'}
+        return {s: _memo[s] for s in symbols}
+
+
+def get_quote(symbol):
+    return get_quotes([symbol])[symbol]
+
+
+def prefetch(symbols):
+    """تعبئة الـ memo بطلب واحد قبل ما يطلب كل رمز لحاله"""
+    if symbols:
+        get_quotes(symbols)
+
+
+def clear():
+    with _lock:
+        _memo.clear()
+
+
+if __name__ == "__main__":
+    print(json.dumps(get_quotes(sys.argv[1:] or ['SPY']), indent=2))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+🚦 Rate Limiter — صُحبة Trading
+Token bucket مشترك لكل (API key, عائلة endpoints)
+- الطلبات تمشي بأقصى سرعة تسمح بها الحصة بدل sleep ثابت
+- الحالة في ملف صغير محمي بـ flock → أكثر من cron job يشتركون بنفس الحصة
+"""
+import fcntl
+import hashlib
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+STATE_FILE = '/home/openclaw/.openclaw/workspace/.rate_limits.json'
+
+# (عدد الطلبات, خلال كم ثانية) لكل عائلة
+RATE_LIMITS = {
+    'polygon': (5, 60),
+    'uw': (120, 60),
+    'finviz': (30, 60),
+}
+
+# (host, بداية المسار, العائلة) — أول تطابق يفوز
+ENDPOINT_FAMILIES = [
+    ('api.polygon.io', '', 'polygon'),
+    ('api.unusualwhales.com', '', 'uw'),
+    ('elite.finviz.com', '', 'finviz'),
+]
+
+_thread_lock = threading.Lock()
+_memory_state = {}  # fallback لو ملف الحالة غير متاح
+
+
+def configure(family, calls, per):
+    """تعديل حصة عائلة: calls طلب كل per ثانية"""
+    RATE_LIMITS[family] = (calls, per)
+
+
+def family_for(url):
+    """عائلة الـ endpoint من الـ URL — None يعني بدون حد"""
+    parts = urlsplit(url)
+    for host, prefix, family in ENDPOINT_FAMILIES:
+        if parts.netloc == host and parts.path.startswith(prefix):
+            return family
+    return None
+
+
+def _bucket_name(family, key):
+    # ما نكتب المفتاح نفسه في الملف — بصمة قصيرة تكفي
+    key_id = hashlib.sha1(str(key).encode()).hexdigest()[:12] if key else 'default'
+    return f"{family}:{key_id}"
+
+
+def _take(state, bucket, calls, per, tokens, now):
+    """يحاول يسحب tokens من الـ bucket — يرجّع مدة الانتظار (0 = نجح)"""
+    rate = calls / per
+    b = state.get(bucket, {'tokens': calls, 'ts': now})
+    level = min(calls, b['tokens'] + (now - b['ts']) * rate)
+    if level >= tokens:
+        state[bucket] = {'tokens': level - tokens, 'ts': now}
+        return 0
+    return (tokens - level) / rate
+
+
+def _try_acquire(bucket, calls, per, tokens):
+    now = time.time()
+    try:
+        with open(STATE_FILE, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                state = json.loads(f.read() or '{}')
+            except ValueError:
+                state = {}
+            wait = _take(state, bucket, calls, per, tokens, now)
+            if wait == 0:
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                f.flush()
+            return wait
+    except OSError:
+        return _take(_memory_state, bucket, calls, per, tokens, now)
+
+
+def acquire(family, key='', tokens=1):
+    """ينتظر لين يتوفر token — يرجّع كم ثانية انتظر"""
+    limit = RATE_LIMITS.get(family)
+    if not limit:
+        return 0
+    calls, per = limit
+    bucket = _bucket_name(family, key)
+    waited = 0
+    while True:
+        with _thread_lock:
+            wait = _try_acquire(bucket, calls, per, tokens)
+        if wait == 0:
+            return waited
+        time.sleep(wait)
+        waited += wait
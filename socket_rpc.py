@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+🔗 Socket RPC — صُحبة Trading
+Unix socket محلي + بروتوكول JSON سطر بسطر — مشترك بين ib_daemon و market_worker
+- السيرفر: socket قديم (process مات) ينشال، وsocket حي = نسخة شغالة أصلاً → خروج
+- صلاحيات المالك بس على الـ socket (0600)
+- العميل: None لو الـ daemon مو شغال (ما انرسل شي — المستدعي يكمل بنفسه)
+  وبعد ما ينرسل الطلب أي فشل يرجع كخطأ (ما نعيد الإرسال)
+"""
+import json
+import os
+import socket
+import sys
+
+from lazy_import import lazy
+
+asyncio = lazy('asyncio')  # السيرفر بس — العملاء (سكربتات cron) ما يحتاجونه
+
+
+def encode(msg):
+    return (json.dumps(msg, ensure_ascii=False, default=str) + '\n').encode()
+
+
+# === السيرفر ===
+
+def remove_stale_socket(path, name):
+    """socket من process مات ينشال — لو فيه أحد يرد عليه نطلع (نسخة وحدة بس)"""
+    if not os.path.exists(path):
+        return
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.unlink(path)
+        return
+    finally:
+        sock.close()
+    print(f"❌ {name} شغال أصلاً على {path}")
+    sys.exit(1)
+
+
+async def start_server(path, handle_client):
+    """asyncio unix server — handle_client(reader, writer) لكل اتصال"""
+    server = await asyncio.start_unix_server(handle_client, path=path)
+    os.chmod(path, 0o600)
+    return server
+
+
+def remove_socket(path):
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+def sender(writer):
+    """send(msg) async لعميل واحد — سطر JSON لكل رسالة"""
+    async def send(msg):
+        writer.write(encode(msg))
+        await writer.drain()
+    return send
+
+
+# === العميل ===
+
+def connect(path, timeout):
+    """socket متصل بالـ daemon — None لو مو شغال"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except (FileNotFoundError, ConnectionRefusedError, socket.timeout):
+        sock.close()
+        return None
+    return sock
+
+
+def lines(sock):
+    """قارئ سطور الرد (utf-8 — الرسائل فيها عربي)"""
+    return sock.makefile('r', encoding='utf-8')
+
+
+def call(path, req, timeout, name):
+    """طلب واحد ورد واحد. None = الـ daemon مو شغال"""
+    sock = connect(path, timeout)
+    if sock is None:
+        return None
+    with sock:
+        try:
+            sock.sendall(encode(req))
+            line = lines(sock).readline()
+        except OSError as e:
+            return {'ok': False, 'error': f'{name}: {e}'}
+    if not line:
+        return {'ok': False, 'error': f'{name} closed connection'}
+    return json.loads(line)
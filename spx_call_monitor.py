@@ -1,29 +1,38 @@
 #!/usr/bin/env python3
 """
 📊 SPX 6900 Call Monitor — متابعة كل 5 دقائق
+Greeks من Polygon، ولو فاضية (0DTE) تنحسب محلياً من bid/ask + سعر SPX
 """
-import requests
 import json
 from datetime import datetime
 
-POLYGON_KEY = "[REDACTED:POLYGON_KEY]"
+import black_scholes as bs
+from market_client import polygon_get
+from options_chain import compact_contract
+
 SYMBOL = "O:SPXW260213C06900000"
+MODEL_DELTA_GAP = 0.05  # فرق delta بين Polygon والنموذج يستاهل تنبيه
 
 def get_option_quote():
     """Get latest option data from Polygon"""
     # Try snapshot
-    url = f"https://api.polygon.io/v3/snapshot/options/{SYMBOL}?apiKey={POLYGON_KEY}"
     try:
-        r = requests.get(url, timeout=10)
-        if r.status_code == 200:
-            data = r.json()
+        data = polygon_get(f"/v3/snapshot/options/{SYMBOL}")
+        if data:
             if 'results' in data:
                 res = data['results']
                 day = res.get('day', {})
                 greeks = res.get('greeks', {})
                 details = res.get('details', {})
                 underlying = res.get('underlying_asset', {})
-                
+
+                # نموذج محلي: يكمّل الناقص، ويتقارن مع Polygon لو موجود
+                model = {**compact_contract(res), 'delta': None, 'iv': None}
+                bs.fill_greeks([model])
+                from_model = greeks.get('delta') is None
+                if from_model:
+                    greeks = {g: model.get(g) for g in ('delta', 'gamma', 'theta', 'vega')}
+
                 return {
                     'last': day.get('close') or day.get('last_price'),
                     'open': day.get('open'),
@@ -32,25 +41,25 @@ def get_option_quote():
                     'volume': day.get('volume', 0),
                     'change': day.get('change'),
                     'change_pct': day.get('change_percent'),
-                    'iv': res.get('implied_volatility'),
+                    'iv': res.get('implied_volatility') or model.get('iv'),
+                    'model_delta': model.get('delta'),
+                    'greeks_model': from_model and model.get('delta') is not None,
                     'delta': greeks.get('delta'),
                     'gamma': greeks.get('gamma'),
                     'theta': greeks.get('theta'),
                     'vega': greeks.get('vega'),
                     'bid': res.get('last_quote', {}).get('bid'),
                     'ask': res.get('last_quote', {}).get('ask'),
-                    'spx_price': underlying.get('price') or underlying.get('last_updated_price'),
+                    'spx_price': underlying.get('price') or underlying.get('value') or underlying.get('last_updated_price'),
                     'strike': details.get('strike_price', 6900),
                 }
     except Exception as e:
         pass
     
     # Fallback: last trade
-    url2 = f"https://api.polygon.io/v3/trades/{SYMBOL}?limit=1&sort=timestamp&order=desc&apiKey={POLYGON_KEY}"
     try:
-        r2 = requests.get(url2, timeout=10)
-        if r2.status_code == 200:
-            data2 = r2.json()
+        data2 = polygon_get(f"/v3/trades/{SYMBOL}", {'limit': 1, 'sort': 'timestamp', 'order': 'desc'})
+        if data2:
             if data2.get('results'):
                 trade = data2['results'][0]
                 return {'last': trade.get('price'), 'volume': trade.get('size')}
@@ -91,7 +100,11 @@ def format_report(data):
         lines.append(f"📐 IV: {data['iv']*100:.1f}%")
     
     if data.get('delta'):
-        lines.append(f"🔧 Greeks: Δ{data['delta']:.3f} | Γ{data.get('gamma',0):.4f} | Θ{data.get('theta',0):.2f}")
+        source = " (محسوبة)" if data.get('greeks_model') else ""
+        lines.append(f"🔧 Greeks{source}: Δ{data['delta']:.3f} | Γ{data.get('gamma',0):.4f} | Θ{data.get('theta',0):.2f}")
+        model_delta = data.get('model_delta')
+        if not data.get('greeks_model') and model_delta is not None and abs(model_delta - data['delta']) > MODEL_DELTA_GAP:
+            lines.append(f"⚠️ Delta النموذج {model_delta:.3f} بعيد عن Polygon")
     
     return "\n".join(lines)
 
@@ -1,120 +1,180 @@
-import yfinance as yf
-import mplfinance as mpf
-import pandas as pd
-import numpy as np
-import matplotlib
-matplotlib.use('Agg')
-
-# Fetch S&P 500 Futures (ES=F)
-sp = yf.download("ES=F", period="5d", interval="15m", progress=False)
-if sp.empty:
-    sp = yf.download("ES=F", period="5d", interval="5m", progress=False)
-
-# Flatten multi-level columns
-if isinstance(sp.columns, pd.MultiIndex):
-    sp.columns = sp.columns.get_level_values(0)
-
-data = sp.tail(80).copy()
-last_close = float(data['Close'].iloc[-1])
-
-# --- RSI ---
-delta = data['Close'].diff()
-gain = delta.where(delta > 0, 0).rolling(14).mean()
-loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-rs = gain / loss
-data['RSI'] = 100 - (100 / (1 + rs))
-
-# --- MACD ---
-ema12 = data['Close'].ewm(span=12).mean()
-ema26 = data['Close'].ewm(span=26).mean()
-data['MACD'] = ema12 - ema26
-data['Signal'] = data['MACD'].ewm(span=9).mean()
-data['Hist'] = data['MACD'] - data['Signal']
+#!/usr/bin/env python3
+"""
+🕯️ SPX Chart — صُحبة Trading
+شارت ES=F (15m) مع MA20/MA50/VWAP + RSI + MACD ومستويات الدعم/المقاومة → spx_chart.png
+yfinance / pandas / matplotlib يتحملون أول ما نرسم بس
+- حالة المؤشرات تنحفظ في spx_chart_state.json (أو بذاكرة market_worker) → كل رسم يطبق الشموع الجديدة بس
+- الرسم عبر chart_renderer (figure مبني مسبقاً + طبقة ثابتة محفوظة)
+- لو market_worker شغال: هو يرسم من تاريخ محفوظ عنده (بدون تحميل 5 أيام كل مرة)
+
+استخدام:
+  python3 spx_chart.py [--preview]   — preview: DPI أقل → spx_chart_preview.png
+"""
+import bisect
+import json
+import os
+import sys
+
+import market_worker
+from lazy_import import lazy
+from streaming_indicators import IndicatorSet
+
+yf = lazy('yfinance')
+pd = lazy('pandas')
+
+# === إعدادات ===
+OUTPUT = '/home/openclaw/.openclaw/workspace/spx_chart.png'
+PREVIEW_OUTPUT = '/home/openclaw/.openclaw/workspace/spx_chart_preview.png'
+CHART_STATE = '/home/openclaw/.openclaw/workspace/spx_chart_state.json'
+SYMBOL = 'ES=F'
+BARS = 80
+DPI = 150
+PREVIEW_DPI = 60
 
 # Key levels
-high_52w = 7002.28
-resistance1 = 6945.0
-support1 = 6900.0
-support2 = 6817.0
-
-hlines = dict(
-    hlines=[high_52w, resistance1, support1, support2],
-    colors=['#ff4444', '#ff8800', '#00cc66', '#00cc66'],
-    linewidths=[2, 1.2, 1.2, 1],
-    linestyle=['--', '--', '--', '--']
+HIGH_52W = 7002.28
+RESISTANCE1 = 6945.0
+SUPPORT1 = 6900.0
+SUPPORT2 = 6817.0
+
+# (السعر, الملصق, اللون, عرض الخط)
+LEVELS = (
+    (HIGH_52W, f'ATH {HIGH_52W:,.2f}', '#ff4444', 2),
+    (RESISTANCE1, f'R1 {RESISTANCE1:,.0f}', '#ff8800', 1.2),
+    (SUPPORT1, f'S1 {SUPPORT1:,.0f}', '#00cc66', 1.2),
+    (SUPPORT2, f'S2 {SUPPORT2:,.0f}', '#00cc66', 1),
 )
 
-# Additional plots: MA20, MA50, RSI, MACD
-ma20 = data['Close'].rolling(20).mean()
-ma50 = data['Close'].rolling(50).mean()
-
-# RSI panel
-rsi_plot = mpf.make_addplot(data['RSI'], panel=2, color='#ab47bc', width=1.2, ylabel='RSI')
-rsi_70 = mpf.make_addplot(pd.Series(70, index=data.index), panel=2, color='#ff4444', width=0.5, linestyle='--')
-rsi_30 = mpf.make_addplot(pd.Series(30, index=data.index), panel=2, color='#00cc66', width=0.5, linestyle='--')
-
-# MACD panel
-macd_line = mpf.make_addplot(data['MACD'], panel=3, color='#2196F3', width=1.2, ylabel='MACD')
-signal_line = mpf.make_addplot(data['Signal'], panel=3, color='#FF9800', width=1)
-hist_colors = ['#26a69a' if v >= 0 else '#ef5350' for v in data['Hist'].fillna(0)]
-hist_plot = mpf.make_addplot(data['Hist'], panel=3, type='bar', color=hist_colors, width=0.7)
-
-# MA on main chart
-ma20_plot = mpf.make_addplot(ma20, color='#FFD700', width=1.2, linestyle='--')
-ma50_plot = mpf.make_addplot(ma50, color='#FF69B4', width=1.2, linestyle='--')
-
-ap = [ma20_plot, ma50_plot, rsi_plot, rsi_70, rsi_30, macd_line, signal_line, hist_plot]
-
-# Style
-mc = mpf.make_marketcolors(up='#26a69a', down='#ef5350', inherit=True)
-s = mpf.make_mpf_style(
-    marketcolors=mc, gridstyle=':', y_on_right=True,
-    facecolor='#131722', figcolor='#131722', edgecolor='#2a2e39',
-    rc={
-        'axes.labelcolor': '#d1d4dc',
-        'xtick.color': '#d1d4dc',
-        'ytick.color': '#d1d4dc',
-        'text.color': '#d1d4dc',
-    }
-)
-
-# Plot
-fig, axes = mpf.plot(
-    data,
-    type='candle',
-    volume=True,
-    style=s,
-    hlines=hlines,
-    addplot=ap,
-    figsize=(14, 10),
-    returnfig=True,
-    tight_layout=True,
-    panel_ratios=(4, 1.2, 1.2, 1.2),
-)
 
-# Title
-axes[0].set_title(f'\n  S&P 500 Futures (ES) — {last_close:,.2f}', color='white', fontsize=15, fontweight='bold', loc='left')
-
-# S/R Labels
-labels = [
-    (high_52w, f'ATH {high_52w:,.2f}', '#ff4444'),
-    (resistance1, f'R1 {resistance1:,.0f}', '#ff8800'),
-    (support1, f'S1 {support1:,.0f}', '#00cc66'),
-    (support2, f'S2 {support2:,.0f}', '#00cc66'),
-]
-for level, text, color in labels:
-    axes[0].text(0.98, level, f'{text} ', transform=axes[0].get_yaxis_transform(),
-                 color=color, fontsize=8.5, va='center', ha='right',
-                 bbox=dict(boxstyle='round,pad=0.2', facecolor='#131722', edgecolor=color, alpha=0.8))
-
-# Legend
-axes[0].text(0.02, 0.97, '— MA20  — MA50', transform=axes[0].transAxes,
-             color='#d1d4dc', fontsize=9, va='top',
-             bbox=dict(boxstyle='round,pad=0.3', facecolor='#131722', edgecolor='#2a2e39'))
-
-output = '/home/openclaw/.openclaw/workspace/spx_chart.png'
-fig.savefig(output, dpi=150, bbox_inches='tight', facecolor='#131722')
-print(f"Chart saved: {output}")
-print(f"Last price: {last_close:.2f}")
-print(f"RSI: {data['RSI'].iloc[-1]:.1f}")
-print(f"MACD: {data['MACD'].iloc[-1]:.2f} | Signal: {data['Signal'].iloc[-1]:.2f}")
+def fetch_history(period='5d'):
+    """شموع ES=F (15m، أو 5m لو الـ 15m فاضي) بأعمدة مسطحة"""
+    sp = yf.download(SYMBOL, period=period, interval="15m", progress=False)
+    if sp.empty:
+        sp = yf.download(SYMBOL, period=period, interval="5m", progress=False)
+
+    # Flatten multi-level columns
+    if isinstance(sp.columns, pd.MultiIndex):
+        sp.columns = sp.columns.get_level_values(0)
+    return sp
+
+
+def merge_history(old, new):
+    """الشموع الجديدة فوق المحفوظة — نفس الوقت ياخذ الأحدث (الشمعة الحالية تتحدث)"""
+    if old is None or old.empty:
+        return new
+    if new.empty:
+        return old
+    merged = pd.concat([old, new])
+    return merged[~merged.index.duplicated(keep='last')].sort_index()
+
+
+COLUMNS = ['RSI', 'MACD', 'Signal', 'Hist', 'MA20', 'MA50', 'VWAP']
+
+
+def _values(ind):
+    return [ind.rsi.value, ind.macd.value, ind.macd.signal.value, ind.macd.histogram,
+            ind.sma20.value, ind.sma50.value, ind.vwap.value]
+
+
+class ChartIndicators:
+    """IndicatorSet الشارت + قيم المؤشرات لآخر BARS شمعة مكتملة (t → COLUMNS)
+    كل رسم يطبق الشموع بعد last_t بس، والشمعة الأخيرة (لسا تتكون) على نسخة"""
+
+    def __init__(self, state=None, rows=None):
+        self.state = state or IndicatorSet(vwap=True)
+        self.rows = dict(rows or {})
+
+    @classmethod
+    def load(cls, path=CHART_STATE):
+        """فاضي لو الملف مو موجود أو تالف"""
+        try:
+            with open(path) as f:
+                raw = json.load(f)
+            return cls(IndicatorSet.from_dict(raw['indicators']), {int(t): v for t, v in raw['rows']})
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls()
+
+    def save(self, path=CHART_STATE):
+        tmp = f"{path}.tmp.{os.getpid()}"
+        with open(tmp, 'w') as f:
+            json.dump({'indicators': self.state.to_dict(), 'rows': sorted(self.rows.items())}, f)
+        os.replace(tmp, path)
+
+    def apply(self, sp, bars=BARS):
+        """sp + أعمدة COLUMNS لآخر bars شمعة — يرجّع (data, فيه شموع جديدة انطبقت؟)"""
+        times = [int(ts.timestamp() * 1000) for ts in sp.index]
+        last_t = self.state.last_t
+        if last_t is not None and last_t not in set(times):
+            # الإطار ما يكمّل الحالة (worker نايم أيام / بيانات ثانية) → بناء من الإطار كامل
+            self.state, self.rows, last_t = IndicatorSet(vwap=True), {}, None
+        start = bisect.bisect_right(times, last_t) if last_t is not None else 0
+        ohlcv = sp[['High', 'Low', 'Close', 'Volume']].itertuples(index=False)
+        live = None
+        for i, (t, bar) in enumerate(zip(times, ohlcv)):
+            if i < start:
+                continue
+            bar = {'t': t, 'h': float(bar.High), 'l': float(bar.Low), 'c': float(bar.Close), 'v': float(bar.Volume)}
+            if i == len(times) - 1:
+                live = bar
+                break
+            self.state.update(bar)
+            self.rows[t] = _values(self.state)
+        changed = self.state.last_t != last_t
+        for t in sorted(self.rows)[:-bars]:
+            del self.rows[t]
+
+        live_values = None
+        if live is not None:
+            tmp = IndicatorSet.from_dict(self.state.to_dict())
+            tmp.update(live)
+            live_values = _values(tmp)
+        empty = [None] * len(COLUMNS)
+        ind = pd.DataFrame([self.rows.get(t) or (live_values if t == times[-1] else None) or empty
+                            for t in times[-bars:]], index=sp.index[-bars:], columns=COLUMNS, dtype=float)
+        return sp.tail(bars).join(ind), changed
+
+
+def with_indicators(sp, bars=BARS, indicators=None):
+    """مؤشرات متراكمة (streaming_indicators) ثم آخر bars للعرض
+    نفس تعريفات spx_update (Wilder RSI + EMA يبدأ من SMA) وبدون فجوة تسخين أول الشارت
+    indicators: حالة محمّلة (market_worker يحتفظ فيها) — بدونها تنقرأ من CHART_STATE"""
+    indicators = indicators or ChartIndicators.load()
+    data, changed = indicators.apply(sp, bars)
+    if changed:
+        indicators.save()
+    return data
+
+
+def render(data, output=OUTPUT, dpi=DPI):
+    """يرسم data (من with_indicators) إلى output عبر chart_renderer (figure مبني مسبقاً) — يرجّع ملخص آخر شمعة"""
+    import chart_renderer
+    chart_renderer.get(dpi, LEVELS).render(data, output)
+    return summary(data, output)
+
+
+def summary(data, output=OUTPUT):
+    last = data.iloc[-1]
+    return {'path': output, 'last_price': float(last['Close']), 'rsi': float(last['RSI']),
+            'macd': float(last['MACD']), 'signal': float(last['Signal'])}
+
+
+def main():
+    preview = '--preview' in sys.argv
+    resp = market_worker.call({'cmd': 'chart', 'preview': preview})
+    if resp is not None and not resp.get('ok'):
+        print(f"⚠️ market_worker: {resp.get('error')} — رسم محلي")
+        resp = None
+    if resp is not None:
+        result = resp['data']
+    elif preview:
+        result = render(with_indicators(fetch_history()), PREVIEW_OUTPUT, PREVIEW_DPI)
+    else:
+        result = render(with_indicators(fetch_history()))
+    print(f"Chart saved: {result['path']}")
+    print(f"Last price: {result['last_price']:.2f}")
+    print(f"RSI: {result['rsi']:.1f}")
+    print(f"MACD: {result['macd']:.2f} | Signal: {result['signal']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,30 @@
 #!/usr/bin/env python3
 """
-📈 SPX Update v2.0 — صُحبة Trading
-يستخدم Polygon minute aggs + Technical Indicators API
+📈 SPX Update v2.1 — صُحبة Trading
+يستخدم Polygon minute aggs + مؤشرات محلية متراكمة (streaming_indicators)
+- الشموع تنخزن في bar_store — كل تشغيل يجيب الجديد بس
+- حالة المؤشرات تنحفظ في spx_indicator_state.json → كل شمعة جديدة O(1)
 yFinance كـ fallback
+- لو market_worker شغال: الرد جاهز من ذاكرته (ms) بدل تشغيل بارد
 """
-import requests
 import json
+import sys
 from datetime import datetime, timezone, timedelta
 
-POLYGON_KEY = '[REDACTED:POLYGON_KEY]'
-POLYGON_BASE = 'https://api.polygon.io'
-TIMEOUT = 15
+import market_worker
+import quotes
+from lazy_import import lazy
+from market_client import polygon_get
+from streaming_indicators import IndicatorSet, load_state, save_state
 
-riyadh = timezone(timedelta(hours=3))
-now = datetime.now(riyadh)
+bar_store = lazy('bar_store')  # numpy — بس لما نحدّث الشموع
 
+# === إعدادات ===
+INDICATOR_STATE = '/home/openclaw/.openclaw/workspace/spx_indicator_state.json'
+INDICATOR_SYMBOL = 'SPY'
+INDICATOR_LOOKBACK_DAYS = 400  # أول تشغيل فقط — يكفي لتسخين MACD/SMA50
 
-def polygon_get(path, params=None):
-    if params is None:
-        params = {}
-    params['apiKey'] = POLYGON_KEY
-    try:
-        resp = requests.get(f"{POLYGON_BASE}{path}", params=params, timeout=TIMEOUT)
-        if resp.status_code == 200:
-            return resp.json()
-    except:
-        pass
-    return None
+riyadh = timezone(timedelta(hours=3))
 
 
 def get_spx_from_polygon():
@@ -63,138 +61,146 @@ def get_spx_from_polygon():
 
 
 def get_indicators():
-    """مؤشرات فنية لـ SPY من Polygon API مباشرة"""
-    indicators = {}
+    """مؤشرات فنية يومية لـ SPY — محسوبة محلياً من الحالة المحفوظة
+    الشموع المكتملة الجديدة تتطبق على الحالة (O(1) لكل شمعة)،
+    وشمعة اليوم غير المكتملة تنضاف على نسخة بس عشان ما تلوث الحالة"""
+    state = load_state(INDICATOR_STATE)
+    daily = state.get(INDICATOR_SYMBOL) or IndicatorSet()
 
-    # RSI
-    data = polygon_get('/v1/indicators/rsi/SPY', {'timespan': 'day', 'limit': 3, 'window': 14})
-    if data and data.get('results', {}).get('values'):
-        indicators['rsi'] = round(data['results']['values'][0]['value'], 1)
+    try:
+        live = bar_store.update_from_polygon(INDICATOR_SYMBOL, 'day', lookback_days=INDICATOR_LOOKBACK_DAYS)
+    except Exception:
+        live = []
 
-    # EMA 9
-    data = polygon_get('/v1/indicators/ema/SPY', {'timespan': 'day', 'window': 9, 'limit': 3})
-    if data and data.get('results', {}).get('values'):
-        indicators['ema9'] = round(data['results']['values'][0]['value'], 2)
+    new_bars = bar_store.query(INDICATOR_SYMBOL, 'day', start=daily.last_t + 1) if daily.last_t else \
+        bar_store.load(INDICATOR_SYMBOL, 'day')
+    if len(new_bars):
+        for bar in bar_store.to_dicts(new_bars):
+            daily.update(bar)
+        state[INDICATOR_SYMBOL] = daily
+        save_state(INDICATOR_STATE, state)
 
-    # EMA 21
-    data = polygon_get('/v1/indicators/ema/SPY', {'timespan': 'day', 'window': 21, 'limit': 3})
-    if data and data.get('results', {}).get('values'):
-        indicators['ema21'] = round(data['results']['values'][0]['value'], 2)
+    return daily.peek(live)
 
-    # MACD
-    data = polygon_get('/v1/indicators/macd/SPY', {'timespan': 'day', 'limit': 3})
-    if data and data.get('results', {}).get('values'):
-        macd_val = data['results']['values'][0]
-        indicators['macd'] = round(macd_val.get('value', 0), 4)
-        indicators['macd_signal'] = round(macd_val.get('signal', 0), 4)
-        indicators['macd_histogram'] = round(macd_val.get('histogram', 0), 4)
 
-    return indicators
+YF_SYMBOLS = ['SPY', '^GSPC', '^VIX']  # كلها بطلب yFinance واحد (quotes)
 
 
 def get_yfinance_fallback():
-    """yFinance كـ fallback"""
-    try:
-        import yfinance as yf
-        spy = yf.Ticker('SPY')
-        si = spy.fast_info
-        try:
-            spx = yf.Ticker('^GSPC')
-            xi = spx.fast_info
-            return {
-                'price': xi.last_price, 'prev': xi.previous_close,
-                'high': xi.day_high, 'low': xi.day_low, 'open': xi.open,
-                'spy': si.last_price, 'source': 'yfinance_spx',
-            }
-        except:
-            ratio = 10.028
-            return {
-                'price': si.last_price * ratio, 'prev': si.previous_close * ratio,
-                'high': si.day_high * ratio, 'low': si.day_low * ratio,
-                'open': si.open * ratio,
-                'spy': si.last_price, 'source': 'yfinance_spy_converted',
-            }
-    except Exception as e:
-        return {'error': str(e)}
-
-
-# === Main ===
-result = {}
-
-# محاولة Polygon أولاً
-polygon_data = get_spx_from_polygon()
-indicators = get_indicators()
-
-if polygon_data:
-    spy_price = polygon_data['spy_price']
-    ratio = 10.028  # SPX/SPY تقريبي
-
-    # نحاول نجيب SPX مباشرة من yFinance للسعر الدقيق
-    yf_data = get_yfinance_fallback()
-    if yf_data and 'price' in yf_data:
+    """yFinance كـ fallback — SPX مباشرة، أو SPY × النسبة لو ^GSPC ما رجع"""
+    q = quotes.get_quotes(YF_SYMBOLS)
+    spy, spx = q['SPY'], q['^GSPC']
+    if spx.get('price'):
+        return {
+            'price': spx['price'], 'prev': spx['prev_close'],
+            'high': spx['high'], 'low': spx['low'], 'open': spx['open'],
+            'spy': spy.get('price', 0), 'source': 'yfinance_spx',
+        }
+    if spy.get('price'):
+        ratio = 10.028
+        return {
+            'price': spy['price'] * ratio, 'prev': spy['prev_close'] * ratio,
+            'high': spy['high'] * ratio, 'low': spy['low'] * ratio,
+            'open': spy['open'] * ratio,
+            'spy': spy['price'], 'source': 'yfinance_spy_converted',
+        }
+    return {'error': spy.get('error', 'yfinance unavailable')}
+
+
+def get_vix():
+    vix = quotes.get_quotes(YF_SYMBOLS)['^VIX']
+    if not vix.get('price') or not vix.get('prev_close'):
+        return "غير متاح"
+    vix_chg = ((vix['price'] - vix['prev_close']) / vix['prev_close']) * 100
+    return f"{vix['price']:.2f} ({vix_chg:+.2f}%)"
+
+
+def build_update():
+    """سطر التحديث كـ dict — {'error': ...} لو ما فيه ولا مصدر
+    (market_worker يستدعيها ويخزن النتيجة، والتشغيل المباشر يطبعها)"""
+    # محاولة Polygon أولاً
+    polygon_data = get_spx_from_polygon()
+    indicators = get_indicators()
+
+    if polygon_data:
+        spy_price = polygon_data['spy_price']
+        ratio = 10.028  # SPX/SPY تقريبي
+
+        # نحاول نجيب SPX مباشرة من yFinance للسعر الدقيق
+        yf_data = get_yfinance_fallback()
+        if yf_data and 'price' in yf_data:
+            price = yf_data['price']
+            prev = yf_data['prev']
+            high = yf_data['high']
+            low = yf_data['low']
+            opn = yf_data['open']
+        else:
+            price = spy_price * ratio
+            prev = polygon_data.get('spy_open', spy_price) * ratio  # تقريب
+            high = polygon_data['spy_high'] * ratio
+            low = polygon_data['spy_low'] * ratio
+            opn = polygon_data['spy_open'] * ratio
+    else:
+        # Fallback كامل لـ yFinance
+        yf_data = get_yfinance_fallback()
+        if 'error' in yf_data:
+            return {"error": yf_data['error']}
         price = yf_data['price']
         prev = yf_data['prev']
         high = yf_data['high']
         low = yf_data['low']
         opn = yf_data['open']
+        spy_price = yf_data.get('spy', 0)
+
+    chg = price - prev
+    pct = (chg / prev) * 100 if prev else 0
+
+    # VIX
+    vix_str = get_vix()
+
+    # Direction
+    if pct > 0.3:
+        direction = "🟢🟢"
+    elif pct > 0:
+        direction = "🟢"
+    elif pct > -0.3:
+        direction = "🔴"
+    else:
+        direction = "🔴🔴"
+
+    output = {
+        "price": round(price, 2),
+        "prev": round(prev, 2),
+        "change": round(chg, 2),
+        "change_pct": round(pct, 2),
+        "high": round(high, 2),
+        "low": round(low, 2),
+        "open": round(opn, 2),
+        "vix": vix_str,
+        "direction": direction,
+        "time": datetime.now(riyadh).strftime("%I:%M %p"),
+        "spy": round(spy_price, 2) if spy_price else 0,
+        # === مؤشرات فنية (محسوبة محلياً من حالة متراكمة) ===
+        "indicators": indicators,
+        "source": polygon_data.get('source', 'yfinance') if polygon_data else 'yfinance',
+    }
+
+    return output
+
+
+def main():
+    # الـ worker المقيم لو شغال (رد من الذاكرة)، وإلا (مو شغال / فشل) نحسب هنا
+    resp = market_worker.call({'cmd': 'spx'})
+    if resp is not None and resp.get('ok'):
+        output = resp['data']
     else:
-        price = spy_price * ratio
-        prev = polygon_data.get('spy_open', spy_price) * ratio  # تقريب
-        high = polygon_data['spy_high'] * ratio
-        low = polygon_data['spy_low'] * ratio
-        opn = polygon_data['spy_open'] * ratio
-else:
-    # Fallback كامل لـ yFinance
-    yf_data = get_yfinance_fallback()
-    if 'error' in yf_data:
-        print(json.dumps({"error": yf_data['error']}, ensure_ascii=False))
-        exit(1)
-    price = yf_data['price']
-    prev = yf_data['prev']
-    high = yf_data['high']
-    low = yf_data['low']
-    opn = yf_data['open']
-    spy_price = yf_data.get('spy', 0)
-
-chg = price - prev
-pct = (chg / prev) * 100 if prev else 0
-
-# VIX
-try:
-    import yfinance as yf
-    vix = yf.Ticker('^VIX')
-    vix_price = vix.fast_info.last_price
-    vix_prev = vix.fast_info.previous_close
-    vix_chg = ((vix_price - vix_prev) / vix_prev) * 100
-    vix_str = f"{vix_price:.2f} ({vix_chg:+.2f}%)"
-except:
-    vix_str = "غير متاح"
-
-# Direction
-if pct > 0.3:
-    direction = "🟢🟢"
-elif pct > 0:
-    direction = "🟢"
-elif pct > -0.3:
-    direction = "🔴"
-else:
-    direction = "🔴🔴"
-
-output = {
-    "price": round(price, 2),
-    "prev": round(prev, 2),
-    "change": round(chg, 2),
-    "change_pct": round(pct, 2),
-    "high": round(high, 2),
-    "low": round(low, 2),
-    "open": round(opn, 2),
-    "vix": vix_str,
-    "direction": direction,
-    "time": now.strftime("%I:%M %p"),
-    "spy": round(spy_price, 2) if spy_price else 0,
-    # === مؤشرات فنية من Polygon (جديد!) ===
-    "indicators": indicators,
-    "source": polygon_data.get('source', 'yfinance') if polygon_data else 'yfinance',
-}
-
-print(json.dumps(output, ensure_ascii=False))
+        if resp is not None:
+            print(f"⚠️ market_worker: {resp.get('error')} — حساب محلي", file=sys.stderr)
+        output = build_update()
+    print(json.dumps(output, ensure_ascii=False))
+    if 'error' in output:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
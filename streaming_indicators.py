@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+⚡ Streaming Indicators — صُحبة Trading
+مؤشرات تتحدث شمعة بشمعة بوقت ثابت O(1) بدل إعادة الحساب على كل التاريخ
+- EMA / SMA / Wilder RSI / MACD / VWAP
+- نفس تعريفات indicators.py (EMA يبدأ من SMA أول نافذة) → نفس النتائج
+- الحالة تنحفظ JSON وتنقرأ في التشغيل التالي
+"""
+import json
+import os
+from collections import deque
+from datetime import datetime, timezone
+
+
+class EMA:
+    def __init__(self, span):
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+        self.value = None
+        self._seed = []
+
+    def update(self, x):
+        if self.value is None:
+            self._seed.append(x)
+            if len(self._seed) == self.span:
+                self.value = sum(self._seed) / self.span
+                self._seed = []
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+    def to_dict(self):
+        return {'span': self.span, 'value': self.value, 'seed': self._seed}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls(d['span'])
+        obj.value = d['value']
+        obj._seed = list(d['seed'])
+        return obj
+
+
+class SMA:
+    def __init__(self, window):
+        self.window = window
+        self._values = deque(maxlen=window)
+        self._sum = 0.0
+
+    @property
+    def value(self):
+        return self._sum / self.window if len(self._values) == self.window else None
+
+    def update(self, x):
+        if len(self._values) == self.window:
+            self._sum -= self._values[0]
+        self._values.append(x)
+        self._sum += x
+        return self.value
+
+    def to_dict(self):
+        return {'window': self.window, 'values': list(self._values)}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls(d['window'])
+        for x in d['values']:
+            obj.update(x)
+        return obj
+
+
+class WilderRSI:
+    def __init__(self, window=14):
+        self.window = window
+        self.prev = None
+        self.avg_gain = None
+        self.avg_loss = None
+        self._gains = []
+        self._losses = []
+
+    @property
+    def value(self):
+        if self.avg_gain is None:
+            return None
+        if self.avg_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+
+    def update(self, close):
+        if self.prev is not None:
+            diff = close - self.prev
+            gain, loss = max(diff, 0.0), max(-diff, 0.0)
+            if self.avg_gain is None:
+                self._gains.append(gain)
+                self._losses.append(loss)
+                if len(self._gains) == self.window:
+                    self.avg_gain = sum(self._gains) / self.window
+                    self.avg_loss = sum(self._losses) / self.window
+                    self._gains, self._losses = [], []
+            else:
+                self.avg_gain += (gain - self.avg_gain) / self.window
+                self.avg_loss += (loss - self.avg_loss) / self.window
+        self.prev = close
+        return self.value
+
+    def to_dict(self):
+        return {'window': self.window, 'prev': self.prev, 'avg_gain': self.avg_gain,
+                'avg_loss': self.avg_loss, 'gains': self._gains, 'losses': self._losses}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls(d['window'])
+        obj.prev, obj.avg_gain, obj.avg_loss = d['prev'], d['avg_gain'], d['avg_loss']
+        obj._gains, obj._losses = list(d['gains']), list(d['losses'])
+        return obj
+
+
+class MACD:
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+
+    @property
+    def value(self):
+        if self.fast.value is None or self.slow.value is None:
+            return None
+        return self.fast.value - self.slow.value
+
+    @property
+    def histogram(self):
+        if self.value is None or self.signal.value is None:
+            return None
+        return self.value - self.signal.value
+
+    def update(self, close):
+        self.fast.update(close)
+        self.slow.update(close)
+        if self.value is not None:
+            self.signal.update(self.value)
+        return self.value
+
+    def to_dict(self):
+        return {'fast': self.fast.to_dict(), 'slow': self.slow.to_dict(), 'signal': self.signal.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls()
+        obj.fast = EMA.from_dict(d['fast'])
+        obj.slow = EMA.from_dict(d['slow'])
+        obj.signal = EMA.from_dict(d['signal'])
+        return obj
+
+
+class VWAP:
+    """VWAP للجلسة — يتصفر مع بداية يوم جديد (UTC)"""
+
+    def __init__(self):
+        self.session = None
+        self._pv = 0.0
+        self._v = 0.0
+
+    @property
+    def value(self):
+        return self._pv / self._v if self._v else None
+
+    def update(self, bar):
+        session = datetime.fromtimestamp(bar['t'] / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+        if session != self.session:
+            self.session, self._pv, self._v = session, 0.0, 0.0
+        volume = float(bar.get('v') or 0)
+        price = bar.get('vw')
+        if not price or price != price:  # vw ناقص أو NaN (شموع CSV) → السعر النموذجي
+            price = (bar['h'] + bar['l'] + bar['c']) / 3
+        self._pv += float(price) * volume
+        self._v += volume
+        return self.value
+
+    def to_dict(self):
+        return {'session': self.session, 'pv': self._pv, 'v': self._v}
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls()
+        obj.session, obj._pv, obj._v = d['session'], d['pv'], d['v']
+        return obj
+
+
+class IndicatorSet:
+    """كل مؤشرات رمز واحد + آخر شمعة انطبقت — الشموع الأقدم تنتجاهل"""
+
+    def __init__(self, vwap=False):
+        self.last_t = None
+        self.rsi = WilderRSI(14)
+        self.ema9 = EMA(9)
+        self.ema21 = EMA(21)
+        self.macd = MACD()
+        self.sma20 = SMA(20)
+        self.sma50 = SMA(50)
+        self.vwap = VWAP() if vwap else None
+
+    def update(self, bar):
+        """شمعة مكتملة وحدة (dict فيه t/h/l/c/v) — ترجع False لو قديمة"""
+        if self.last_t is not None and bar['t'] <= self.last_t:
+            return False
+        close = bar['c']
+        for ind in (self.rsi, self.ema9, self.ema21, self.macd, self.sma20, self.sma50):
+            ind.update(close)
+        if self.vwap is not None:
+            self.vwap.update(bar)
+        self.last_t = bar['t']
+        return True
+
+    def peek(self, bars):
+        """القيم لو انضافت شموع غير مكتملة — بدون ما تتغير الحالة المحفوظة"""
+        tmp = IndicatorSet.from_dict(self.to_dict())
+        for bar in bars:
+            tmp.update(bar)
+        return tmp.values()
+
+    def values(self):
+        out = {}
+        if self.rsi.value is not None:
+            out['rsi'] = round(self.rsi.value, 1)
+        for name in ('ema9', 'ema21', 'sma20', 'sma50'):
+            val = getattr(self, name).value
+            if val is not None:
+                out[name] = round(val, 2)
+        if self.macd.histogram is not None:
+            out['macd'] = round(self.macd.value, 4)
+            out['macd_signal'] = round(self.macd.signal.value, 4)
+            out['macd_histogram'] = round(self.macd.histogram, 4)
+        if self.vwap is not None and self.vwap.value is not None:
+            out['vwap'] = round(self.vwap.value, 2)
+        return out
+
+    def to_dict(self):
+        d = {'last_t': self.last_t}
+        for name in ('rsi', 'ema9', 'ema21', 'macd', 'sma20', 'sma50'):
+            d[name] = getattr(self, name).to_dict()
+        d['vwap'] = self.vwap.to_dict() if self.vwap is not None else None
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls(vwap=d.get('vwap') is not None)
+        obj.last_t = d['last_t']
+        obj.rsi = WilderRSI.from_dict(d['rsi'])
+        obj.ema9 = EMA.from_dict(d['ema9'])
+        obj.ema21 = EMA.from_dict(d['ema21'])
+        obj.macd = MACD.from_dict(d['macd'])
+        obj.sma20 = SMA.from_dict(d['sma20'])
+        obj.sma50 = SMA.from_dict(d['sma50'])
+        if d.get('vwap') is not None:
+            obj.vwap = VWAP.from_dict(d['vwap'])
+        return obj
+
+
+def load_state(path):
+    """{key: IndicatorSet} من ملف JSON — فاضي لو الملف مو موجود أو تالف"""
+    try:
+        with open(path) as f:
+            raw = json.load(f)
+        return {key: IndicatorSet.from_dict(d) for key, d in raw.items()}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def save_state(path, state):
+    """كتابة ذرية (tmp + rename) عشان cron متزامن ما يقرأ ملف نصه مكتوب"""
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, 'w') as f:
+        json.dump({key: s.to_dict() for key, s in state.items()}, f)
+    os.replace(tmp, path)
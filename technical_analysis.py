@@ -1,90 +1,79 @@
 #!/usr/bin/env python3
 """
 📊 نظام التحليل الفني — صُحبة Trading v2.0
-يستخدم Polygon.io API للمؤشرات الفنية + Options Snapshot
+يستخدم Polygon.io API للشموع اليومية + Options Snapshot
+المؤشرات الفنية (RSI/EMA/MACD) تنحسب محلياً من الشموع — indicators.py
 yFinance كـ fallback لسعر السهم
+وضع universe: كل أسهم Finviz + UW (أو ملف مكونات مؤشر) من شموع Polygon grouped daily
+— طلب واحد لكل يوم لكل السوق، والمؤشرات والنقاط لكل الأسهم بتمريرة vectorized وحدة
+— الكاش البارد يدفى تدريجياً (UNIVERSE_FETCH_PER_RUN يوم لكل تشغيل)، أو مرة وحدة: bar_store.py grouped 120
+
+استخدام:
+  python3 technical_analysis.py [SYMBOL ...]                       — تحليل كامل (مع Options) لأسهم محددة
+  python3 technical_analysis.py --universe [file|all] [--top N]    — جدول مرتب لكل الـ universe
 """
-import requests
-import numpy as np
+import argparse
+import csv
 import json
 import sys
 import time
 from datetime import datetime, timedelta
 
-# === إعدادات ===
-POLYGON_KEY = '[REDACTED:POLYGON_KEY]'
-POLYGON_BASE = 'https://api.polygon.io'
-TIMEOUT = 15
+import quotes
+from lazy_import import lazy
 
+# numpy وما يعتمد عليه يتحمل أول ما نحسب — مو وقت الـ import
+np = lazy('numpy')
+bar_store = lazy('bar_store')
+indicators = lazy('indicators')
+options_chain = lazy('options_chain')
 
-def polygon_get(path, params=None):
-    """طلب من Polygon API"""
-    if params is None:
-        params = {}
-    params['apiKey'] = POLYGON_KEY
-    url = f"{POLYGON_BASE}{path}"
-    resp = requests.get(url, params=params, timeout=TIMEOUT)
-    if resp.status_code == 200:
-        return resp.json()
-    return None
+# === إعدادات ===
+INDICATOR_BARS = 120  # شموع يومية كافية لتقارب EMA26 / MACD
+SR_BARS = 20
+SR_NEAR_PCT = 0.5  # قرب من الدعم/المقاومة (%)
+
+UNIVERSE_FILE = '/home/openclaw/.openclaw/workspace/universe_analysis.json'
+UNIVERSE_MIN_PRICE = 5        # وضع all: أسهم أرخص من كذا تتخطى
+UNIVERSE_MIN_DOLLAR_VOL = 20e6  # وضع all: متوسط تداول يومي بالدولار (آخر SR_BARS يوم)
+UNIVERSE_FETCH_PER_RUN = 10     # أقصى أيام grouped ناقصة تنجاب بتشغيل واحد (~2 دقيقة بحصة polygon)
 
 
 def get_price_yfinance(symbol):
-    """سعر السهم من yFinance (fallback)"""
-    try:
-        import yfinance as yf
-        tk = yf.Ticker(symbol)
-        info = tk.fast_info
-        return {
-            'price': info.last_price,
-            'prev_close': info.previous_close,
-            'high': info.day_high,
-            'low': info.day_low,
-            'open': info.open,
-        }
-    except Exception as e:
-        return {'price': 0, 'error': str(e)}
-
-
-def get_technical_indicators(symbol):
-    """مؤشرات فنية من Polygon API مباشرة: RSI, EMA9, EMA21, MACD
-    ملاحظة: Polygon يحد 5 طلبات/دقيقة — نضيف delay بين الطلبات"""
-    indicators = {}
-
-    # نجمع كل الطلبات مع delay بسيط لتجنب rate limit (5 req/min)
-    calls = [
-        ('rsi', f'/v1/indicators/rsi/{symbol}', {'timespan': 'day', 'limit': 5, 'window': 14}),
-        ('ema9', f'/v1/indicators/ema/{symbol}', {'timespan': 'day', 'window': 9, 'limit': 5}),
-        ('ema21', f'/v1/indicators/ema/{symbol}', {'timespan': 'day', 'window': 21, 'limit': 5}),
-        ('macd', f'/v1/indicators/macd/{symbol}', {'timespan': 'day', 'limit': 5}),
-    ]
-
-    for name, path, params in calls:
-        data = polygon_get(path, params)
-        if data and data.get('results', {}).get('values'):
-            val = data['results']['values'][0]
-            if name == 'rsi':
-                indicators['rsi'] = round(val['value'], 1)
-            elif name in ('ema9', 'ema21'):
-                indicators[name] = round(val['value'], 2)
-            elif name == 'macd':
-                indicators['macd'] = round(val.get('value', 0), 4)
-                indicators['macd_signal'] = round(val.get('signal', 0), 4)
-                indicators['macd_histogram'] = round(val.get('histogram', 0), 4)
-        time.sleep(13)  # 5 req/min limit → ~12s بين الطلبات
-
-    return indicators
+    """سعر السهم من yFinance (fallback) — عبر quotes (memo + دفعة وحدة لو انعمل prefetch)"""
+    return quotes.get_quote(symbol)
+
+
+def get_technical_indicators(bars_by_symbol):
+    """مؤشرات فنية محسوبة محلياً من الشموع اليومية: RSI, EMA9, EMA21, MACD
+    كل الأسهم تنحسب بتمريرة وحدة — بدون أي طلب لـ Polygon indicators API"""
+    symbols = list(bars_by_symbol)
+    closes = indicators.stack_closes([[b['c'] for b in bars_by_symbol[s]] for s in symbols])
+    if closes.size == 0:
+        return {s: {} for s in symbols}
+    values = indicators.latest(closes)
+
+    result = {}
+    for i, sym in enumerate(symbols):
+        ind = {}
+        if not np.isnan(values['rsi'][i]):
+            ind['rsi'] = round(float(values['rsi'][i]), 1)
+        for name in ('ema9', 'ema21'):
+            if not np.isnan(values[name][i]):
+                ind[name] = round(float(values[name][i]), 2)
+        if not np.isnan(values['macd_histogram'][i]):
+            for name in ('macd', 'macd_signal', 'macd_histogram'):
+                ind[name] = round(float(values[name][i]), 4)
+        result[sym] = ind
+    return result
 
 
 def get_daily_aggs(symbol, days=20):
-    """بيانات يومية من Polygon لحساب Support/Resistance و VWAP"""
-    end = datetime.now().strftime('%Y-%m-%d')
-    start = (datetime.now() - timedelta(days=days + 5)).strftime('%Y-%m-%d')
-    data = polygon_get(f'/v2/aggs/ticker/{symbol}/range/1/day/{start}/{end}',
-                       {'adjusted': 'true', 'sort': 'asc', 'limit': days})
-    if data and data.get('results'):
-        return data['results']
-    return []
+    """بيانات يومية — للمؤشرات و Support/Resistance و VWAP
+    المكتمل من bar_store المحلي، ومن Polygon بس الشموع الأحدث من آخر شمعة مخزنة"""
+    live = bar_store.update_from_polygon(symbol, 'day', lookback_days=bar_store.calendar_days(days))
+    stored = bar_store.to_dicts(bar_store.load(symbol, 'day')[-days:])
+    return (stored + live)[-days:]
 
 
 def get_options_snapshot(symbol, price):
@@ -98,37 +87,37 @@ def get_options_snapshot(symbol, price):
     options_data = {'calls': [], 'puts': []}
 
     for contract_type in ['call', 'put']:
-        data = polygon_get(f'/v3/snapshot/options/{symbol}', {
+        chain = options_chain.iter_chain(symbol, {
             'strike_price.gte': strike_min,
             'strike_price.lte': strike_max,
             'expiration_date.gte': exp_min,
             'expiration_date.lte': exp_max,
             'contract_type': contract_type,
-            'limit': 10,
             'order': 'asc',
             'sort': 'strike_price',
         })
-        if data and data.get('results'):
-            for opt in data['results']:
-                details = opt.get('details', {})
-                greeks = opt.get('greeks', {})
-                day = opt.get('day', {})
-                last_quote = opt.get('last_quote', {})
-                options_data[contract_type + 's'].append({
-                    'strike': details.get('strike_price'),
-                    'expiry': details.get('expiration_date'),
-                    'contract_type': contract_type,
-                    'delta': round(greeks.get('delta', 0), 4),
-                    'gamma': round(greeks.get('gamma', 0), 4),
-                    'theta': round(greeks.get('theta', 0), 4),
-                    'vega': round(greeks.get('vega', 0), 4),
-                    'iv': round(opt.get('implied_volatility', 0), 4),
-                    'oi': day.get('open_interest', 0),
-                    'volume': day.get('volume', 0),
-                    'bid': last_quote.get('bid', 0),
-                    'ask': last_quote.get('ask', 0),
-                    'mid': round((last_quote.get('bid', 0) + last_quote.get('ask', 0)) / 2, 2) if last_quote.get('bid') and last_quote.get('ask') else 0,
-                })
+        try:
+            records = list(chain)
+        except options_chain.ChainError as e:
+            print(f"  ⚠️ {e}")  # ATM من سلسلة ناقصة ممكن يكون غلط — الجهة تبقى فاضية
+            continue
+        for c in records:
+            bid, ask = c['bid'], c['ask']
+            options_data[contract_type + 's'].append({
+                'strike': c['strike'],
+                'expiry': c['expiry'],
+                'contract_type': contract_type,
+                'delta': round(c['delta'] or 0, 4),
+                'gamma': round(c['gamma'] or 0, 4),
+                'theta': round(c['theta'] or 0, 4),
+                'vega': round(c['vega'] or 0, 4),
+                'iv': round(c['iv'] or 0, 4),
+                'oi': c['oi'],
+                'volume': c['volume'],
+                'bid': bid,
+                'ask': ask,
+                'mid': round((bid + ask) / 2, 2) if bid and ask else 0,
+            })
 
     return options_data
 
@@ -147,8 +136,27 @@ def find_support_resistance(bars):
     }
 
 
-def analyze_symbol(symbol):
-    """تحليل فني شامل لسهم واحد — Polygon API + yFinance"""
+def recommend(score):
+    if score >= 3:
+        return "🟢 فرصة قوية — ادخل"
+    if score >= 1:
+        return "🟡 فرصة متوسطة — راقب"
+    if score >= -1:
+        return "⚪ محايد — انتظر"
+    return "🔴 لا تدخل"
+
+
+def trade_direction(ema_signal, vwap_signal, rsi):
+    if ema_signal == "BULLISH" and vwap_signal == "ABOVE" and rsi < 70:
+        return "CALL ☝️"
+    if ema_signal == "BEARISH" and vwap_signal == "BELOW" and rsi > 30:
+        return "PUT 👇"
+    return "انتظر ⏳"
+
+
+def analyze_symbol(symbol, bars=None, indicator_values=None):
+    """تحليل فني شامل لسهم واحد — Polygon API + yFinance
+    bars / indicator_values: تُمرَّر من scan_market لو انحسبت مسبقاً لكل الأسهم"""
 
     # === سعر السهم (yFinance لأن Stock snapshot غير مصرح) ===
     price_data = get_price_yfinance(symbol)
@@ -159,17 +167,19 @@ def analyze_symbol(symbol):
     if current_price == 0:
         return {'symbol': symbol, 'error': 'لا يوجد سعر', 'price': 0}
 
-    # === مؤشرات فنية من Polygon API ===
-    indicators = get_technical_indicators(symbol)
-    rsi = indicators.get('rsi', 50)
-    ema9 = indicators.get('ema9', current_price)
-    ema21 = indicators.get('ema21', current_price)
-    macd_hist = indicators.get('macd_histogram', 0)
+    # === شموع يومية + مؤشرات فنية محلية ===
+    if bars is None:
+        bars = get_daily_aggs(symbol, INDICATOR_BARS)
+    if indicator_values is None:
+        indicator_values = get_technical_indicators({symbol: bars})[symbol]
+    rsi = indicator_values.get('rsi', 50)
+    ema9 = indicator_values.get('ema9', current_price)
+    ema21 = indicator_values.get('ema21', current_price)
+    macd_hist = indicator_values.get('macd_histogram', 0)
     ema_signal = "BULLISH" if ema9 > ema21 else "BEARISH"
 
-    # === بيانات يومية للـ Support/Resistance ===
-    bars = get_daily_aggs(symbol, 20)
-    sr = find_support_resistance(bars)
+    # === Support/Resistance من آخر 20 يوم ===
+    sr = find_support_resistance(bars[-SR_BARS:])
 
     # === VWAP تقريبي من آخر يوم ===
     vwap = current_price  # تقريب — Polygon ما يعطي intraday VWAP مباشرة
@@ -236,32 +246,17 @@ def analyze_symbol(symbol):
     # Support/Resistance proximity
     if sr['support'] > 0:
         price_vs_support = ((current_price - sr['support']) / sr['support']) * 100
-        if price_vs_support < 0.5:
+        if price_vs_support < SR_NEAR_PCT:
             score += 2
             signals.append(f"قريب من الدعم ({sr['support']}) — فرصة Call ✅✅")
     if sr['resistance'] > 0:
         price_vs_resistance = ((sr['resistance'] - current_price) / current_price) * 100
-        if price_vs_resistance < 0.5:
+        if price_vs_resistance < SR_NEAR_PCT:
             score += 2
             signals.append(f"قريب من المقاومة ({sr['resistance']}) — فرصة Put ✅✅")
 
-    # التوصية
-    if score >= 3:
-        recommendation = "🟢 فرصة قوية — ادخل"
-    elif score >= 1:
-        recommendation = "🟡 فرصة متوسطة — راقب"
-    elif score >= -1:
-        recommendation = "⚪ محايد — انتظر"
-    else:
-        recommendation = "🔴 لا تدخل"
-
-    # الاتجاه
-    if ema_signal == "BULLISH" and vwap_signal == "ABOVE" and rsi < 70:
-        direction = "CALL ☝️"
-    elif ema_signal == "BEARISH" and vwap_signal == "BELOW" and rsi > 30:
-        direction = "PUT 👇"
-    else:
-        direction = "انتظر ⏳"
+    recommendation = recommend(score)
+    direction = trade_direction(ema_signal, vwap_signal, rsi)
 
     return {
         'symbol': symbol,
@@ -295,10 +290,15 @@ def scan_market(symbols=None):
     if symbols is None:
         symbols = ['SPY', 'TSLA', 'NVDA', 'AAPL', 'MSFT', 'AMZN', 'META', 'AMD', 'GOOGL', 'NFLX']
 
+    # أسعار كل الأسهم بطلب yFinance واحد، وشموعها ثم المؤشرات بتمريرة vectorized وحدة
+    quotes.prefetch(symbols)
+    bars_by_symbol = {sym: get_daily_aggs(sym, INDICATOR_BARS) for sym in symbols}
+    indicators_by_symbol = get_technical_indicators(bars_by_symbol)
+
     results = []
     for sym in symbols:
         try:
-            r = analyze_symbol(sym)
+            r = analyze_symbol(sym, bars_by_symbol[sym], indicators_by_symbol[sym])
             results.append(r)
             print(f"  ✅ {sym}")
         except Exception as e:
@@ -308,6 +308,160 @@ def scan_market(symbols=None):
     return results
 
 
+# === وضع universe ===
+
+def load_universe(source=None):
+    """قائمة الأسهم: None → Finviz + UW Screener (الاتجاهين)، 'all' → كل السوق،
+    أو ملف مكونات مؤشر (رمز لكل سطر، أو CSV فيه عمود Symbol/Ticker)
+    يرجّع {رمز: [مصادر]} — 'all' يرجّع None"""
+    if source == 'all':
+        return None
+    universe = {}
+    if source:
+        with open(source, newline='') as f:
+            rows = list(csv.reader(f))
+        header = [h.strip().lower() for h in rows[0]] if rows else []
+        col = next((header.index(h) for h in ('symbol', 'ticker') if h in header), None)
+        for row in rows[1:] if col is not None else rows:
+            sym = row[col if col is not None else 0].strip().upper() if row else ''
+            if sym and not sym.startswith('#'):
+                universe.setdefault(sym.replace('-', '.'), []).append('file')
+        return universe
+
+    from morning_screener import step1_finviz_scanner, step1b_uw_options_screener
+    for name, scan in (('finviz', step1_finviz_scanner), ('uw', step1b_uw_options_screener)):
+        for candidates in scan().values():
+            for c in candidates:
+                tag = f"{name}:{c['direction']}"
+                tags = universe.setdefault(c['ticker'].upper().replace('-', '.'), [])
+                if tag not in tags:
+                    tags.append(tag)
+    return universe
+
+
+def _right_align(matrices, valid):
+    """الأيام الناقصة (NaN) لكل سهم تنتقل لبداية الصف — آخر عمود = آخر شمعة فعلية (نفس stack_closes)"""
+    order = np.argsort(valid, axis=1, kind='stable')
+    return {k: np.take_along_axis(m, order, axis=1) for k, m in matrices.items()}
+
+
+def score_universe(symbols, bars):
+    """نفس قواعد analyze_symbol (بدون Options) لكل الأسهم مع بعض
+    bars: {o,h,l,c,v: مصفوفة سهم × يوم} — السعر الحالي = آخر إغلاق. يرجّع list مرتبة بالنقاط"""
+    valid = ~np.isnan(bars['c'])
+    count = valid.sum(axis=1)
+    keep = count >= SR_BARS  # أقل من كذا (إدراج جديد) ما يكفي S/R
+    symbols = np.asarray(symbols)[keep]
+    m = _right_align({k: v[keep] for k, v in bars.items()}, valid[keep])
+    if not len(symbols):
+        return []
+
+    c, h, l, v = m['c'], m['h'], m['l'], m['v']
+    price = c[:, -1]
+    prev = c[:, -2]
+    ind = indicators.latest(c)
+    # نفس التقريب ونفس القيم الافتراضية اللي يشوفها analyze_symbol
+    rsi = np.where(np.isnan(ind['rsi']), 50, np.round(ind['rsi'], 1))
+    ema9 = np.where(np.isnan(ind['ema9']), price, np.round(ind['ema9'], 2))
+    ema21 = np.where(np.isnan(ind['ema21']), price, np.round(ind['ema21'], 2))
+    macd_hist = np.where(np.isnan(ind['macd_histogram']), 0, np.round(ind['macd_histogram'], 4))
+
+    highs = np.sort(h[:, -SR_BARS:], axis=1)
+    lows = np.sort(l[:, -SR_BARS:], axis=1)
+    resistance = np.round(highs[:, -3:].mean(axis=1), 2)
+    support = np.round(lows[:, :3].mean(axis=1), 2)
+    vwap = np.round((h[:, -1] + l[:, -1] + c[:, -1]) / 3, 2)
+    bullish = ema9 > ema21
+    above = price > vwap
+
+    score = np.select([(rsi >= 30) & (rsi <= 45), (rsi > 45) & (rsi <= 55), rsi > 70, rsi < 30],
+                      [2, 1, -2, -1], 0)
+    score += np.where(bullish, 1, -1)
+    score += np.sign(macd_hist).astype(int)
+    score += np.where(above, 1, -1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score += np.where((support > 0) & ((price - support) / support * 100 < SR_NEAR_PCT), 2, 0)
+        score += np.where((resistance > 0) & ((resistance - price) / price * 100 < SR_NEAR_PCT), 2, 0)
+    dollar_vol = np.nanmean(c[:, -SR_BARS:] * v[:, -SR_BARS:], axis=1)
+    rel_vol = v[:, -1] / np.nanmean(v[:, -SR_BARS:], axis=1)
+
+    results = []
+    for i in np.lexsort((-dollar_vol, -score)):
+        ema_signal = "BULLISH" if bullish[i] else "BEARISH"
+        vwap_signal = "ABOVE" if above[i] else "BELOW"
+        results.append({
+            'symbol': str(symbols[i]),
+            'price': round(float(price[i]), 2),
+            'change_pct': round(float((price[i] / prev[i] - 1) * 100), 2),
+            'rsi': float(rsi[i]),
+            'ema9': float(ema9[i]),
+            'ema21': float(ema21[i]),
+            'ema_signal': ema_signal,
+            'macd_histogram': float(macd_hist[i]),
+            'vwap': float(vwap[i]),
+            'vwap_signal': vwap_signal,
+            'support': float(support[i]),
+            'resistance': float(resistance[i]),
+            's1': round(float(lows[i, 0]), 2),
+            'r1': round(float(highs[i, -1]), 2),
+            'rel_volume': round(float(rel_vol[i]), 2),
+            'dollar_volume': round(float(dollar_vol[i])),
+            'bars': int(count[keep][i]),
+            'score': int(score[i]),
+            'direction': trade_direction(ema_signal, vwap_signal, rsi[i]),
+            'recommendation': recommend(score[i]),
+        })
+    return results
+
+
+def scan_universe(source=None):
+    """جدول مرتب لكل الـ universe من grouped daily — بدون yFinance ولا Options لكل سهم"""
+    started = time.perf_counter()
+    universe = load_universe(source)
+    days = bar_store.grouped_days(INDICATOR_BARS, max_fetch=UNIVERSE_FETCH_PER_RUN)
+    if not days:
+        return {'results': [], 'days': 0, 'days_wanted': INDICATOR_BARS, 'universe': 0, 'skipped': []}
+    if universe is None:
+        # كل السوق — فلتر سعر وسيولة على آخر يوم
+        last = list(days.values())[-1]
+        liquid = (last['c'] >= UNIVERSE_MIN_PRICE) & (last['c'] * last['v'] >= UNIVERSE_MIN_DOLLAR_VOL)
+        universe = {str(sym): ['all'] for sym in last['T'][liquid]}
+    symbols = sorted(universe)
+    bars = bar_store.grouped_matrix(symbols, days, fields=('h', 'l', 'c', 'v'))
+    results = score_universe(symbols, bars)
+    if source != 'all':
+        for r in results:
+            r['sources'] = universe[r['symbol']]
+    ranked = {r['symbol'] for r in results}
+    return {
+        'as_of': list(days)[-1],
+        'days': len(days),
+        'days_wanted': INDICATOR_BARS,
+        'universe': len(symbols),
+        'skipped': [s for s in symbols if s not in ranked],
+        'seconds': round(time.perf_counter() - started, 2),
+        'results': results,
+    }
+
+
+def format_universe_table(scan, top=None):
+    rows = scan['results'][:top] if top else scan['results']
+    lines = [f"📊 === Universe — {scan['universe']} سهم، شموع حتى {scan.get('as_of', '-')} "
+             f"({scan['days']} يوم، {scan.get('seconds', 0)}s) ===\n",
+             f"{'#':>4} {'Symbol':<7} {'Price':>9} {'Chg%':>7} {'RSI':>5} {'EMA':<4} {'MACD':>9} "
+             f"{'VWAP':<5} {'RelV':>5} {'Score':>5}  Direction"]
+    for rank, r in enumerate(rows, 1):
+        lines.append(f"{rank:>4} {r['symbol']:<7} {r['price']:>9.2f} {r['change_pct']:>+7.2f} {r['rsi']:>5.1f} "
+                     f"{'↑' if r['ema_signal'] == 'BULLISH' else '↓':<4} {r['macd_histogram']:>9.4f} "
+                     f"{r['vwap_signal'][:5]:<5} {r['rel_volume']:>5.2f} {r['score']:>5}  {r['direction']}")
+    if scan.get('skipped'):
+        lines.append(f"\n⚠️ بدون شموع كافية ({len(scan['skipped'])}): {', '.join(scan['skipped'][:20])}")
+    if scan['days'] < scan.get('days_wanted', 0):
+        lines.append(f"\n⏳ كاش grouped فيه {scan['days']}/{scan['days_wanted']} يوم — كل تشغيل يضيف "
+                     f"{UNIVERSE_FETCH_PER_RUN}، أو تسخين كامل: bar_store.py grouped {scan['days_wanted']}")
+    return "\n".join(lines)
+
+
 def format_report(results):
     """تنسيق التقرير"""
     lines = ["📊 === تحليل فني — صُحبة Trading v2.0 ===\n"]
@@ -347,8 +501,27 @@ def format_report(results):
     return "\n".join(lines)
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='التحليل الفني — صُحبة Trading')
+    parser.add_argument('symbols', nargs='*', help='أسهم محددة — تحليل كامل مع Options')
+    parser.add_argument('--universe', nargs='?', const='', metavar='file|all',
+                        help='جدول مرتب لكل الـ universe (بدون قيمة: Finviz + UW)')
+    parser.add_argument('--top', type=int, help='أول N بجدول الـ universe')
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    symbols = sys.argv[1:] if len(sys.argv) > 1 else None
+    args = parse_args()
+    if args.universe is not None:
+        print("🔄 جاري مسح الـ universe (Polygon grouped daily)...\n")
+        scan = scan_universe(args.universe or None)
+        print(format_universe_table(scan, args.top))
+        with open(UNIVERSE_FILE, 'w') as f:
+            json.dump(scan, f, indent=2, default=str, ensure_ascii=False)
+        print(f"✅ تم حفظ النتائج في {UNIVERSE_FILE}")
+        sys.exit(0)
+
+    symbols = args.symbols or None
     print("🔄 جاري التحليل الفني (Polygon API + yFinance)...\n")
     results = scan_market(symbols)
     report = format_report(results)
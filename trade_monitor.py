@@ -8,37 +8,43 @@
 TP: +25% بيع نصف → +50% بيع الباقي
 SL: -30% خروج فوري
 DTE ≤ 2 → خروج
+
+تشغيل:
+  python3 trade_monitor.py            — فحص مرة وحدة (cron)
+  python3 trade_monitor.py --stream   — مراقبة مستمرة: القواعد تنفحص مع كل tick
+  (لا تشغّل الوضعين مع بعض — كل واحد يرسل أوامر بيع)
 """
 from ib_insync import *
-import requests
 import json
-import os
+import signal
+import sys
+import time
 from datetime import datetime
 
+import black_scholes as bs
+import contract_cache
+import portfolio_risk
+import trade_store
+from market_client import polygon_get
+from options_chain import compact_contract
+from order_manager import OrderManager
+
 IB_HOST = '127.0.0.1'
 IB_PORT = 4002
 CLIENT_ID = 50
-TRADES_LOG = '/home/openclaw/.openclaw/workspace/trades_log.json'
 
 TP1_PCT = 0.25
 TP2_PCT = 0.50
 SL_PCT = -0.30
 DTE_EXIT = 2
 DELTA_ALERT_THRESHOLD = 0.10  # تنبيه إذا delta تغير أكثر من 0.10
-
-POLYGON_KEY = '[REDACTED:POLYGON_KEY]'
-POLYGON_BASE = 'https://api.polygon.io'
-TIMEOUT = 15
-
-
-def polygon_get(path, params=None):
-    if params is None:
-        params = {}
-    params['apiKey'] = POLYGON_KEY
-    resp = requests.get(f"{POLYGON_BASE}{path}", params=params, timeout=TIMEOUT)
-    if resp.status_code == 200:
-        return resp.json()
-    return None
+QUOTE_TIMEOUT = 5   # أقصى انتظار لأسعار كل العقود مع بعض
+FILL_TIMEOUT = 30   # أقصى انتظار لتعبئة أوامر البيع — بعدها الأمر يتلغى
+STREAM_CLIENT_ID = 51
+DEBOUNCE_TICKS = 2     # الشرط لازم يتكرر بـ ticks متتالية قبل التنفيذ (tick شاذ ما يبيع)
+RELOAD_SECONDS = 30    # كل كم ثانية نشيك على تغييرات trade_store (صفقات جديدة/مقفلة/متعدلة)
+EXIT_COOLDOWN = 60     # ثواني بعد أمر خروج ما تعبّى (سوق مقفل / عقد موقوف) — تتضاعف مع كل فشل
+MAX_EXIT_FAILURES = 3  # بعدها نوقف المحاولة لهالصفقة + تنبيه (يحتاج تدخل يدوي)
 
 
 def get_option_snapshot(symbol, expiry, strike, right):
@@ -59,41 +65,111 @@ def get_option_snapshot(symbol, expiry, strike, right):
     })
 
     if data and data.get('results'):
-        opt = data['results'][0]
-        greeks = opt.get('greeks', {})
-        quote = opt.get('last_quote', {})
-        day = opt.get('day', {})
+        rec = compact_contract(data['results'][0])
+        bs.fill_greeks([rec])  # greeks فاضية (0DTE / سيولة قليلة) → محسوبة من mid
         return {
             'found': True,
-            'bid': quote.get('bid', 0) or 0,
-            'ask': quote.get('ask', 0) or 0,
-            'mid': round((quote.get('bid', 0) + quote.get('ask', 0)) / 2, 2) if quote.get('bid') and quote.get('ask') else 0,
-            'delta': round(greeks.get('delta', 0), 4),
-            'gamma': round(greeks.get('gamma', 0), 4),
-            'theta': round(greeks.get('theta', 0), 4),
-            'vega': round(greeks.get('vega', 0), 4),
-            'iv': round(opt.get('implied_volatility', 0), 4),
-            'oi': day.get('open_interest', 0) or 0,
-            'volume': day.get('volume', 0) or 0,
+            'bid': rec['bid'],
+            'ask': rec['ask'],
+            'mid': round((rec['bid'] + rec['ask']) / 2, 2) if rec['bid'] and rec['ask'] else 0,
+            'delta': round(rec['delta'] or 0, 4),
+            'gamma': round(rec['gamma'] or 0, 4),
+            'theta': round(rec['theta'] or 0, 4),
+            'vega': round(rec['vega'] or 0, 4),
+            'iv': round(rec['iv'] or 0, 4),
+            'oi': rec['oi'],
+            'volume': rec['volume'],
+            'underlying_price': rec['underlying_price'],
+            'greeks_model': rec.get('greeks_model', False),
         }
     return {'found': False}
 
 
-def load_trades():
-    if os.path.exists(TRADES_LOG):
-        with open(TRADES_LOG, 'r') as f:
-            return json.load(f)
-    return []
+def trade_key(trade):
+    return trade.get('id') or f"{trade['symbol']}_{trade['expiry']}_{trade['strike']}_{trade['right']}"
+
+
+def _contract_fields(trade):
+    return trade['symbol'], str(trade['expiry']), float(trade['strike']), trade['right']
+
+
+def days_to_expiry(expiry):
+    return (datetime.strptime(str(expiry), '%Y%m%d') - datetime.now()).days
+
+
+def _valid(value):
+    """سعر IB صالح: مو None ولا NaN وأكبر من صفر"""
+    return value is not None and value == value and value > 0
+
+
+def has_quote(tk):
+    return _valid(tk.bid) and _valid(tk.ask)
+
+
+def ticker_price(tk):
+    """mid لو فيه bid/ask، وإلا آخر سعر، وإلا 0"""
+    if has_quote(tk):
+        return (tk.bid + tk.ask) / 2
+    return tk.last if _valid(tk.last) else 0
+
+
+def get_net_liq(ib):
+    for item in ib.accountSummary():
+        if item.tag == 'NetLiquidation':
+            return float(item.value)
+    return 0
+
 
+def wait_until(ib, condition, timeout):
+    """ينتظر تحديثات IB (بدون sleep ثابت) لين يتحقق الشرط أو ينتهي الوقت"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        ib.waitOnUpdate(timeout=remaining)
+    return True
 
-def save_trades(trades):
-    with open(TRADES_LOG, 'w') as f:
-        json.dump(trades, f, indent=2, default=str)
+
+def decide_exit(qty, tp1_hit, current, pnl_pct, dte):
+    """قواعد الخروج → (action, sell_qty)"""
+    if dte <= DTE_EXIT and qty > 0:
+        return "DTE_EXIT", qty
+    if current > 0 and pnl_pct <= SL_PCT * 100:
+        return "SL_EXIT", qty
+    if not tp1_hit and pnl_pct >= TP1_PCT * 100:
+        return "TP1_SELL_HALF", max(1, qty // 2)
+    if tp1_hit and pnl_pct >= TP2_PCT * 100:
+        return "TP2_SELL_REST", qty
+    return "HOLD", 0
+
+
+def apply_exit(trade, action, qty, sell_qty, fill_price):
+    """تحديث سجل الصفقة بعد أمر البيع"""
+    if action == "TP1_SELL_HALF":
+        trade['tp1_hit'] = True
+        trade['qty_remaining'] = qty - sell_qty
+    elif action in ("TP2_SELL_REST", "SL_EXIT", "DTE_EXIT"):
+        trade['status'] = 'CLOSED'
+        trade['close_reason'] = action
+        trade['close_price'] = fill_price
+        trade['close_time'] = datetime.now().isoformat()
+        trade['qty_remaining'] = 0
+
+
+def settle_exit(trade, action, qty, sell_qty, filled, fill_price):
+    """تحديث الصفقة حسب الكمية اللي تعبّت فعلاً — أمر ما تعبّى ما يغيّر شي"""
+    if filled <= 0:
+        return
+    if filled < sell_qty and action != "TP1_SELL_HALF":
+        # تعبئة جزئية لأمر خروج كامل — الصفقة تبقى مفتوحة بالباقي
+        trade['qty_remaining'] = qty - filled
+    else:
+        apply_exit(trade, action, qty, filled, fill_price)
 
 
 def monitor_all():
-    trades = load_trades()
-    open_trades = [t for t in trades if t.get('status') == 'OPEN']
+    open_trades = trade_store.open_trades()
 
     if not open_trades:
         print(json.dumps({"message": "No open trades to monitor"}))
@@ -110,15 +186,22 @@ def monitor_all():
         else:
             print(f"⚠️ Polygon: {trade['symbol']} — لا بيانات، نستخدم IB")
 
-    # === ثانياً: IB للتنفيذ والأسعار الحية ===
+    # === ثانياً: IB — تأهيل واشتراك كل العقود دفعة وحدة ===
     ib = IB()
     ib.connect(IB_HOST, IB_PORT, clientId=CLIENT_ID, timeout=15)
     ib.reqMarketDataType(3)
 
+    contracts = contract_cache.qualify(ib, *[
+        Option(t['symbol'], t['expiry'], t['strike'], t['right'], 'SMART', '100', 'USD') for t in open_trades])
+    tickers = [ib.reqMktData(c) if c is not None else None for c in contracts]
+    # ننتظر لين كل العقود يصير لها bid/ask أو ينتهي الوقت (بدل 3 ثواني لكل عقد)
+    wait_until(ib, lambda: all(has_quote(tk) for tk in tickers if tk is not None), QUOTE_TIMEOUT)
+
     results = []
     alerts = []  # تنبيهات مهمة
+    exits = []   # (trade, result, action, qty, sell_qty, contract)
 
-    for trade in open_trades:
+    for trade, contract, tk in zip(open_trades, contracts, tickers):
         try:
             symbol = trade['symbol']
             expiry = trade['expiry']
@@ -126,27 +209,20 @@ def monitor_all():
             right = trade['right']
             entry_price = trade['entry_price']
             qty = trade.get('qty_remaining', trade['qty'])
-            tp1_hit = trade.get('tp1_hit', False)
             entry_greeks = trade.get('entry_greeks', {})
 
+            if contract is None:
+                raise ValueError(f"contract not found: {symbol} {expiry} {strike}{right}")
+
             # DTE
-            exp_date = datetime.strptime(str(expiry), '%Y%m%d')
-            dte = (exp_date - datetime.now()).days
+            dte = days_to_expiry(expiry)
 
             # بيانات Polygon
             key = f"{symbol}_{expiry}_{strike}_{right}"
             poly = polygon_data.get(key, {})
 
             # سعر من IB
-            contract = Option(symbol, expiry, strike, right, 'SMART', '100', 'USD')
-            ib.qualifyContracts(contract)
-            [tk] = ib.reqTickers(contract)
-            ib.sleep(3)
-
-            bid = tk.bid if tk.bid and tk.bid > 0 else 0
-            ask = tk.ask if tk.ask and tk.ask > 0 else 0
-            mid = (bid + ask) / 2 if bid > 0 and ask > 0 else (tk.last or 0)
-            current = mid if mid > 0 else (tk.last or 0)
+            current = ticker_price(tk)
 
             # استخدم Polygon mid لو IB ما عنده سعر
             if current <= 0 and poly.get('found') and poly.get('mid', 0) > 0:
@@ -186,62 +262,59 @@ def monitor_all():
                             alerts.append(f"⚠️ {symbol} ${strike}: IV تغير {iv_change_pct:+.1f}% (من {iv_entry} إلى {iv_now})")
 
             # === قرار البيع ===
-            action = "HOLD"
-            sell_qty = 0
-
-            if dte <= DTE_EXIT and qty > 0:
-                action = "DTE_EXIT"
-                sell_qty = qty
-            elif current > 0 and pnl_pct <= SL_PCT * 100:
-                action = "SL_EXIT"
-                sell_qty = qty
-            elif not tp1_hit and pnl_pct >= TP1_PCT * 100:
-                action = "TP1_SELL_HALF"
-                sell_qty = max(1, qty // 2)
-            elif tp1_hit and pnl_pct >= TP2_PCT * 100:
-                action = "TP2_SELL_REST"
-                sell_qty = qty
-
-            # تنفيذ البيع
-            fill_price = 0
-            if sell_qty > 0 and qty > 0:
-                order = MarketOrder('SELL', sell_qty)
-                t = ib.placeOrder(contract, order)
-                for _ in range(15):
-                    ib.sleep(2)
-                    if t.orderStatus.status == 'Filled':
-                        break
-                fill_price = t.orderStatus.avgFillPrice or 0
-
-                if action == "TP1_SELL_HALF":
-                    trade['tp1_hit'] = True
-                    trade['qty_remaining'] = qty - sell_qty
-                elif action in ("TP2_SELL_REST", "SL_EXIT", "DTE_EXIT"):
-                    trade['status'] = 'CLOSED'
-                    trade['close_reason'] = action
-                    trade['close_price'] = fill_price
-                    trade['close_time'] = datetime.now().isoformat()
-                    trade['qty_remaining'] = 0
+            action, sell_qty = decide_exit(qty, trade.get('tp1_hit', False), current, pnl_pct, dte)
 
             result = {
                 "symbol": symbol, "strike": strike, "expiry": expiry,
                 "dte": dte, "entry": entry_price, "current": round(current, 2),
                 "pnl_pct": round(pnl_pct, 1), "pnl_dollar": round(pnl_dollar, 2),
                 "qty": qty, "action": action, "sell_qty": sell_qty,
-                "fill_price": round(fill_price, 2),
+                "fill_price": 0,
                 # === بيانات Polygon الجديدة ===
                 "greeks_now": greeks_now,
                 "greeks_change": greeks_change,
             }
             results.append(result)
+            if sell_qty > 0 and qty > 0:
+                exits.append((trade, result, action, qty, sell_qty, contract))
 
         except Exception as e:
             results.append({"symbol": trade.get('symbol', '?'), "error": str(e)})
 
-    save_trades(trades)
+    for tk in tickers:
+        if tk is not None:
+            ib.cancelMktData(tk.contract)
+
+    # === تنفيذ البيع — كل الأوامر مرة وحدة وانتظار تعبئتها مع بعض (الما اكتمل يتلغى) ===
+    om = OrderManager(ib, timeout=FILL_TIMEOUT)
+    orders = [om.place(contract, MarketOrder('SELL', sell_qty), tag=f"{action} {trade['symbol']} {trade['strike']}")
+              for trade, _, action, _, sell_qty, contract in exits]
+    om.wait()
+
+    settled = []
+    for (trade, result, action, qty, sell_qty, _), mo in zip(exits, orders):
+        result['fill_price'] = round(mo.avg_price, 2)
+        result['filled'] = mo.filled
+        result['fill_latency_ms'] = mo.summary()['fill_latency_ms']
+        before = dict(trade)
+        settle_exit(trade, action, qty, sell_qty, mo.filled, mo.avg_price)
+        settled.append(trade_store.changes(before, trade))
+
+    # الحقول اللي تغيرت بس — تندمج فوق الصف الحالي (process ثاني ممكن كتب خلال الانتظار)
+    trade_store.update(*settled)
+
+    # === مخاطر المحفظة بعد الخروج (نفس snapshots الـ Polygon — بدون طلبات إضافية) ===
+    still_open = [t for t in open_trades if t.get('status') == 'OPEN']
+    portfolio = portfolio_risk.from_trades(still_open, {
+        t.get('id'): polygon_data.get(f"{t['symbol']}_{t['expiry']}_{t['strike']}_{t['right']}", {})
+        for t in still_open})
+    risk = portfolio.summary(get_net_liq(ib))
+    alerts.extend(f"🛡️ حد المحفظة: {v}" for v in risk['violations'])
+    if risk['unpriced']:
+        alerts.append(f"🛡️ {risk['unpriced']} مراكز بدون سعر ({', '.join(portfolio.unpriced())}) — المخاطر أعلاه ناقصة")
     ib.disconnect()
 
-    output = {"trades": results, "alerts": alerts}
+    output = {"trades": results, "alerts": alerts, "portfolio": risk}
     print(json.dumps(output, indent=2))
 
     # طباعة التنبيهات
@@ -251,5 +324,174 @@ def monitor_all():
             print(a)
 
 
+class StreamMonitor:
+    """مراقبة مستمرة عبر pendingTickersEvent — القرار مع كل tick بدون polling"""
+
+    def __init__(self, ib):
+        self.ib = ib
+        self.om = OrderManager(ib, timeout=FILL_TIMEOUT)
+        self.watch = {}   # trade_key → {'trade', 'contract', 'hits', 'order', 'quote', 'failures', 'retry_at'}
+        self.by_con = {}  # conId → trade_key
+        self.db_version = None
+        self.portfolio = portfolio_risk.Portfolio([])
+        self.net_liq = 0
+        self.breaches = set()
+
+    def sync_trades(self):
+        """يطابق المراقبة مع trade_store لما process ثاني يكتب (fast_trade / monitor_all / تعديل يدوي):
+        صفقة مقفلة → توقف مراقبتها، صفقة متعدلة → نسختها تتبدل، صفقة جديدة → تأهيل واشتراك دفعة وحدة"""
+        version = trade_store.data_version()
+        if version == self.db_version:
+            return  # ما أحد كتب من آخر مرة
+        self.db_version = version
+        current = {trade_key(t): t for t in trade_store.open_trades()}
+
+        for key in list(self.watch):
+            w = self.watch[key]
+            trade = current.get(key)
+            if trade is None:
+                print(f"🔕 {w['trade']['symbol']} ${w['trade']['strike']}: انقفلت برا المراقب — توقف المراقبة")
+                self.unwatch(key)
+            elif _contract_fields(trade) != _contract_fields(w['trade']):
+                self.unwatch(key)  # العقد نفسه تعدّل — يرجع يتأهل تحت مع الجديد
+            elif trade != w['trade']:
+                # تعديل من برا (كمية / tp1_hit) — نسخة جديدة وعدّاد الفشل يبدأ من الصفر
+                w.update(trade=trade, hits=0, failures=0, retry_at=0)
+
+        new = [t for key, t in current.items() if key not in self.watch]
+        contracts = contract_cache.qualify(self.ib, *[
+            Option(t['symbol'], t['expiry'], t['strike'], t['right'], 'SMART', '100', 'USD') for t in new]) if new else []
+        for trade, contract in zip(new, contracts):
+            if contract is None:
+                print(f"⚠️ {trade['symbol']} ${trade['strike']}{trade['right']}: عقد غير موجود")
+                continue
+            key = trade_key(trade)
+            self.watch[key] = {'trade': trade, 'contract': contract, 'hits': 0, 'order': None, 'quote': {},
+                               'failures': 0, 'retry_at': 0}
+            self.by_con[contract.conId] = key
+            self.ib.reqMktData(contract)
+            print(f"📡 {trade['symbol']} ${trade['strike']}{trade['right']} {trade['expiry']} — entry {trade['entry_price']}")
+        self.net_liq = get_net_liq(self.ib)
+        self.rebuild_portfolio()
+
+    def unwatch(self, key):
+        w = self.watch.pop(key, None)
+        if w is None:
+            return  # انشالت أصلاً (sync_trades) قبل ما يرجع أمرها
+        self.by_con.pop(w['contract'].conId, None)
+        self.ib.cancelMktData(w['contract'])
+
+    def rebuild_portfolio(self):
+        """لما تتغير المراكز (صفقة جديدة/خروج) — آخر spot/IV لكل عقد محفوظ في w['quote']"""
+        self.portfolio = portfolio_risk.Portfolio([
+            portfolio_risk.position_from_trade(w['trade'], w['quote']) for w in self.watch.values()])
+
+    def check_risk(self):
+        """تنبيه مرة وحدة لما حد ينكسر أو يرجع — مو مع كل tick"""
+        violations = set(self.portfolio.check_limits(self.net_liq))
+        for v in sorted(violations - self.breaches):
+            print(f"🛡️ حد المحفظة: {v}")
+        if self.breaches and not violations:
+            print("✅ المحفظة رجعت ضمن الحدود")
+        self.breaches = violations
+
+    def on_tickers(self, tickers):
+        for tk in tickers:
+            key = self.by_con.get(tk.contract.conId)
+            if key is None:
+                continue
+            w = self.watch[key]
+            mg = tk.modelGreeks
+            if mg is not None:
+                w['quote'] = {'underlying_price': mg.undPrice, 'iv': mg.impliedVol}
+                self.portfolio.update(w['trade'].get('id'), spot=mg.undPrice, iv=mg.impliedVol)
+            self.evaluate(w, tk)
+
+    def evaluate(self, w, tk):
+        if w['order'] is not None:
+            return  # أمر خروج معلّق — ما نرسل ثاني
+        if w['failures'] >= MAX_EXIT_FAILURES or time.monotonic() < w['retry_at']:
+            return  # متوقفة بعد فشل متكرر / تهدئة بعد أمر ما تعبّى
+        trade = w['trade']
+        qty = trade.get('qty_remaining', trade['qty'])
+        current = ticker_price(tk)
+        entry_price = trade['entry_price']
+        pnl_pct = ((current / entry_price) - 1) * 100 if entry_price > 0 and current > 0 else 0
+        action, sell_qty = decide_exit(qty, trade.get('tp1_hit', False), current, pnl_pct,
+                                       days_to_expiry(trade['expiry']))
+        if sell_qty <= 0 or qty <= 0:
+            w['hits'] = 0
+            return
+        w['hits'] += 1
+        if w['hits'] < DEBOUNCE_TICKS:
+            return
+
+        started = time.perf_counter()
+        w['order'] = self.om.place(
+            w['contract'], MarketOrder('SELL', sell_qty), tag=f"{action} {trade['symbol']} {trade['strike']}",
+            on_done=lambda mo, w=w: self.on_done(w, mo, action, qty, sell_qty))
+        print(f"⚡ {trade['symbol']} ${trade['strike']}{trade['right']}: {action} {sell_qty}x @ ~{current:.2f} "
+              f"({pnl_pct:+.1f}%) — أمر خلال {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    def on_done(self, w, mo, action, qty, sell_qty):
+        """الأمر اكتمل أو تلغى بعد المهلة — الصفقة الباقية ترجع للمراقبة مع الـ tick الجاي
+        بدون تعبئة: تهدئة EXIT_COOLDOWN (تتضاعف) قبل المحاولة الجاية، وبعد MAX_EXIT_FAILURES نوقف وننبّه"""
+        w['order'] = None
+        w['hits'] = 0
+        trade = w['trade']
+        if mo.filled <= 0:
+            w['failures'] += 1
+            if w['failures'] >= MAX_EXIT_FAILURES:
+                print(f"🚨 {trade['symbol']} ${trade['strike']}: أمر {action} فشل {w['failures']} مرات ({mo.status}) "
+                      f"— وقفنا المحاولة، يحتاج تدخل يدوي")
+            else:
+                cooldown = EXIT_COOLDOWN * 2 ** (w['failures'] - 1)
+                w['retry_at'] = time.monotonic() + cooldown
+                print(f"❌ {trade['symbol']} ${trade['strike']}: أمر {action} انتهى بدون تعبئة ({mo.status}) "
+                      f"— محاولة ثانية بعد {cooldown}s")
+            return
+        w['failures'] = 0
+        before = dict(trade)
+        settle_exit(trade, action, qty, sell_qty, mo.filled, mo.avg_price)
+        merged = trade_store.update(trade_store.changes(before, trade))
+        if merged:
+            w['trade'] = trade = merged[0]  # الصف بعد الدمج — فيه أي تعديل من process ثاني
+        print(f"✅ {trade['symbol']} ${trade['strike']}: {action} {mo.filled}x @ {mo.avg_price:.2f} "
+              f"(تعبئة خلال {mo.summary()['fill_latency_ms']}ms)")
+        if trade.get('status') == 'CLOSED':
+            self.unwatch(trade_key(trade))
+        self.rebuild_portfolio()
+
+
+def stream_monitor():
+    ib = IB()
+    ib.connect(IB_HOST, IB_PORT, clientId=STREAM_CLIENT_ID, timeout=15)
+    ib.reqMarketDataType(3)
+    monitor = StreamMonitor(ib)
+    ib.pendingTickersEvent += monitor.on_tickers
+
+    stop = []
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.append(True))
+
+    print("📡 Trade Monitor (stream) — Ctrl+C للإيقاف")
+    last_sync = 0
+    try:
+        while not stop:
+            if time.monotonic() - last_sync >= RELOAD_SECONDS:
+                monitor.sync_trades()
+                last_sync = time.monotonic()
+            monitor.check_risk()
+            ib.sleep(1)  # الأحداث (ticks + تعبئة الأوامر) تنعالج أثناء الانتظار
+    finally:
+        for key in list(monitor.watch):
+            monitor.unwatch(key)
+        ib.disconnect()
+        print("👋 تم الإيقاف")
+
+
 if __name__ == "__main__":
-    monitor_all()
+    if '--stream' in sys.argv:
+        stream_monitor()
+    else:
+        monitor_all()
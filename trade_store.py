@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+📒 Trade Store — صُحبة Trading
+سجل الصفقات في SQLite (وضع WAL) بدل إعادة كتابة trades_log.json كامل مع كل تغيير
+- التحديث بالحقول المتغيرة بس: الصف ينقرأ من جديد داخل الـ transaction وتندمج فوقه
+  → نسخة قديمة عند المراقب ما تمسح إغلاق أو tp1_hit كتبه process ثاني
+- فهرس على status → عدّ/جلب الصفقات المفتوحة بدون تحميل السجل كامل
+- أول تشغيل: ترحيل تلقائي من trades_log.json
+- trades_log.json ما يتكتب مع كل تغيير — export عند الطلب بس
+
+استخدام:
+  python3 trade_store.py open     — الصفقات المفتوحة
+  python3 trade_store.py export   — كتابة trades_log.json من القاعدة
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# === إعدادات ===
+TRADES_DB = '/home/openclaw/.openclaw/workspace/trades.sqlite'
+TRADES_LOG = '/home/openclaw/.openclaw/workspace/trades_log.json'
+
+_local = threading.local()
+
+
+def _conn():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(TRADES_DB, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('''CREATE TABLE IF NOT EXISTS trades (
+            id INTEGER PRIMARY KEY,
+            status TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            expiry TEXT NOT NULL,
+            strike REAL NOT NULL,
+            data TEXT NOT NULL,
+            updated REAL NOT NULL
+        )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS trades_status ON trades(status)')
+        _local.conn = conn
+        _migrate(conn)
+    return conn
+
+
+def _migrate(conn):
+    """مرة وحدة: استيراد trades_log.json لو القاعدة فاضية"""
+    if not os.path.exists(TRADES_LOG):
+        return
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        if conn.execute('SELECT 1 FROM trades LIMIT 1').fetchone() is None:
+            with open(TRADES_LOG) as f:
+                trades = json.load(f)
+            # الـ ids الأصلية أولاً، بعدها المكرر/الناقص ياخذ id جديد
+            seen = set()
+            later = []
+            for trade in trades:
+                if trade.get('id') is None or trade['id'] in seen:
+                    later.append(trade)
+                else:
+                    seen.add(trade['id'])
+                    _write(conn, trade)
+            for trade in later:
+                trade['id'] = None
+                _write(conn, trade)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def _write(conn, trade):
+    cur = conn.execute(
+        'INSERT OR REPLACE INTO trades (id, status, symbol, expiry, strike, data, updated) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (trade.get('id'), trade.get('status', 'OPEN'), trade['symbol'], str(trade['expiry']),
+         float(trade['strike']), json.dumps(trade, default=str), time.time()))
+    if trade.get('id') is None:
+        # id من القاعدة — نحدّث نسخة JSON عشان تحمله
+        trade['id'] = cur.lastrowid
+        conn.execute('UPDATE trades SET data = ? WHERE id = ?', (json.dumps(trade, default=str), trade['id']))
+    return trade['id']
+
+
+def _rows(sql, params=()):
+    return [json.loads(row[0]) for row in _conn().execute(sql, params)]
+
+
+def add(trade):
+    """صفقة جديدة — يرجّع الـ id"""
+    conn = _conn()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        trade_id = _write(conn, trade)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return trade_id
+
+
+def changes(before, after):
+    """الحقول اللي تغيرت بين نسختين من نفس الصفقة + id — الشكل اللي update يستقبله"""
+    diff = {k: v for k, v in after.items() if before.get(k, object()) != v}
+    if diff:
+        diff['id'] = after['id']
+    return diff
+
+
+def update(*changes):
+    """تحديث صفقات موجودة في transaction وحدة — كل dict فيه id + الحقول المتغيرة بس
+    الصف ينقرأ داخل BEGIN IMMEDIATE والحقول تندمج فوقه (read-modify-write) → يرجّع الصفقات بعد الدمج"""
+    changes = [c for c in changes if c]
+    if not changes:
+        return []
+    conn = _conn()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        merged = []
+        for change in changes:
+            row = conn.execute('SELECT data FROM trades WHERE id = ?', (change['id'],)).fetchone()
+            if row is None:
+                raise KeyError(f"trade {change['id']} not found")
+            trade = json.loads(row[0])
+            trade.update(change)
+            _write(conn, trade)
+            merged.append(trade)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return merged
+
+
+def get(trade_id):
+    rows = _rows('SELECT data FROM trades WHERE id = ?', (trade_id,))
+    return rows[0] if rows else None
+
+
+def open_trades():
+    return _rows("SELECT data FROM trades WHERE status = 'OPEN' ORDER BY id")
+
+
+def count_open():
+    return _conn().execute("SELECT COUNT(*) FROM trades WHERE status = 'OPEN'").fetchone()[0]
+
+
+def find_open(symbol, expiry, strike):
+    rows = _rows("SELECT data FROM trades WHERE status = 'OPEN' AND symbol = ? AND expiry = ? AND strike = ? "
+                 "ORDER BY id LIMIT 1", (symbol, str(expiry), float(strike)))
+    return rows[0] if rows else None
+
+
+def all_trades():
+    return _rows('SELECT data FROM trades ORDER BY id')
+
+
+def data_version():
+    """يتغير لما process ثاني يكتب — المراقب يعرف متى يعيد قراءة المفتوح"""
+    return _conn().execute('PRAGMA data_version').fetchone()[0]
+
+
+def export_snapshot():
+    """trades_log.json من القاعدة (كتابة ذرية) — يدوي (export)، مصدر الحقيقة هو القاعدة"""
+    tmp = f"{TRADES_LOG}.tmp.{os.getpid()}"
+    try:
+        with open(tmp, 'w') as f:
+            json.dump(all_trades(), f, separators=(',', ':'), default=str)
+        os.replace(tmp, TRADES_LOG)
+    except OSError:
+        pass
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else ''
+    if cmd == 'open':
+        print(json.dumps(open_trades(), indent=2, ensure_ascii=False))
+    elif cmd == 'export':
+        export_snapshot()
+        print(f"✅ {TRADES_LOG}")
+    else:
+        print(__doc__)
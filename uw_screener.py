@@ -1,27 +1,17 @@
 #!/usr/bin/env python3
 """Flow-First Options Screener — UW + Polygon"""
 
-import requests, json
+import json
 from datetime import datetime, timezone, timedelta
 
-UW_KEY = "[REDACTED:UW_KEY]"
-POLY_KEY = "[REDACTED:POLYGON_KEY]"
-UW = "https://api.unusualwhales.com/api"
-HDR = {"Authorization": f"Bearer {UW_KEY}", "Accept": "application/json"}
-
-def get(url, params=None, headers=None):
-    try:
-        r = requests.get(url, params=params, headers=headers or HDR, timeout=15)
-        return r.json() if r.status_code == 200 else None
-    except:
-        return None
+from market_client import uw_get
 
 # ─── Step 1: Market Tide ───
 def get_market_tide():
     print("━" * 60)
     print("📊 Step 1: Market Tide")
     print("━" * 60)
-    data = get(f"{UW}/market/market-tide")
+    data = uw_get("/api/market/market-tide")
     if not data or not data.get("data"):
         print("  ⚠ No data, defaulting to Neutral")
         return "⚪ Neutral"
@@ -64,7 +54,7 @@ def screen_contracts():
     all_c = []
     for t in ["Calls", "Puts"]:
         params = {**base, "type": t}
-        data = get(f"{UW}/screener/option-contracts", params=params)
+        data = uw_get("/api/screener/option-contracts", params=params)
         if data and isinstance(data.get("data"), list):
             for c in data["data"]:
                 c["_type"] = t
@@ -139,7 +129,7 @@ def score_contract(c, tide):
         score += 1; reasons.append("Tide ✓")
     
     # 3. Flow Alerts
-    flow = get(f"{UW}/option-trades/flow-alerts", params={"ticker_symbol": ticker, "limit": 5, "min_premium": 50000})
+    flow = uw_get("/api/option-trades/flow-alerts", params={"ticker_symbol": ticker, "limit": 5, "min_premium": 50000})
     flow_data = flow.get("data", []) if flow else []
     if isinstance(flow_data, list) and len(flow_data) >= 2:
         score += 1; reasons.append(f"Flow({len(flow_data)})")
@@ -149,12 +139,12 @@ def score_contract(c, tide):
             score += 1; reasons.append(f"Sweep({sweeps})")
     
     # 4. Spot GEX
-    gex = get(f"{UW}/stock/{ticker}/spot-exposures/strike")
+    gex = uw_get(f"/api/stock/{ticker}/spot-exposures/strike")
     if gex and gex.get("data"):
         score += 2; reasons.append("GEX ✓")
     
     # 5. Dark Pool
-    dp = get(f"{UW}/darkpool/{ticker}")
+    dp = uw_get(f"/api/darkpool/{ticker}")
     if dp and dp.get("data"):
         dp_list = dp["data"] if isinstance(dp["data"], list) else []
         if len(dp_list) > 0: